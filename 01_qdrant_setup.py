@@ -1,125 +1,101 @@
 # qdrant_setup.py
-from qdrant_client import QdrantClient
-from qdrant_client.models import (
-    Distance,
-    VectorParams,
-    PointStruct,
-    PayloadSchemaType,
-    HnswConfigDiff,
-    OptimizersConfigDiff,
-)
-from openai import OpenAI
-import os
+from clients import get_client
 from dummy_data_hr import GLOSSARY, SQL_HISTORY, CATALOG
+from embedding import get_cache, get_engine, vector_size
+from ingest import (
+    BULK_LOAD,
+    HR_SOURCES,
+    Checkpoint,
+    bulk_load,
+    catalog_records,
+    glossary_records,
+    ingest,
+    sql_history_records,
+)
+from reindex import ensure_alias
+from schema import HR_LAYOUT, LAYOUT_SCHEMAS, UNIFIED_SCHEMA, apply_schema
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
-client = QdrantClient(url="http://localhost:6333")
-
-# OpenAI 클라이언트 초기화 (API 키는 환경변수 OPENAI_API_KEY에서 가져옴)
-openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
 
-# 임베딩 함수
-def get_embedding(text: str, model: str = "text-embedding-3-small") -> list:
-    """OpenAI API를 사용하여 텍스트를 벡터로 변환"""
-    response = openai_client.embeddings.create(model=model, input=text)
-    return response.data[0].embedding
-
-
-# text-embedding-3-small 모델의 기본 벡터 차원 (1536)
-# 다른 모델 사용 시 차원 수를 변경해야 함:
-# - text-embedding-3-small: 1536 (기본) 또는 512로 축소 가능
-# - text-embedding-3-large: 3072 (기본) 또는 256으로 축소 가능
-# - text-embedding-ada-002: 1536
-VSIZE = 1536  # OpenAI text-embedding-3-small 모델의 벡터 차원
+def report(stats):
+    resumed = f", 체크포인트 이후 재개: {stats.skipped}건 건너뜀" if stats.skipped else ""
+    indexed = f", 인덱싱 대기 {stats.index_seconds:.2f}s 포함" if stats.index_seconds else ""
+    print(
+        f"  {stats.collection_name}: upsert {stats.upserted}건, "
+        f"변경 없음 {stats.unchanged}건, 삭제 {stats.deleted}건 "
+        f"({stats.seconds:.2f}s, {stats.records_per_sec:.1f} records/sec{resumed}{indexed})"
+    )
 
 
-def ensure_collection(name: str):
-    # 컬렉션 생성(존재 시 스킵)
-    names = [c.name for c in client.get_collections().collections]
-    if name in names:
-        return
-    client.create_collection(
-        collection_name=name,
-        vectors_config=VectorParams(size=VSIZE, distance=Distance.COSINE, on_disk=True),
-        hnsw_config=HnswConfigDiff(m=16, ef_construct=200),
-        optimizers_config=OptimizersConfigDiff(
-            memmap_threshold=20000
-        ),  # 큰 payload에 유리
+# dense 벡터와 함께 희소(BM25) 어휘 벡터도 저장 (스키마에 sparse_vector가 선언된 컬렉션)
+# → 02_read_demo.py에서 emp_id 같은 SQL 식별자, HR 용어의 정확한 일치를 하이브리드 검색으로 보완
+SPARSE = {s.name: s.sparse_vector for s in LAYOUT_SCHEMAS}
+
+
+# 원본 레코드를 청크 단위로 임베딩 + upsert (중단 시 체크포인트부터 재개)
+# 변경되지 않은 레코드(content_hash 동일)는 건너뛰고, 원본에서 사라진 포인트는 삭제
+# INGEST_BULK=1 이면 대량 적재 모드: 인덱싱을 끈 채 upload_collection으로 INGEST_PARALLEL개의 worker 프로세스가
+# INGEST_BATCH_SIZE건씩 나눠 업로드하고, 끝나면 인덱싱 후 green까지 대기 (증분 비교 없이 전체 덮어쓰기, 초기 적재용)
+def load(collection_name, records):
+    if BULK_LOAD:
+        return bulk_load(client, collection_name, records, sparse_vector=SPARSE[collection_name])
+    return ingest(
+        client,
+        collection_name,
+        records,
+        checkpoint=checkpoint,
+        sparse_vector=SPARSE[collection_name],
     )
 
 
-# 1) Glossary
-ensure_collection("hr_glossary")
-client.create_payload_index("hr_glossary", "type", PayloadSchemaType.KEYWORD)
-g_points = []
-for g in GLOSSARY:
-    text = f"{g['title']} :: {g['description']} :: {', '.join(g['synonyms'])}"
-    g_points.append(
-        PointStruct(
-            id=g["id"],
-            vector=get_embedding(text),
-            payload={
-                "type": "glossary",
-                "original_id": g["original_id"],
-                "title": g["title"],
-                "description": g["description"],
-                "synonyms": g["synonyms"],
-            },
+# 대량 적재 모드의 worker 프로세스가 이 파일을 다시 import하므로 실행 코드는 __main__ 가드 안에 둠
+if __name__ == "__main__":
+    # 공용 클라이언트 (QDRANT_URL, QDRANT_PREFER_GRPC=1 이면 gRPC로 upsert)
+    client = get_client()
+
+    # 임베딩은 embedding 모듈에서 배치로 처리
+    # (OpenAI 사용 시 API 키는 환경변수 OPENAI_API_KEY에서 가져옴, EMBEDDING_PROVIDER=local 이면 로컬 모델 사용)
+
+    # 벡터 차원은 임베딩 제공자에서 가져옴 (EMBEDDING_PROVIDER / EMBEDDING_MODEL / EMBEDDING_DIMENSIONS 환경변수)
+    # - text-embedding-3-small: 1536 (기본) 또는 EMBEDDING_DIMENSIONS=512 등으로 축소 가능
+    # - text-embedding-3-large: 3072 (기본) 또는 EMBEDDING_DIMENSIONS=256 등으로 축소 가능
+    # - text-embedding-ada-002: 1536
+    # - local (paraphrase-multilingual-MiniLM-L12-v2): 384
+    VSIZE = vector_size()
+
+    # 컬렉션, HNSW 설정, payload 인덱스는 schema.py에 선언 (없는 것만 생성)
+    # HR_LAYOUT=unified 이면 세 컬렉션 대신 단일 컬렉션(hr_unified) 하나에 tenant(type)로 나눠 저장
+    # 벡터 컬렉션은 버전 컬렉션(_v1) + alias로 생성 → 이후 reindex.py rebuild로 무중단 재색인
+    for schema in LAYOUT_SCHEMAS:
+        actions = ensure_alias(client, schema, VSIZE) if schema.has_vectors else []
+        for action in actions + apply_schema(client, schema, VSIZE):
+            print(f"  ✓ {action}")
+
+    # 증분 적재는 중단 시 체크포인트부터 재개
+    checkpoint = Checkpoint()
+
+    if HR_LAYOUT == "unified":
+        # 모든 tenant를 한 번에 적재 (증분 적재의 삭제 판단이 컬렉션 전체 기준이므로 나눠서 적재하면 안 됨)
+        report(load(UNIFIED_SCHEMA.name, HR_SOURCES[UNIFIED_SCHEMA.name]()))
+    else:
+        # 1) Glossary
+        report(load("hr_glossary", glossary_records(GLOSSARY)))
+
+        # 2) SQL History
+        report(load("hr_sql_history", sql_history_records(SQL_HISTORY)))
+
+        # 3) Data Catalog (테이블 포인트 + 컬럼 포인트)
+        report(load("hr_catalog", catalog_records(CATALOG)))
+
+    print("✅ Upsert 완료")
+
+    cache = get_cache()
+    if cache is not None:
+        stats = cache.stats()
+        print(
+            f"임베딩 캐시: hit {stats['hits']}건, miss {stats['misses']}건 "
+            f"(API 호출 {get_engine().request_count}회)"
         )
-    )
-client.upsert("hr_glossary", g_points)
-
-# 2) SQL History
-ensure_collection("hr_sql_history")
-client.create_payload_index("hr_sql_history", "type", PayloadSchemaType.KEYWORD)
-h_points = []
-for h in SQL_HISTORY:
-    text = f"{h['title']} :: {h['description']} :: {h['sql']}"
-    h_points.append(
-        PointStruct(
-            id=h["id"],
-            vector=get_embedding(text),
-            payload={
-                "type": "history",
-                "original_id": h["original_id"],
-                "title": h["title"],
-                "description": h["description"],
-                "sql": h["sql"],
-            },
-        )
-    )
-client.upsert("hr_sql_history", h_points)
-
-# 3) Data Catalog (테이블 단위로 저장 - temp.py와 같은 방식)
-ensure_collection("hr_catalog")
-cat_points = []
-point_id_counter = 1000
-for t in CATALOG["tables"]:
-    # temp.py처럼 테이블 전체 정보를 하나로 저장
-    cols = "\n".join(
-        [
-            f"{col['name']}: {col.get('description','')} :: {col['dtype']}"
-            for col in t["columns"]
-        ]
-    )
-    text_content = f"{t['table']}: {t['description']}\nColumns:\n {cols}"
-
-    cat_points.append(
-        PointStruct(
-            id=point_id_counter,
-            vector=get_embedding(text_content),
-            payload={
-                "table": t["table"],
-                "description": t["description"],
-                "columns": t["columns"],  # 전체 컬럼 정보를 배열로 저장
-            },
-        )
-    )
-    point_id_counter += 1
-client.upsert("hr_catalog", cat_points)
-
-print("✅ Upsert 완료")
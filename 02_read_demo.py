@@ -2,33 +2,19 @@
 """
 Qdrant 벡터 데이터베이스 사용 예제
 - 하나의 질문으로 catalog, glossary, sql_history를 동시에 검색
+- dense 검색과 희소(BM25) 검색 결과를 서버에서 RRF로 융합 (하이브리드 검색)
 """
-from qdrant_client import QdrantClient
-from qdrant_client.models import Filter, FieldCondition, MatchValue
-from openai import OpenAI
-import os
 import time
 
+from clients import get_client
+from query_cache import embed_query, get_query_cache
+from result_cache import SemanticResultCache, cached_search_hr
+from retrieval import search_hr
+
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# =============================================================================
-# 클라이언트 초기화
-# =============================================================================
-qc = QdrantClient(url="http://localhost:6333")
-
-# OpenAI 클라이언트 초기화 (API 키는 환경변수 OPENAI_API_KEY에서 가져옴)
-openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-
-# 임베딩 함수
-def get_embedding(text: str, model: str = "text-embedding-3-small") -> list:
-    """OpenAI API를 사용하여 텍스트를 벡터로 변환"""
-    response = openai_client.embeddings.create(model=model, input=text)
-    return response.data[0].embedding
-
-
 # =============================================================================
 # 하나의 질문으로 모든 컬렉션 검색
 # =============================================================================
@@ -45,11 +31,24 @@ query = "직급별 평균 연봉 조회 방법"
 print(f"검색 질문: '{query}'")
 print()
 
-# 질문을 벡터로 변환
-query_vector = get_embedding(query)
+# 질문을 벡터로 변환 (같은 질문이 반복되면 메모리 캐시에서 반환)
+embed_start = time.perf_counter()
+query_vector = embed_query(query)
+embed_time = (time.perf_counter() - embed_start) * 1000
+
+embed_start = time.perf_counter()
+embed_query(query)  # 반복 질문 (캐시 적중)
+cached_embed_time = (time.perf_counter() - embed_start) * 1000
 
-# 전체 검색 시간 측정
+# 결과 캐시: 비슷한 질문(코사인 유사도 ≥ threshold)은 검색 없이 이전 결과 재사용
+# 변경 로그를 주기적으로 확인하여 변경된 포인트가 포함된 결과는 무효화
+result_cache = SemanticResultCache(get_client())
+
+# 세 컬렉션을 동시에 검색 (전체 시간 ≈ 가장 느린 검색 시간)
+# 질문 텍스트를 함께 넘기면 dense + 희소 벡터 하이브리드 검색 (점수는 RRF 순위 점수)
 total_start = time.time()
+results, _ = cached_search_hr(query_vector, result_cache, query_text=query)
+total_time = (time.time() - total_start) * 1000
 
 # =============================================================================
 # (1) Glossary 검색 - 용어 및 정의
@@ -58,17 +57,8 @@ print("=" * 80)
 print("[1] Glossary 검색 (용어 및 정의)")
 print("=" * 80)
 
-start_time = time.time()
-glossary_results = qc.search(
-    collection_name="hr_glossary",
-    query_vector=query_vector,
-    limit=5,
-    score_threshold=0.3,
-    query_filter=Filter(
-        must=[FieldCondition(key="type", match=MatchValue(value="glossary"))]
-    ),
-)
-glossary_time = (time.time() - start_time) * 1000
+glossary_results = results["glossary"].points
+glossary_time = results["glossary"].time_ms
 
 print(f"검색 시간: {glossary_time:.2f}ms")
 print(f"결과: {len(glossary_results)}건")
@@ -95,13 +85,8 @@ print("=" * 80)
 print("[2] Catalog 검색 (테이블 및 컬럼 정보)")
 print("=" * 80)
 
-start_time = time.time()
-catalog_results = qc.search(
-    collection_name="hr_catalog",
-    query_vector=query_vector,
-    limit=5,
-)
-catalog_time = (time.time() - start_time) * 1000
+catalog_results = results["catalog"].points
+catalog_time = results["catalog"].time_ms
 
 print(f"검색 시간: {catalog_time:.2f}ms")
 print(f"결과: {len(catalog_results)}건")
@@ -138,17 +123,8 @@ print("=" * 80)
 print("[3] SQL History 검색 (관련 SQL 쿼리 예제)")
 print("=" * 80)
 
-start_time = time.time()
-sql_results = qc.search(
-    collection_name="hr_sql_history",
-    query_vector=query_vector,
-    limit=5,
-    score_threshold=0.1,
-    query_filter=Filter(
-        must=[FieldCondition(key="type", match=MatchValue(value="history"))]
-    ),
-)
-sql_time = (time.time() - start_time) * 1000
+sql_results = results["sql_history"].points
+sql_time = results["sql_history"].time_ms
 
 print(f"검색 시간: {sql_time:.2f}ms")
 print(f"결과: {len(sql_results)}건")
@@ -176,14 +152,41 @@ print()
 # =============================================================================
 # 검색 요약
 # =============================================================================
-total_time = (time.time() - total_start) * 1000
-
 print("=" * 80)
 print("검색 요약")
 print("=" * 80)
 print(f"질문: '{query}'")
-print(f"총 검색 시간: {total_time:.2f}ms")
+cache_stats = get_query_cache().stats()
+print(
+    f"질문 임베딩: {embed_time:.2f}ms → 반복 질문 {cached_embed_time * 1000:.1f}µs "
+    f"(캐시 적중률 {cache_stats.hit_rate:.0%}, {cache_stats.entries}건)"
+)
+print(f"총 검색 시간: {total_time:.2f}ms (동시 검색)")
 print(f"  - Glossary: {glossary_time:.2f}ms ({len(glossary_results)}건)")
 print(f"  - Catalog: {catalog_time:.2f}ms ({len(catalog_results)}건)")
 print(f"  - SQL History: {sql_time:.2f}ms ({len(sql_results)}건)")
 print()
+
+# 비슷한 질문은 결과 캐시에서 바로 반환
+similar_query = "직급별 평균 연봉을 조회하는 방법"
+similar_vector = embed_query(similar_query)
+similar_start = time.perf_counter()
+_, hit = cached_search_hr(similar_vector, result_cache, query_text=similar_query)
+similar_time = (time.perf_counter() - similar_start) * 1000
+print(
+    f"비슷한 질문 '{similar_query}': "
+    f"{'결과 캐시 적중' if hit else '캐시 미스 (유사도 < threshold, 검색 수행)'} ({similar_time:.2f}ms)"
+)
+print()
+
+# =============================================================================
+# dense vs 하이브리드 (SQL 식별자가 포함된 질문)
+# =============================================================================
+identifier_query = "countIf로 status='LATE' 지각 횟수 집계하는 SQL"
+identifier_vector = embed_query(identifier_query)
+dense_only = search_hr(identifier_vector)["sql_history"].points
+hybrid = search_hr(identifier_vector, query_text=identifier_query)["sql_history"].points
+print(f"식별자 질문 '{identifier_query}' → SQL History 1위")
+print(f"  - dense: {dense_only[0].payload.get('title') if dense_only else '결과 없음'}")
+print(f"  - 하이브리드(RRF): {hybrid[0].payload.get('title') if hybrid else '결과 없음'}")
+print()
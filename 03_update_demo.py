@@ -3,27 +3,24 @@
 Qdrant 벡터 데이터베이스 업데이트 예제
 - 배치 업데이트, 변경 이력 추적, 조건부 업데이트 등 실제 운영 환경 패턴
 """
-from qdrant_client import QdrantClient
-from qdrant_client.models import PayloadSchemaType, Filter, FieldCondition, MatchValue
-from openai import OpenAI
-import os
-from datetime import datetime
+from qdrant_client.models import Filter, FieldCondition, MatchValue
+
+from changelog import CHANGE_LOG_COLLECTION
+from clients import get_client
+from embedding import vector_size
+from ingest import layout_collection, layout_conditions, layout_id
+from schema import LAYOUT_SCHEMAS, apply_schema
+from update_engine import Change, apply_changes
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
-qc = QdrantClient(url="http://localhost:6333")
-
-# OpenAI 클라이언트 초기화
-openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-
-def get_embedding(text: str, model: str = "text-embedding-3-small") -> list:
-    """OpenAI API를 사용하여 텍스트를 벡터로 변환"""
-    response = openai_client.embeddings.create(model=model, input=text)
-    return response.data[0].embedding
+qc = get_client()
 
+# 컬렉션 이름과 포인트 id는 현재 레이아웃(HR_LAYOUT)에 맞춰 변환 (아래 id는 원본 데이터의 id)
+GLOSSARY_COLLECTION = layout_collection("glossary")
+CATALOG_COLLECTION = layout_collection("catalog")
 
 print("=" * 80)
 print("벡터 데이터베이스 업데이트 데모")
@@ -77,45 +74,26 @@ updates = [
     },
 ]
 
-update_history = []  # 변경 이력 기록
-
-for update in updates:
-    # 기존 payload 조회
-    existing = qc.retrieve(
-        collection_name="hr_glossary",
-        ids=[update["id"]],
-        with_payload=True,
-        with_vectors=False,
-    )
-
-    if existing:
-        old_payload = existing[0].payload
-        old_synonyms = old_payload.get("synonyms", []) if old_payload else []
-
-        # 업데이트 실행
-        qc.set_payload(
-            collection_name="hr_glossary",
+# 한 번의 retrieve로 현재 값을 조회하고, 한 번의 batch_update_points로 모두 적용
+applied = apply_changes(
+    qc,
+    [
+        Change(
+            collection_name=GLOSSARY_COLLECTION,
+            point_id=layout_id("glossary", update["id"]),
             payload={"synonyms": update["new_synonyms"]},
-            points=[update["id"]],
-        )
-
-        # 변경 이력 기록
-        update_history.append(
-            {
-                "timestamp": datetime.now().isoformat(),
-                "collection_name": "hr_glossary",
-                "point_id": update["id"],
-                "field": "synonyms",
-                "old_value": old_synonyms,
-                "new_value": update["new_synonyms"],
-                "reason": update["reason"],
-            }
+            reason=update["reason"],
         )
+        for update in updates
+    ],
+)
+update_history = list(applied)  # 변경 이력 기록
 
-        print(f"  ✓ ID {update['id']}: {update['reason']}")
-        print(
-            f"    이전: {len(old_synonyms)}개 → 이후: {len(update['new_synonyms'])}개"
-        )
+for history in applied:
+    print(f"  ✓ ID {history['point_id']}: {history['reason']}")
+    print(
+        f"    이전: {len(history['old_value'] or [])}개 → 이후: {len(history['new_value'])}개"
+    )
 
 print()
 
@@ -127,9 +105,10 @@ print()
 
 # employees 테이블의 컬럼들 중 salary 컬럼 설명 개선
 updated_columns = qc.scroll(
-    collection_name="hr_catalog",
+    collection_name=CATALOG_COLLECTION,
     scroll_filter=Filter(
-        must=[
+        must=layout_conditions("catalog")
+        + [
             FieldCondition(key="level", match=MatchValue(value="column")),
             FieldCondition(key="table", match=MatchValue(value="employees")),
             FieldCondition(key="column", match=MatchValue(value="salary")),
@@ -142,31 +121,25 @@ updated_columns = qc.scroll(
 
 if updated_columns[0]:  # points가 있는 경우
     point = updated_columns[0][0]
-    old_description = point.payload.get("description", "") if point.payload else ""
     new_description = "우주 보석의 가치 (별의 결정체로 계산, 1만원 = 행성 1개)"
 
-    if old_description != new_description:
-        qc.set_payload(
-            collection_name="hr_catalog",
-            payload={"description": new_description},
-            points=[point.id],
-        )
-
-        update_history.append(
-            {
-                "timestamp": datetime.now().isoformat(),
-                "collection_name": "hr_catalog",
-                "point_id": point.id,
-                "field": "description",
-                "old_value": old_description,
-                "new_value": new_description,
-                "reason": "우주 판타지 세계관으로 설명 변경 (데모용)",
-            }
-        )
+    applied = apply_changes(
+        qc,
+        [
+            Change(
+                collection_name=CATALOG_COLLECTION,
+                point_id=point.id,
+                payload={"description": new_description},
+                reason="우주 판타지 세계관으로 설명 변경 (데모용)",
+            )
+        ],
+    )
+    update_history.extend(applied)
 
-        print(f"  ✓ ID {point.id} (employees.salary): 설명 개선")
-        print(f"    이전: {old_description}")
-        print(f"    이후: {new_description}")
+    for history in applied:
+        print(f"  ✓ ID {history['point_id']} (employees.salary): 설명 개선")
+        print(f"    이전: {history['old_value']}")
+        print(f"    이후: {history['new_value']}")
 
 print()
 
@@ -177,96 +150,42 @@ print("[3] 벡터 재임베딩: 개선된 설명으로 벡터 업데이트")
 print()
 
 # 사번 용어의 설명을 더 상세하게 만들고 재임베딩
-emp_point = qc.retrieve(
-    collection_name="hr_glossary",
-    ids=[1],
-    with_payload=True,
-    with_vectors=False,
+new_desc = "우주를 관장하는 마법사의 고유 번호 (시간의 흐름을 제어하는 키, 차원을 넘나드는 식별자)"
+
+# 재임베딩을 위한 텍스트 생성
+synonyms_text = ", ".join(updates[0]["new_synonyms"])  # 위에서 업데이트한 동의어 사용
+embedding_text = f"사번 :: {new_desc} :: {synonyms_text}"
+
+# 벡터와 설명을 같은 batch_update_points 요청으로 업데이트
+applied = apply_changes(
+    qc,
+    [
+        Change(
+            collection_name=GLOSSARY_COLLECTION,
+            point_id=layout_id("glossary", 1),
+            payload={"description": new_desc},
+            reason="판타지 세계관 설명으로 벡터 재임베딩 및 설명 완전 변경 (데모용)",
+            embed_text=embedding_text,
+        )
+    ],
 )
+update_history.extend(applied)
 
-if emp_point:
-    old_desc = (
-        emp_point[0].payload.get("description", "") if emp_point[0].payload else ""
-    )
-    new_desc = "우주를 관장하는 마법사의 고유 번호 (시간의 흐름을 제어하는 키, 차원을 넘나드는 식별자)"
-
-    # 재임베딩을 위한 텍스트 생성
-    synonyms_text = ", ".join(
-        updates[0]["new_synonyms"]
-    )  # 위에서 업데이트한 동의어 사용
-    embedding_text = f"사번 :: {new_desc} :: {synonyms_text}"
-    new_vector = get_embedding(embedding_text)
-
-    # 벡터 업데이트
-    qc.update_vectors(
-        collection_name="hr_glossary",
-        points=[{"id": 1, "vector": new_vector}],
-    )
-
-    # 설명도 함께 업데이트
-    qc.set_payload(
-        collection_name="hr_glossary",
-        payload={"description": new_desc},
-        points=[1],
-    )
-
-    update_history.append(
-        {
-            "timestamp": datetime.now().isoformat(),
-            "collection_name": "hr_glossary",
-            "point_id": 1,
-            "field": "vector + description",
-            "old_value": old_desc,
-            "new_value": new_desc,
-            "reason": "판타지 세계관 설명으로 벡터 재임베딩 및 설명 완전 변경 (데모용)",
-        }
-    )
-
+if applied:
     print(f"  ✓ ID 1 (사번): 벡터 및 설명 재임베딩 완료")
 
 print()
 
 # =============================================================================
-# (4) 변경 이력을 payload에 기록
+# (4) 변경 이력을 변경 로그 컬렉션에 기록
 # =============================================================================
-print("[4] 변경 이력을 메타데이터로 저장")
+print("[4] 변경 이력을 변경 로그 컬렉션에 저장")
 print()
 
-# 각 컬렉션에 변경 이력 필드 추가 (실제 운영에서는 별도 이력 테이블/컬렉션 권장)
+# 변경 이력은 apply_changes가 검색 대상 payload가 아닌 hr_change_log 컬렉션에
+# 한 번의 upsert로 추가함 (개수 제한 없음, collection_name/point_id/field/timestamp 인덱스)
 if update_history:
-    # 모든 변경 이력 저장 (변경사항을 잘 보이게 하기 위해)
-    all_history = update_history
-
-    for history_item in all_history:
-        point_id = history_item["point_id"]
-        collection_name = history_item.get("collection_name", "hr_glossary")
-
-        # update_history 필드가 이미 있으면 추가, 없으면 생성
-        existing = qc.retrieve(
-            collection_name=collection_name,
-            ids=[point_id],
-            with_payload=True,
-            with_vectors=False,
-        )
-
-        if existing and existing[0].payload:
-            existing_history = existing[0].payload.get("update_history", [])
-            existing_history.append(history_item)
-            # 최근 5개만 유지
-            existing_history = existing_history[-5:]
-            qc.set_payload(
-                collection_name=collection_name,
-                payload={"update_history": existing_history},
-                points=[point_id],
-            )
-        else:
-            qc.set_payload(
-                collection_name=collection_name,
-                payload={"update_history": [history_item]},
-                points=[point_id],
-            )
-
-    print(f"  ✓ {len(all_history)}개 항목의 변경 이력 저장 완료")
+    print(f"  ✓ {len(update_history)}개 항목의 변경 이력을 {CHANGE_LOG_COLLECTION}에 저장 완료")
 
 print()
 
@@ -276,17 +195,13 @@ print()
 print("[5] 조회 성능 최적화를 위한 인덱스 추가")
 print()
 
-try:
-    qc.create_payload_index("hr_sql_history", "title", PayloadSchemaType.TEXT)
-    print("  ✓ hr_sql_history.title 인덱스 생성 완료")
-except Exception as e:
-    print(f"  ⚠️  인덱스 생성 건너뜀: {e}")
-
-try:
-    qc.create_payload_index("hr_glossary", "title", PayloadSchemaType.KEYWORD)
-    print("  ✓ hr_glossary.title 인덱스 생성 완료")
-except Exception as e:
-    print(f"  ⚠️  인덱스 생성 건너뜀: {e}")
+# 인덱스는 schema.py에 선언되어 있으며, 현재 레이아웃의 컬렉션에 없는 인덱스만 생성
+for schema in LAYOUT_SCHEMAS:
+    actions = apply_schema(qc, schema, vector_size())
+    for action in actions:
+        print(f"  ✓ {action}")
+    if not actions:
+        print(f"  ✓ {schema.name} 인덱스가 이미 모두 존재합니다")
 
 print()
 
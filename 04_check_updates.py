@@ -2,18 +2,24 @@
 """
 Qdrant 벡터 데이터베이스 변경 내역 조회
 - update_demo.py에서 수행한 업데이트 내역을 확인
+- 변경 이력은 변경 로그 컬렉션(hr_change_log)에서 인덱스 필터로 조회
 """
-from qdrant_client import QdrantClient
-from qdrant_client.models import Filter, FieldCondition, MatchValue
-from openai import OpenAI
-import os
 from datetime import datetime
 
+from changelog import get_stats, point_history, rebuild_stats, summarize_history
+from clients import get_client
+from ingest import layout_collection, layout_id
+
 from dotenv import load_dotenv
 
 load_dotenv()
 
-qc = QdrantClient(url="http://localhost:6333")
+qc = get_client()
+
+# 컬렉션 이름과 포인트 id는 현재 레이아웃(HR_LAYOUT)에 맞춰 변환
+# 단일 컬렉션 레이아웃이면 (2)~(4)의 집계는 hr_unified 전체(모든 tenant)의 변경 이력
+GLOSSARY_COLLECTION = layout_collection("glossary")
+SANBUN_ID = layout_id("glossary", 1)
 
 print("=" * 80)
 print("변경 내역 조회 데모")
@@ -27,8 +33,8 @@ print("[1] 특정 포인트(ID: 1, 사번)의 변경 이력")
 print()
 
 point = qc.retrieve(
-    collection_name="hr_glossary",
-    ids=[1],
+    collection_name=GLOSSARY_COLLECTION,
+    ids=[SANBUN_ID],
     with_payload=True,
     with_vectors=False,
 )
@@ -38,7 +44,7 @@ if point and point[0].payload:
     title = payload.get("title", "N/A")
     description = payload.get("description", "N/A")
     synonyms = payload.get("synonyms", [])
-    update_history = payload.get("update_history", [])
+    update_history = point_history(qc, GLOSSARY_COLLECTION, SANBUN_ID)
 
     print(f"  제목: {title}")
     print(f"  설명: {description}")
@@ -85,10 +91,10 @@ if point and point[0].payload:
                         )
                 else:
                     print(
-                        f"        🔴 이전: {old_val[:80] if len(str(old_val)) > 80 else old_val}"
+                        f"        🔴 이전: {str(old_val)[:80]}"
                     )
                     print(
-                        f"        🟢 이후: {new_val[:80] if len(str(new_val)) > 80 else new_val}"
+                        f"        🟢 이후: {str(new_val)[:80]}"
                     )
                     # 완전히 다른 내용인 경우 강조
                     if str(old_val) != str(new_val):
@@ -100,45 +106,43 @@ if point and point[0].payload:
 print()
 
 # =============================================================================
-# (2) 최근 업데이트된 항목들 조회 (update_history 필드가 있는 모든 항목)
+# (2) 최근 업데이트된 항목들 조회 (변경 로그에 이력이 있는 모든 항목)
 # =============================================================================
 print("[2] 최근 업데이트된 모든 항목 조회")
 print()
 
-# hr_glossary 컬렉션의 모든 포인트 스크롤
-all_points, _ = qc.scroll(
-    collection_name="hr_glossary",
-    limit=100,
-    with_payload=True,
-    with_vectors=False,
-)
-
-updated_points = []
-for point in all_points:
-    if point.payload and point.payload.get("update_history"):
-        update_history = point.payload.get("update_history", [])
-        if update_history:
-            # 가장 최근 업데이트 시간 찾기
-            latest_timestamp = max(
-                [h.get("timestamp", "") for h in update_history if h.get("timestamp")],
-                default="",
-            )
-            updated_points.append(
-                {
-                    "id": point.id,
-                    "title": point.payload.get("title", "N/A"),
-                    "latest_update": latest_timestamp,
-                    "update_count": len(update_history),
-                }
-            )
-
-# 최근 업데이트 순으로 정렬
-updated_points.sort(key=lambda x: x["latest_update"], reverse=True)
+# hr_glossary 컬렉션의 변경 이력을 인덱스 필터 + 페이지 단위로 한 번만 스트리밍하여
+# (2) 최근 업데이트, (3) 필드별 검색, (4) 통계에 필요한 집계를 모두 계산 (필요한 필드만 전송)
+summary = summarize_history(qc, GLOSSARY_COLLECTION)
+count_by_point = summary.update_count
+latest_by_point = summary.latest_update
+
+# 최근 업데이트 순으로 정렬 후, 화면에 표시할 최대 10개 항목의 제목만 한 번에 조회
+recent_ids = sorted(count_by_point, key=lambda pid: latest_by_point[pid], reverse=True)
+titles = {
+    p.id: (p.payload or {}).get("title", "N/A")
+    for p in qc.retrieve(
+        collection_name=GLOSSARY_COLLECTION,
+        ids=recent_ids[:10],
+        with_payload=["title"],
+        with_vectors=False,
+    )
+} if recent_ids else {}
+
+updated_points = [
+    {
+        "id": point_id,
+        "title": titles.get(point_id, "N/A"),
+        "latest_update": latest_by_point[point_id],
+        "update_count": count_by_point[point_id],
+    }
+    for point_id in recent_ids[:10]
+]
 
 if updated_points:
-    print(f"  총 {len(updated_points)}개 항목이 최근에 업데이트되었습니다:")
+    print(f"  총 {len(count_by_point)}개 항목이 최근에 업데이트되었습니다:")
     print()
-    for idx, point_info in enumerate(updated_points[:10], 1):  # 최대 10개만 표시
+    for idx, point_info in enumerate(updated_points, 1):  # 최대 10개만 표시
         print(f"  [{idx}] ID {point_info['id']}: {point_info['title']}")
         print(f"      업데이트 횟수: {point_info['update_count']}회")
 
@@ -161,21 +165,25 @@ print()
 print("[3] 특정 필드(synonyms)가 업데이트된 항목 검색")
 print()
 
-synonyms_updated = []
-for point in all_points:
-    if point.payload:
-        update_history = point.payload.get("update_history", [])
-        # synonyms 필드가 변경된 이력이 있는지 확인
-        for history in update_history:
-            if history.get("field") == "synonyms":
-                synonyms_updated.append(
-                    {
-                        "id": point.id,
-                        "title": point.payload.get("title", "N/A"),
-                        "synonyms": point.payload.get("synonyms", []),
-                    }
-                )
-                break
+# field=synonyms 인 변경 이력의 포인트 id (위에서 계산한 집계 사용)
+synonyms_ids = list(summary.points_by_field.get("synonyms", {}))
+synonyms_updated = [
+    {
+        "id": p.id,
+        "title": (p.payload or {}).get("title", "N/A"),
+        "synonyms": (p.payload or {}).get("synonyms", []),
+    }
+    for p in (
+        qc.retrieve(
+            collection_name=GLOSSARY_COLLECTION,
+            ids=synonyms_ids,
+            with_payload=["title", "synonyms"],
+            with_vectors=False,
+        )
+        if synonyms_ids
+        else []
+    )
+]
 
 if synonyms_updated:
     print(f"  synonyms 필드가 업데이트된 항목: {len(synonyms_updated)}개")
@@ -198,22 +206,15 @@ print()
 print("[4] 변경 통계")
 print()
 
-total_updates = 0
-field_counts = {}
-reason_counts = {}
-
-for point in all_points:
-    if point.payload and point.payload.get("update_history"):
-        for history in point.payload.get("update_history", []):
-            total_updates += 1
-            field = history.get("field", "unknown")
-            reason = history.get("reason", "unknown")
-
-            field_counts[field] = field_counts.get(field, 0) + 1
-            reason_counts[reason] = reason_counts.get(reason, 0) + 1
+# 업데이트 시점에 누적된 통계 포인트 하나만 조회 (O(1))
+# 통계가 없으면 (통계 도입 전 이력) 변경 로그를 한 번 훑어 다시 계산
+stats = get_stats(qc, GLOSSARY_COLLECTION) or rebuild_stats(qc, GLOSSARY_COLLECTION)
+total_updates = stats["total_updates"]
+field_counts = stats["field_counts"]
+reason_counts = stats["reason_counts"]
 
 print(f"  총 변경 건수: {total_updates}건")
-print(f"  변경된 항목 수: {len(updated_points)}개")
+print(f"  변경된 항목 수: {stats['changed_points']}개")
 print()
 print("  필드별 변경 건수:")
 for field, count in sorted(field_counts.items(), key=lambda x: x[1], reverse=True):
@@ -222,6 +223,10 @@ print()
 print("  변경 사유별 통계:")
 for reason, count in sorted(reason_counts.items(), key=lambda x: x[1], reverse=True):
     print(f"    - {reason}: {count}건")
+print()
+print("  일자별 변경 건수:")
+for day, count in sorted(stats["day_counts"].items(), reverse=True)[:7]:
+    print(f"    - {day}: {count}건")
 
 print()
 
@@ -231,55 +236,46 @@ print()
 print("[5] 업데이트 전후 비교 (ID: 1)")
 print()
 
-# ID 1 포인트 다시 조회
-point = qc.retrieve(
-    collection_name="hr_glossary",
-    ids=[1],
-    with_payload=True,
-    with_vectors=False,
-)
+# ID 1 포인트의 변경 이력 다시 조회
+update_history = point_history(qc, GLOSSARY_COLLECTION, SANBUN_ID)
 
-if point and point[0].payload:
-    payload = point[0].payload
-    update_history = payload.get("update_history", [])
+if update_history:
+    # synonyms 필드의 변경 이력 찾기
+    synonyms_history = [h for h in update_history if h.get("field") == "synonyms"]
 
-    if update_history:
-        # synonyms 필드의 변경 이력 찾기
-        synonyms_history = [h for h in update_history if h.get("field") == "synonyms"]
+    if synonyms_history:
+        latest = synonyms_history[-1]
+        old_synonyms = latest.get("old_value", [])
+        new_synonyms = latest.get("new_value", [])
 
-        if synonyms_history:
-            latest = synonyms_history[-1]
-            old_synonyms = latest.get("old_value", [])
-            new_synonyms = latest.get("new_value", [])
+        print("  synonyms 필드 변경 내역:")
+        print()
+        print(f"    🔴 이전 동의어 ({len(old_synonyms)}개):")
+        for idx, syn in enumerate(old_synonyms, 1):
+            print(f"      [{idx}] {syn}")
+        print()
+        print(f"    🟢 이후 동의어 ({len(new_synonyms)}개):")
+        for idx, syn in enumerate(new_synonyms, 1):
+            print(f"      [{idx}] {syn}")
+        print()
 
-            print("  synonyms 필드 변경 내역:")
-            print()
-            print(f"    🔴 이전 동의어 ({len(old_synonyms)}개):")
-            for idx, syn in enumerate(old_synonyms, 1):
+        # 새로 추가된 동의어 찾기
+        added = set(new_synonyms) - set(old_synonyms)
+        removed = set(old_synonyms) - set(new_synonyms)
+
+        if added:
+            print(f"    ✨ 새로 추가된 동의어 ({len(added)}개):")
+            for idx, syn in enumerate(added, 1):
                 print(f"      [{idx}] {syn}")
+        if removed:
             print()
-            print(f"    🟢 이후 동의어 ({len(new_synonyms)}개):")
-            for idx, syn in enumerate(new_synonyms, 1):
+            print(f"    🗑️  제거된 동의어 ({len(removed)}개):")
+            for idx, syn in enumerate(removed, 1):
                 print(f"      [{idx}] {syn}")
-            print()
-
-            # 새로 추가된 동의어 찾기
-            added = set(new_synonyms) - set(old_synonyms)
-            removed = set(old_synonyms) - set(new_synonyms)
-
-            if added:
-                print(f"    ✨ 새로 추가된 동의어 ({len(added)}개):")
-                for idx, syn in enumerate(added, 1):
-                    print(f"      [{idx}] {syn}")
-            if removed:
-                print()
-                print(f"    🗑️  제거된 동의어 ({len(removed)}개):")
-                for idx, syn in enumerate(removed, 1):
-                    print(f"      [{idx}] {syn}")
-        else:
-            print("  synonyms 필드 변경 이력이 없습니다.")
     else:
-        print("  변경 이력이 없습니다.")
+        print("  synonyms 필드 변경 이력이 없습니다.")
+else:
+    print("  변경 이력이 없습니다.")
 
 print()
 print("=" * 80)
@@ -0,0 +1,233 @@
+# bench_layout.py
+"""
+컬렉션 레이아웃 비교: 컬렉션 3개 vs 단일 컬렉션(멀티 테넌트)
+- collections: glossary / sql_history / catalog 컬렉션에 질문마다 검색 3번 (동시 요청, 02_read_demo.py와 같은 방식)
+- unified: 하나의 컬렉션에 type(tenant) 인덱스로 나눠 저장, 질문마다 그룹 검색 1번 (query_points_groups)
+- 같은 합성 데이터(benchmark.py)와 해시 임베딩으로 두 레이아웃을 만들고
+  질문당 p50/p95/p99 지연 시간, 요청 수, 세그먼트 수, 결과 일치율(컬렉션 3개 결과 기준)을 비교
+- 실제 컬렉션과 겹치지 않도록 bench_layout_ 접두사 컬렉션을 사용하고 끝나면 삭제
+
+사용법:
+    uv run bench_layout.py --size 10000
+    uv run bench_layout.py --size 100000 --hybrid --output layout.json
+    uv run bench_layout.py --size 2000 --local     # 임베디드 로컬 모드 (동작 확인용, HNSW 미사용)
+"""
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from itertools import chain
+import argparse
+import json
+import time
+
+from qdrant_client import QdrantClient
+
+from benchmark import GENERATORS, percentiles, synthetic_questions
+from clients import QDRANT_URL, get_client
+from embedding import EmbeddingEngine, HashEmbeddingProvider
+from ingest import TENANT_ID_STRIDE, ingest, tenant_records
+from retrieval import (
+    COLLECTION_QUERIES,
+    UNIFIED_QUERIES,
+    CollectionQuery,
+    grouped_request,
+    query_request,
+    split_groups,
+)
+from schema import (
+    CATALOG_SCHEMA,
+    GLOSSARY_SCHEMA,
+    SQL_HISTORY_SCHEMA,
+    UNIFIED_SCHEMA,
+    apply_schema,
+    wait_for_green,
+)
+
+PREFIX = "bench_layout_"
+SCHEMAS = {
+    "glossary": GLOSSARY_SCHEMA,
+    "sql_history": SQL_HISTORY_SCHEMA,
+    "catalog": CATALOG_SCHEMA,
+}
+
+
+# =============================================================================
+# 두 레이아웃 적재
+# =============================================================================
+def build_collections(qc: QdrantClient, engine: EmbeddingEngine, size: int) -> list[CollectionQuery]:
+    """컬렉션 3개에 적재하고 해당 컬렉션을 가리키는 검색 조건 반환"""
+    for key, schema in SCHEMAS.items():
+        name = PREFIX + schema.name
+        if qc.collection_exists(name):
+            qc.delete_collection(name)
+        apply_schema(qc, replace(schema, name=name), engine.provider.dimension)
+        ingest(
+            qc,
+            name,
+            GENERATORS[key](size),
+            engine=engine,
+            incremental=False,
+            sparse_vector=schema.sparse_vector,
+        )
+        wait_for_green(qc, name)
+    return [replace(q, collection_name=PREFIX + q.collection_name) for q in COLLECTION_QUERIES]
+
+
+def build_unified(qc: QdrantClient, engine: EmbeddingEngine, size: int) -> list[CollectionQuery]:
+    """같은 데이터를 단일 컬렉션에 tenant별로 적재하고 tenant 검색 조건 반환"""
+    name = PREFIX + UNIFIED_SCHEMA.name
+    if qc.collection_exists(name):
+        qc.delete_collection(name)
+    apply_schema(qc, replace(UNIFIED_SCHEMA, name=name), engine.provider.dimension)
+    ingest(
+        qc,
+        name,
+        chain.from_iterable(tenant_records(key, GENERATORS[key](size)) for key in SCHEMAS),
+        engine=engine,
+        incremental=False,
+        sparse_vector=UNIFIED_SCHEMA.sparse_vector,
+    )
+    wait_for_green(qc, name)
+    return [replace(q, collection_name=name) for q in UNIFIED_QUERIES]
+
+
+def segments(qc: QdrantClient, queries: list[CollectionQuery]) -> int:
+    return sum(
+        qc.get_collection(name).segments_count or 0
+        for name in {q.collection_name for q in queries}
+    )
+
+
+# =============================================================================
+# 검색 (retrieval.py와 같은 요청)
+# =============================================================================
+def search_collections_sync(
+    qc: QdrantClient,
+    pool: ThreadPoolExecutor,
+    vector: list[float],
+    queries: list[CollectionQuery],
+    query_text: str | None,
+) -> dict[str, list]:
+    """컬렉션마다 검색 1번 (동시 요청)"""
+    futures = {
+        q.key: pool.submit(
+            qc.query_points,
+            collection_name=q.collection_name,
+            limit=q.limit,
+            query_filter=q.query_filter,
+            with_payload=True,
+            **query_request(vector, q, query_text),
+        )
+        for q in queries
+    }
+    return {key: f.result().points for key, f in futures.items()}
+
+
+def search_unified_sync(
+    qc: QdrantClient, vector: list[float], queries: list[CollectionQuery], query_text: str | None
+) -> dict[str, list]:
+    """tenant 그룹 검색 1번"""
+    request = grouped_request(vector, queries, query_text)
+    response = qc.query_points_groups(**request)
+    return split_groups(response.groups, queries, "prefetch" not in request)
+
+
+def measure(search, vectors: list[list[float]], questions: list[str], warmup: int = 10) -> tuple[dict, list]:
+    for vector, question in zip(vectors[:warmup], questions[:warmup]):
+        search(vector, question)
+    latencies, results = [], []
+    for vector, question in zip(vectors, questions):
+        start_time = time.perf_counter()
+        results.append(search(vector, question))
+        latencies.append((time.perf_counter() - start_time) * 1000)
+    return percentiles(latencies), results
+
+
+def agreement(expected: list[dict], actual: list[dict]) -> dict[str, float]:
+    """key별로 컬렉션 3개 결과 중 단일 컬렉션 결과에도 있는 비율 (id는 tenant 구간을 제거해 비교)"""
+    report = {}
+    for key in expected[0]:
+        hits = total = 0
+        for e, a in zip(expected, actual):
+            found = {p.id % TENANT_ID_STRIDE for p in a[key]}
+            hits += sum(p.id in found for p in e[key])
+            total += len(e[key])
+        report[key] = hits / total if total else 1.0
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="컬렉션 3개 vs 단일 컬렉션 레이아웃 비교")
+    parser.add_argument("--size", type=int, default=10000, help="컬렉션(tenant)별 레코드 수")
+    parser.add_argument("--dim", type=int, default=384, help="해시 임베딩 차원")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--hybrid", action="store_true", help="dense + 희소 하이브리드 검색으로 비교")
+    parser.add_argument("--url", default=QDRANT_URL)
+    parser.add_argument("--local", action="store_true", help="임베디드 로컬 모드 (동작 확인용)")
+    parser.add_argument("--keep", action="store_true", help="측정 후 컬렉션을 삭제하지 않음")
+    parser.add_argument("--output", help="결과를 저장할 JSON 파일")
+    args = parser.parse_args()
+    if args.local and args.hybrid:
+        # 로컬 모드의 query_points_groups는 prefetch를 지원하지 않음
+        raise SystemExit("--hybrid는 Qdrant 서버에서만 비교할 수 있습니다")
+
+    qc = QdrantClient(location=":memory:") if args.local else get_client(args.url)
+    engine = EmbeddingEngine(HashEmbeddingProvider(args.dim))
+    print(f"tenant별 {args.size}건 × {args.dim}차원, 질문 {args.queries}개, {'하이브리드' if args.hybrid else 'dense'} 검색")
+    print()
+
+    collection_queries = build_collections(qc, engine, args.size)
+    unified_queries = build_unified(qc, engine, args.size)
+
+    questions = synthetic_questions(args.queries)
+    vectors = engine.embed(questions)
+    texts = questions if args.hybrid else [None] * len(questions)
+
+    with ThreadPoolExecutor(max_workers=len(collection_queries)) as pool:
+        collections_latency, expected = measure(
+            lambda v, t: search_collections_sync(qc, pool, v, collection_queries, t), vectors, texts
+        )
+    unified_latency, actual = measure(
+        lambda v, t: search_unified_sync(qc, v, unified_queries, t), vectors, texts
+    )
+
+    report = {
+        "size": args.size,
+        "dim": args.dim,
+        "queries": args.queries,
+        "hybrid": args.hybrid,
+        "collections": {
+            "requests_per_question": len(collection_queries),
+            "segments": segments(qc, collection_queries),
+            **collections_latency,
+        },
+        "unified": {
+            "requests_per_question": 1,
+            "segments": segments(qc, unified_queries),
+            **unified_latency,
+        },
+        "agreement": agreement(expected, actual),
+    }
+
+    print(f"{'layout':<13}{'요청/질문':<10}{'segments':<10}{'p50(ms)':<10}{'p95(ms)':<10}{'p99(ms)':<10}")
+    for layout in ("collections", "unified"):
+        r = report[layout]
+        print(
+            f"{layout:<13}{r['requests_per_question']:<10}{r['segments']:<10}"
+            f"{r['p50_ms']:<10.2f}{r['p95_ms']:<10.2f}{r['p99_ms']:<10.2f}"
+        )
+    print()
+    ratio = report["unified"]["p95_ms"] / report["collections"]["p95_ms"]
+    print(f"unified p95: collections 대비 {ratio:.2f}배")
+    print(
+        "결과 일치율 (collections 기준): "
+        + ", ".join(f"{k} {v:.3f}" for k, v in report["agreement"].items())
+    )
+
+    if not args.keep:
+        for name in {q.collection_name for q in collection_queries + unified_queries}:
+            qc.delete_collection(name)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"결과 저장: {args.output}")
@@ -0,0 +1,189 @@
+# bench_quantization.py
+"""
+양자화 설정별 recall / latency 비교
+- 같은 벡터로 양자화 없음 / int8 scalar / binary 컬렉션을 만들고
+  oversampling, rescore 조합별로 검색 지연 시간과 recall@k를 측정
+- 정답(ground truth)은 양자화 없는 컬렉션의 exact 검색 결과
+- 결과를 보고 schema.py의 컬렉션별 quantization / oversampling / rescore 값을 정함
+
+사용법 (Qdrant 서버 필요, 로컬 모드는 양자화를 지원하지 않음):
+    uv run bench_quantization.py --collection hr_catalog      # 기존 컬렉션의 벡터 사용
+    uv run bench_quantization.py --synthetic 20000 --dim 1536 # 합성 벡터 사용
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    Distance,
+    HnswConfigDiff,
+    QuantizationSearchParams,
+    SearchParams,
+    VectorParams,
+)
+
+from clients import QDRANT_URL, get_client
+from schema import quantization_config, wait_for_green
+from sparse import dense_vector
+
+VARIANTS = [None, "int8", "binary"]
+# (rescore, oversampling) 조합, 양자화 없음은 기본 검색만 측정
+SEARCH_SETTINGS = [(False, 1.0), (True, 1.0), (True, 2.0), (True, 4.0)]
+
+
+def load_vectors(qc: QdrantClient, collection_name: str) -> np.ndarray:
+    """기존 컬렉션의 벡터를 페이지 단위로 모두 읽음"""
+    vectors = []
+    offset = None
+    while True:
+        points, offset = qc.scroll(
+            collection_name=collection_name,
+            limit=1000,
+            offset=offset,
+            with_payload=False,
+            with_vectors=True,
+        )
+        vectors.extend(dense_vector(p.vector) for p in points)
+        if offset is None:
+            break
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def synthetic_vectors(n: int, dim: int, seed: int = 42) -> np.ndarray:
+    """군집 구조가 있는 정규화된 합성 벡터 (임베딩 분포를 흉내냄)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(n // 100, 1), dim))
+    vectors = centers[rng.integers(len(centers), size=n)] + 0.3 * rng.normal(size=(n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def make_queries(vectors: np.ndarray, n: int, seed: int = 7) -> np.ndarray:
+    """데이터 벡터에 잡음을 더한 질의 벡터"""
+    rng = np.random.default_rng(seed)
+    base = vectors[rng.integers(len(vectors), size=n)]
+    queries = base + 0.1 * rng.normal(size=base.shape)
+    return (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+
+
+def create_variant(
+    qc: QdrantClient, name: str, vectors: np.ndarray, quantization: str | None
+) -> None:
+    if qc.collection_exists(name):
+        qc.delete_collection(name)
+    qc.create_collection(
+        collection_name=name,
+        vectors_config=VectorParams(
+            size=vectors.shape[1], distance=Distance.COSINE, on_disk=True
+        ),
+        hnsw_config=HnswConfigDiff(m=16, ef_construct=200),
+        quantization_config=quantization_config(quantization),
+    )
+    qc.upload_collection(
+        name, vectors=vectors, ids=range(len(vectors)), batch_size=256, wait=True
+    )
+    wait_for_green(qc, name)
+
+
+def run_queries(
+    qc: QdrantClient,
+    name: str,
+    queries: np.ndarray,
+    k: int,
+    search_params: SearchParams | None,
+) -> tuple[list[list[int]], list[float]]:
+    """질의별 결과 id 목록과 지연 시간(ms) 목록"""
+    ids, latencies = [], []
+    for q in queries:
+        start_time = time.perf_counter()
+        response = qc.query_points(
+            collection_name=name,
+            query=q.tolist(),
+            limit=k,
+            search_params=search_params,
+            with_payload=False,
+        )
+        latencies.append((time.perf_counter() - start_time) * 1000)
+        ids.append([p.id for p in response.points])
+    return ids, latencies
+
+
+def recall_at_k(results: list[list[int]], truth: list[list[int]]) -> float:
+    hits = sum(len(set(r) & set(t)) for r, t in zip(results, truth))
+    return hits / sum(len(t) for t in truth)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="양자화 설정별 recall/latency 비교")
+    parser.add_argument("--url", default=QDRANT_URL)
+    parser.add_argument("--collection", help="벡터를 가져올 기존 컬렉션")
+    parser.add_argument("--synthetic", type=int, default=20000, help="합성 벡터 개수")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--output", help="결과를 저장할 JSON 파일")
+    parser.add_argument("--keep", action="store_true", help="벤치마크 컬렉션 유지")
+    args = parser.parse_args()
+
+    qc = get_client(args.url)
+    if args.collection:
+        vectors = load_vectors(qc, args.collection)
+        source = args.collection
+    else:
+        vectors = synthetic_vectors(args.synthetic, args.dim)
+        source = f"synthetic({args.synthetic}x{args.dim})"
+    queries = make_queries(vectors, args.queries)
+    print(f"데이터: {source}, 벡터 {len(vectors)}개, 질의 {len(queries)}개, k={args.k}")
+    print()
+
+    names = {v: f"bench_quant_{v or 'none'}" for v in VARIANTS}
+    for variant, name in names.items():
+        print(f"  컬렉션 생성: {name}")
+        create_variant(qc, name, vectors, variant)
+
+    truth, _ = run_queries(
+        qc, names[None], queries, args.k, SearchParams(exact=True)
+    )
+
+    rows = []
+    for variant, name in names.items():
+        settings = [(None, None)] if variant is None else SEARCH_SETTINGS
+        for rescore, oversampling in settings:
+            params = None
+            if variant is not None:
+                params = SearchParams(
+                    quantization=QuantizationSearchParams(
+                        rescore=rescore, oversampling=oversampling
+                    )
+                )
+            run_queries(qc, name, queries[:10], args.k, params)  # 워밍업
+            results, latencies = run_queries(qc, name, queries, args.k, params)
+            rows.append(
+                {
+                    "quantization": variant or "none",
+                    "rescore": rescore,
+                    "oversampling": oversampling,
+                    "recall": recall_at_k(results, truth),
+                    "p50_ms": float(np.percentile(latencies, 50)),
+                    "p95_ms": float(np.percentile(latencies, 95)),
+                }
+            )
+
+    print()
+    print(f"{'quantization':<13}{'rescore':<9}{'oversampling':<14}{'recall@k':<10}{'p50(ms)':<10}{'p95(ms)':<10}")
+    for row in rows:
+        print(
+            f"{row['quantization']:<13}{str(row['rescore'] if row['rescore'] is not None else '-'):<9}"
+            f"{str(row['oversampling'] or '-'):<14}{row['recall']:<10.4f}"
+            f"{row['p50_ms']:<10.2f}{row['p95_ms']:<10.2f}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"source": source, "k": args.k, "results": rows}, f, indent=2)
+        print(f"\n결과 저장: {args.output}")
+
+    if not args.keep:
+        for name in names.values():
+            qc.delete_collection(name)
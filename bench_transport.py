@@ -0,0 +1,135 @@
+# bench_transport.py
+"""
+REST vs gRPC 전송 방식 비교
+- upsert: HR glossary 스키마로 만든 임시 컬렉션에 합성 벡터 + 실제 payload를 배치 upsert
+  (벡터 직렬화 비용 차이가 드러나도록 클라이언트 측 직렬화 시간을 포함해 측정)
+- search: HR 컬렉션(glossary, catalog, sql_history)에 02_read_demo.py와 같은 필터로 검색
+- 두 방식 모두 clients.get_client()의 공용 설정(keep-alive, 타임아웃)을 사용
+
+사용법 (Qdrant 서버의 6333/6334 포트 필요):
+    uv run bench_transport.py
+    uv run bench_transport.py --points 50000 --batch 512 --output transport.json
+"""
+from dataclasses import replace
+import argparse
+import json
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct
+
+from clients import QDRANT_URL, get_client
+from dummy_data_hr import GLOSSARY
+from ingest import glossary_records
+from retrieval import HR_QUERIES
+from schema import GLOSSARY_SCHEMA, apply_schema
+
+TRANSPORTS = {"rest": False, "grpc": True}
+
+
+def random_vectors(n: int, dim: int, seed: int = 42) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_points(n: int, dim: int) -> list[PointStruct]:
+    """합성 벡터 + glossary payload (순환)"""
+    payloads = [r.payload for r in glossary_records(GLOSSARY)]
+    vectors = random_vectors(n, dim)
+    return [
+        PointStruct(id=i, vector=vectors[i].tolist(), payload=payloads[i % len(payloads)])
+        for i in range(n)
+    ]
+
+
+def bench_upsert(
+    qc: QdrantClient, name: str, points: list[PointStruct], dim: int, batch_size: int
+) -> dict:
+    schema = replace(GLOSSARY_SCHEMA, name=name)
+    if qc.collection_exists(name):
+        qc.delete_collection(name)
+    apply_schema(qc, schema, dim)
+
+    start_time = time.perf_counter()
+    for i in range(0, len(points), batch_size):
+        qc.upsert(collection_name=name, points=points[i : i + batch_size], wait=True)
+    seconds = time.perf_counter() - start_time
+    qc.delete_collection(name)
+    return {"points": len(points), "seconds": seconds, "points_per_sec": len(points) / seconds}
+
+
+def bench_search(qc: QdrantClient, n_queries: int) -> dict:
+    """HR 컬렉션 검색 지연 시간 (컬렉션별 필터 포함, 순차 실행)"""
+    queries = [q for q in HR_QUERIES if qc.collection_exists(q.collection_name)]
+    if not queries:
+        return {}
+    dim = qc.get_collection(queries[0].collection_name).config.params.vectors.size
+    vectors = random_vectors(n_queries, dim, seed=7)
+
+    latencies = []
+    for i, vector in enumerate(vectors):
+        q = queries[i % len(queries)]
+        start_time = time.perf_counter()
+        qc.query_points(
+            collection_name=q.collection_name,
+            query=vector.tolist(),
+            limit=q.limit,
+            query_filter=q.query_filter,
+            search_params=q.search_params,
+            with_payload=True,
+        )
+        latencies.append((time.perf_counter() - start_time) * 1000)
+    return {
+        "queries": n_queries,
+        "qps": n_queries / (sum(latencies) / 1000),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="REST vs gRPC 처리량 비교")
+    parser.add_argument("--url", default=QDRANT_URL)
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--batch", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--output", help="결과를 저장할 JSON 파일")
+    args = parser.parse_args()
+
+    points = make_points(args.points, args.dim)
+    print(f"upsert: {args.points}건 × {args.dim}차원, 배치 {args.batch} / search: {args.queries}건")
+    print()
+
+    results = {}
+    for transport, prefer_grpc in TRANSPORTS.items():
+        qc = get_client(args.url, prefer_grpc=prefer_grpc)
+        qc.get_collections()  # 연결 준비 (측정에서 제외)
+        results[transport] = {
+            "upsert": bench_upsert(
+                qc, f"bench_transport_{transport}", points, args.dim, args.batch
+            ),
+            "search": bench_search(qc, args.queries),
+        }
+
+    print(f"{'transport':<11}{'upsert(points/s)':<19}{'search(qps)':<13}{'p50(ms)':<10}{'p95(ms)':<10}")
+    for transport, r in results.items():
+        search = r["search"]
+        print(
+            f"{transport:<11}{r['upsert']['points_per_sec']:<19.1f}"
+            + (
+                f"{search['qps']:<13.1f}{search['p50_ms']:<10.2f}{search['p95_ms']:<10.2f}"
+                if search
+                else "(HR 컬렉션 없음)"
+            )
+        )
+    rest, grpc = results["rest"]["upsert"], results["grpc"]["upsert"]
+    print()
+    print(f"gRPC upsert 속도: REST 대비 {grpc['points_per_sec'] / rest['points_per_sec']:.2f}배")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"결과 저장: {args.output}")
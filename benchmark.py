@@ -0,0 +1,411 @@
+# benchmark.py
+"""
+재현 가능한 성능 벤치마크 (적재 / 검색 / 업데이트)
+- dummy_data_hr.py를 본뜬 합성 HR 데이터를 컬렉션별 N건(10k ~ 1M) 생성 (제너레이터, 메모리 일정)
+- 결정적 해시 임베딩(HashEmbeddingProvider)을 사용하므로 API 없이 항상 같은 벡터
+- 측정 항목
+  - 적재: ingest() 처리량 (records/sec)과 인덱싱 완료(green)까지의 시간,
+    대량 적재 모드(bulk_load: 인덱싱 보류 + upload_collection 병렬 업로드)와 worker 수별로 비교
+  - 검색: 필터 없음 / 02_read_demo.py와 같은 필터의 p50/p95/p99 지연 시간
+    (dense 검색과 운영 경로인 하이브리드 검색(dense + 희소 RRF)을 따로 측정, 적재도 희소 벡터 포함)
+  - 업데이트: apply_changes() 일괄 업데이트 처리량 (changes/sec)
+- 결과를 JSON으로 저장하고, --compare로 이전 결과와 비교하여 성능 저하를 감지
+- 실제 컬렉션과 겹치지 않도록 bench_ 접두사 컬렉션을 사용하고 끝나면 삭제
+
+사용법:
+    uv run benchmark.py --size 10000                      # Qdrant 서버 (QDRANT_URL)
+    uv run benchmark.py --size 10000 --local              # 임베디드 로컬 모드 (서버 불필요)
+    uv run benchmark.py --size 100000 --output base.json
+    uv run benchmark.py --size 100000 --parallel 1,2,4,8   # 대량 적재 worker 수별 처리량
+    uv run benchmark.py --size 100000 --compare base.json # 10% 이상 나빠지면 종료 코드 1
+"""
+from dataclasses import replace
+from datetime import datetime
+from importlib.metadata import version
+from itertools import islice
+from typing import Iterator
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import FieldCondition, Filter, MatchValue
+
+from changelog import delete_history
+from clients import QDRANT_URL, get_client
+from dummy_data_hr import CATALOG, GLOSSARY, SQL_HISTORY
+from embedding import EmbeddingEngine, HashEmbeddingProvider
+from ingest import (
+    PARALLEL,
+    Record,
+    bulk_load,
+    catalog_records,
+    glossary_records,
+    ingest,
+    sql_history_records,
+)
+from retrieval import CollectionQuery, query_request
+from schema import (
+    CATALOG_SCHEMA,
+    GLOSSARY_SCHEMA,
+    SQL_HISTORY_SCHEMA,
+    apply_schema,
+    wait_for_green,
+)
+from update_engine import Change, apply_changes
+
+BENCH_PREFIX = "bench_"
+BULK_PREFIX = "bench_bulk_"
+SCHEMAS = {
+    "glossary": GLOSSARY_SCHEMA,
+    "sql_history": SQL_HISTORY_SCHEMA,
+    "catalog": CATALOG_SCHEMA,
+}
+# 02_read_demo.py와 같은 필터
+FILTERS = {
+    "glossary": Filter(must=[FieldCondition(key="type", match=MatchValue(value="glossary"))]),
+    "sql_history": Filter(must=[FieldCondition(key="type", match=MatchValue(value="history"))]),
+    "catalog": Filter(must=[FieldCondition(key="level", match=MatchValue(value="table"))]),
+}
+DEPARTMENTS = ["영업", "개발", "인사", "재무", "마케팅", "운영", "법무", "구매"]
+
+
+# =============================================================================
+# 합성 HR 데이터 (dummy_data_hr.py를 템플릿으로 번호를 붙여 확장)
+# =============================================================================
+def synthetic_glossary(n: int) -> Iterator[Record]:
+    def rows():
+        for i in range(n):
+            g = GLOSSARY[i % len(GLOSSARY)]
+            dept = DEPARTMENTS[i // len(GLOSSARY) % len(DEPARTMENTS)]
+            yield {
+                "id": i + 1,
+                "original_id": f"{g['original_id']}-{i}",
+                "title": f"{dept} {g['title']} {i}",
+                "description": f"{dept} 부서 기준 {g['description']}",
+                "synonyms": g["synonyms"] + [f"{dept}{g['title']}"],
+            }
+
+    return glossary_records(rows())
+
+
+def synthetic_sql_history(n: int) -> Iterator[Record]:
+    def rows():
+        for i in range(n):
+            h = SQL_HISTORY[i % len(SQL_HISTORY)]
+            dept = DEPARTMENTS[i // len(SQL_HISTORY) % len(DEPARTMENTS)]
+            yield {
+                "id": i + 1,
+                "original_id": f"{h['original_id']}-{i}",
+                "title": f"{dept} {h['title']} {i}",
+                "description": f"{dept} 부서 {h['description']}",
+                "sql": f"-- {dept} #{i}\n{h['sql']}",
+            }
+
+    return sql_history_records(rows())
+
+
+def synthetic_catalog(n: int) -> Iterator[Record]:
+    """테이블을 번호를 붙여 반복 생성 (테이블 + 컬럼 포인트 합계 n건)"""
+
+    def tables():
+        i = 0
+        while True:
+            t = CATALOG["tables"][i % len(CATALOG["tables"])]
+            yield {**t, "table": f"{t['table']}_{i}", "description": f"{t['description']} {i}"}
+            i += 1
+
+    return islice(catalog_records({"tables": tables()}), n)
+
+
+GENERATORS = {
+    "glossary": synthetic_glossary,
+    "sql_history": synthetic_sql_history,
+    "catalog": synthetic_catalog,
+}
+
+
+def synthetic_questions(n: int, seed: int = 42) -> list[str]:
+    rng = np.random.default_rng(seed)
+    templates = [g["title"] for g in GLOSSARY] + [h["title"] for h in SQL_HISTORY]
+    return [
+        f"{DEPARTMENTS[rng.integers(len(DEPARTMENTS))]} {templates[rng.integers(len(templates))]} 조회"
+        for _ in range(n)
+    ]
+
+
+def percentiles(latencies: list[float]) -> dict:
+    return {
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "mean_ms": float(np.mean(latencies)),
+    }
+
+
+# =============================================================================
+# 측정
+# =============================================================================
+def recreate(qc: QdrantClient, schema, dim: int) -> None:
+    if qc.collection_exists(schema.name):
+        qc.delete_collection(schema.name)
+    apply_schema(qc, schema, dim)
+
+
+def bench_ingest(
+    qc: QdrantClient, engine: EmbeddingEngine, size: int, parallel: tuple[int, ...] = (PARALLEL,)
+) -> dict:
+    """현재 경로(ingest, 청크마다 wait=True + 적재 중 인덱싱)와 대량 적재 모드의 준비 완료 시간 비교
+
+    둘 다 인덱싱이 끝나 green이 될 때까지를 측정 (대량 적재 컬렉션은 측정 후 삭제)
+    대량 적재 모드는 worker 프로세스 수(parallel)별로 측정하여 처리량이 늘어나는 구간을 확인
+    """
+    results = {}
+    dim = engine.provider.dimension
+    for key, schema in SCHEMAS.items():
+        name = BENCH_PREFIX + schema.name
+        recreate(qc, replace(schema, name=name), dim)
+        start_time = time.perf_counter()
+        stats = ingest(
+            qc,
+            name,
+            GENERATORS[key](size),
+            engine=engine,
+            incremental=False,
+            sparse_vector=schema.sparse_vector,
+        )
+        wait_for_green(qc, name)
+        ready_seconds = time.perf_counter() - start_time
+        print(
+            f"  적재 {name}: {stats.upserted}건, {stats.records_per_sec:.1f} records/sec, "
+            f"green까지 {ready_seconds:.2f}s"
+        )
+
+        bulk = {}
+        bulk_name = BULK_PREFIX + schema.name
+        for workers in parallel:
+            recreate(qc, replace(schema, name=bulk_name), dim)
+            loaded = bulk_load(
+                qc,
+                bulk_name,
+                GENERATORS[key](size),
+                engine=engine,
+                parallel=workers,
+                sparse_vector=schema.sparse_vector,
+            )
+            qc.delete_collection(bulk_name)
+            bulk[f"parallel_{workers}"] = {
+                "seconds": loaded.seconds,  # 적재 + 인덱싱 완료까지
+                "index_seconds": loaded.index_seconds,
+                "records_per_sec": loaded.records_per_sec,
+            }
+            print(
+                f"    대량 적재 모드 (parallel={workers}): green까지 {loaded.seconds:.2f}s "
+                f"(인덱싱 {loaded.index_seconds:.2f}s), {loaded.records_per_sec:.1f} records/sec, "
+                f"속도 {ready_seconds / loaded.seconds:.2f}배 (현재 경로 대비)"
+            )
+
+        results[key] = {
+            "records": stats.upserted,
+            "seconds": stats.seconds,
+            "records_per_sec": stats.records_per_sec,
+            "ready_seconds": ready_seconds,  # 적재 + 인덱싱 완료까지
+            "bulk": bulk,
+        }
+    return results
+
+
+def bench_search(qc: QdrantClient, engine: EmbeddingEngine, n_queries: int) -> dict:
+    """dense 검색과 하이브리드 검색(02_read_demo.py와 같은 dense + 희소 RRF)의 지연 시간을 따로 측정
+
+    결과 키: {key}.{no_filter|filter} (dense), {key}.{no_filter|filter}.hybrid
+    """
+    questions = synthetic_questions(n_queries)
+    vectors = engine.embed(questions)
+    results = {}
+    for key, schema in SCHEMAS.items():
+        name = BENCH_PREFIX + schema.name
+        for label, query_filter in (("no_filter", None), ("filter", FILTERS[key])):
+            query = CollectionQuery(
+                key=key,
+                collection_name=name,
+                query_filter=query_filter,
+                search_params=schema.search_params(),
+                sparse_vector=schema.sparse_vector,
+            )
+            for mode, texts in (("", [None] * len(questions)), (".hybrid", questions)):
+                if mode and schema.sparse_vector is None:
+                    continue
+
+                def search(vector, text):
+                    return qc.query_points(
+                        collection_name=name,
+                        limit=query.limit,
+                        query_filter=query_filter,
+                        with_payload=True,
+                        **query_request(vector, query, text),
+                    )
+
+                for vector, text in zip(vectors[:10], texts[:10]):  # 워밍업
+                    search(vector, text)
+                latencies = []
+                for vector, text in zip(vectors, texts):
+                    start_time = time.perf_counter()
+                    search(vector, text)
+                    latencies.append((time.perf_counter() - start_time) * 1000)
+                r = results[f"{key}.{label}{mode}"] = percentiles(latencies)
+                print(
+                    f"  검색 {name} ({label}, {'hybrid' if mode else 'dense'}): p50 {r['p50_ms']:.2f}ms, "
+                    f"p95 {r['p95_ms']:.2f}ms, p99 {r['p99_ms']:.2f}ms"
+                )
+    return results
+
+
+def bench_update(
+    qc: QdrantClient, engine: EmbeddingEngine, size: int, n_changes: int, embed_ratio: float = 0.1
+) -> dict:
+    """glossary 동의어 일괄 변경 (embed_ratio 비율은 재임베딩 포함)"""
+    name = BENCH_PREFIX + GLOSSARY_SCHEMA.name
+    rng = np.random.default_rng(7)
+    ids = rng.choice(size, size=min(n_changes, size), replace=False) + 1
+    stamp = datetime.now().strftime("%H%M%S")
+    changes = [
+        Change(
+            collection_name=name,
+            point_id=int(point_id),
+            payload={"synonyms": [f"동의어-{stamp}-{point_id}"]},
+            reason="벤치마크 일괄 업데이트",
+            embed_text=f"벤치마크 재임베딩 {point_id}" if i < len(ids) * embed_ratio else None,
+        )
+        for i, point_id in enumerate(ids)
+    ]
+    start_time = time.perf_counter()
+    applied = apply_changes(qc, changes, engine=engine)
+    seconds = time.perf_counter() - start_time
+    print(f"  업데이트 {name}: {len(applied)}건, {len(applied) / seconds:.1f} changes/sec")
+    return {
+        "changes": len(applied),
+        "reembedded": sum(c.embed_text is not None for c in changes),
+        "seconds": seconds,
+        "changes_per_sec": len(applied) / seconds,
+    }
+
+
+def cleanup(qc: QdrantClient) -> None:
+    for schema in SCHEMAS.values():
+        name = BENCH_PREFIX + schema.name
+        for collection_name in (name, BULK_PREFIX + schema.name):
+            if qc.collection_exists(collection_name):
+                qc.delete_collection(collection_name)
+        delete_history(qc, name)
+
+
+# =============================================================================
+# 결과 비교 (회귀 감지)
+# =============================================================================
+def flatten(results: dict, prefix: str = "") -> dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, path + "."))
+        elif isinstance(value, (int, float)):
+            flat[path] = value
+    return flat
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list[str]:
+    """처리량(_per_sec)이 줄거나 지연 시간(_ms)이 늘어난 지표 목록"""
+    regressions = []
+    base, cur = flatten(baseline["results"]), flatten(current["results"])
+    for metric, old in base.items():
+        new = cur.get(metric)
+        if new is None or not old:
+            continue
+        change = (new - old) / old
+        if metric.endswith("_per_sec") and change < -tolerance:
+            regressions.append(f"{metric}: {old:.1f} → {new:.1f} ({change:+.1%})")
+        elif metric.endswith("_ms") and change > tolerance:
+            regressions.append(f"{metric}: {old:.2f} → {new:.2f} ({change:+.1%})")
+    return regressions
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        return ""
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="적재/검색/업데이트 성능 벤치마크")
+    parser.add_argument("--size", type=int, default=10000, help="컬렉션별 레코드 수")
+    parser.add_argument("--dim", type=int, default=384, help="해시 임베딩 차원")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--changes", type=int, default=1000)
+    parser.add_argument(
+        "--parallel", default=str(PARALLEL), help="대량 적재 모드 worker 프로세스 수 (쉼표로 여러 개, 예: 1,2,4,8)"
+    )
+    parser.add_argument("--url", default=QDRANT_URL)
+    parser.add_argument("--local", action="store_true", help="임베디드 로컬 모드 (메모리)")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="허용 성능 저하 비율")
+    parser.add_argument("--keep", action="store_true", help="벤치마크 컬렉션 유지")
+    args = parser.parse_args()
+
+    qc = QdrantClient(location=":memory:") if args.local else get_client(args.url)
+    # 임베디드 로컬 모드는 worker 프로세스 없이 순서대로 적재
+    parallel = (1,) if args.local else tuple(int(p) for p in args.parallel.split(",") if p)
+    engine = EmbeddingEngine(HashEmbeddingProvider(args.dim))
+    backend = "local" if args.local else args.url
+    print(f"벤치마크: 컬렉션별 {args.size}건, {args.dim}차원, 백엔드 {backend}")
+
+    try:
+        results = {
+            "ingest": bench_ingest(qc, engine, args.size, parallel),
+            "search": bench_search(qc, engine, args.queries),
+            "update": bench_update(qc, engine, args.size, args.changes),
+        }
+    finally:
+        if not args.keep:
+            cleanup(qc)
+
+    report = {
+        "created_at": datetime.now().isoformat(),
+        "config": {
+            "size": args.size,
+            "dim": args.dim,
+            "queries": args.queries,
+            "changes": args.changes,
+            "parallel": parallel,
+            "backend": backend,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "qdrant_client": version("qdrant-client"),
+            "platform": platform.platform(),
+            "git_commit": git_commit(),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n결과 저장: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.tolerance)
+        if regressions:
+            print(f"⚠️  성능 저하 ({args.tolerance:.0%} 초과):")
+            for item in regressions:
+                print(f"  - {item}")
+            sys.exit(1)
+        print(f"✅ 이전 결과({args.compare}) 대비 성능 저하 없음")
@@ -0,0 +1,332 @@
+# changelog.py
+"""
+변경 로그 컬렉션 (append-only)
+- 변경 이력을 검색 대상 포인트의 payload가 아닌 별도 컬렉션(hr_change_log)에 저장
+- 벡터 없이 payload만 저장하며 collection_name, point_id, field, timestamp에 인덱스 생성
+- 이력 개수 제한 없음, 이력 조회는 인덱스 필터로 처리
+- 변경 통계(필드별/사유별/컬렉션별/일자별 건수)는 기록 시점에 hr_change_stats에 누적
+  → 통계 조회는 포인트 하나를 읽는 O(1) 작업
+"""
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+import uuid
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    DatetimeRange,
+    FieldCondition,
+    Filter,
+    MatchAny,
+    FilterSelector,
+    MatchValue,
+    PointIdsList,
+    PointStruct,
+    Record,
+)
+
+from schema import CHANGE_LOG_SCHEMA, CHANGE_STATS_SCHEMA, ensure_collection
+
+CHANGE_LOG_COLLECTION = CHANGE_LOG_SCHEMA.name
+CHANGE_STATS_COLLECTION = CHANGE_STATS_SCHEMA.name
+
+
+def ensure_change_log(qc: QdrantClient) -> None:
+    """변경 로그 컬렉션과 payload 인덱스 생성 (존재 시 스킵, 스키마는 schema.py)"""
+    ensure_collection(qc, CHANGE_LOG_SCHEMA)
+
+
+def write_entries(qc: QdrantClient, entries: list[dict]) -> None:
+    """변경 이력 목록을 한 번의 upsert로 추가하고 변경 통계를 누적"""
+    if not entries:
+        return
+    ensure_change_log(qc)
+    # 처음 변경되는 포인트 수는 기록 전에 확인해야 함
+    new_points = count_new_points(qc, entries)
+    qc.upsert(
+        collection_name=CHANGE_LOG_COLLECTION,
+        points=[
+            PointStruct(id=str(uuid.uuid4()), vector={}, payload=entry)
+            for entry in entries
+        ],
+        wait=True,
+    )
+    update_stats(qc, entries, new_points)
+
+
+def entry_filter(
+    collection_name: Optional[str] = None,
+    point_id: Optional[int] = None,
+    field: Optional[str] = None,
+) -> Optional[Filter]:
+    """인덱스 필드 조건으로 변경 로그 필터 생성"""
+    conditions = [
+        FieldCondition(key=key, match=MatchValue(value=value))
+        for key, value in (
+            ("collection_name", collection_name),
+            ("point_id", point_id),
+            ("field", field),
+        )
+        if value is not None
+    ]
+    return Filter(must=conditions) if conditions else None
+
+
+def scroll_entries(
+    qc: QdrantClient,
+    scroll_filter: Optional[Filter] = None,
+    fields: Optional[list[str]] = None,
+    page_size: int = 1000,
+) -> Iterator[dict]:
+    """필터에 맞는 변경 이력을 페이지 단위로 스트리밍 (fields 지정 시 해당 필드만 전송)"""
+    for point in scroll_log_points(qc, scroll_filter, fields, page_size):
+        yield point.payload or {}
+
+
+def scroll_log_points(
+    qc: QdrantClient,
+    scroll_filter: Optional[Filter] = None,
+    fields: Optional[list[str]] = None,
+    page_size: int = 1000,
+) -> Iterator[Record]:
+    """scroll_entries와 같지만 변경 로그 포인트(id 포함)를 그대로 반환"""
+    if not qc.collection_exists(CHANGE_LOG_COLLECTION):
+        return
+    offset = None
+    while True:
+        points, offset = qc.scroll(
+            collection_name=CHANGE_LOG_COLLECTION,
+            scroll_filter=scroll_filter,
+            limit=page_size,
+            offset=offset,
+            with_payload=fields if fields is not None else True,
+            with_vectors=False,
+        )
+        yield from points
+        if offset is None:
+            break
+
+
+def point_history(qc: QdrantClient, collection_name: str, point_id: int) -> list[dict]:
+    """포인트 하나의 전체 변경 이력 (시간순)"""
+    entries = scroll_entries(
+        qc, entry_filter(collection_name=collection_name, point_id=point_id)
+    )
+    return sorted(entries, key=lambda e: e.get("timestamp", ""))
+
+
+def changes_since(qc: QdrantClient, since: str) -> dict[str, tuple[str, int]]:
+    """since(ISO 시각) 이후 기록된 변경 이력 id → 변경된 (collection_name, point_id) (timestamp 인덱스 필터)
+
+    변경 이력 id로 이미 처리한 이력을 구분할 수 있음 (같은 구간을 다시 조회해도 한 번만 반영)
+    """
+    points = scroll_log_points(
+        qc,
+        Filter(must=[FieldCondition(key="timestamp", range=DatetimeRange(gte=since))]),
+        fields=["collection_name", "point_id"],
+    )
+    return {
+        str(p.id): (p.payload["collection_name"], p.payload["point_id"]) for p in points
+    }
+
+
+@dataclass
+class HistorySummary:
+    """변경 로그를 한 번 훑어 계산한 집계 결과 (메모리는 변경된 포인트 수에 비례)"""
+
+    total_updates: int = 0
+    update_count: dict = field(default_factory=dict)  # point_id -> 변경 횟수
+    latest_update: dict = field(default_factory=dict)  # point_id -> 최근 timestamp
+    field_counts: dict = field(default_factory=dict)
+    reason_counts: dict = field(default_factory=dict)
+    points_by_field: dict = field(default_factory=dict)  # field -> {point_id: None}
+
+
+SUMMARY_FIELDS = ["point_id", "timestamp", "field", "reason"]
+
+
+def summarize_history(
+    qc: QdrantClient, collection_name: str, page_size: int = 1000
+) -> HistorySummary:
+    """컬렉션의 변경 이력을 페이지 단위로 한 번만 스트리밍하여 모든 집계를 계산
+
+    old_value/new_value 등 큰 필드는 전송하지 않음
+    """
+    summary = HistorySummary()
+    for entry in scroll_entries(
+        qc,
+        entry_filter(collection_name=collection_name),
+        fields=SUMMARY_FIELDS,
+        page_size=page_size,
+    ):
+        point_id = entry.get("point_id")
+        field_name = entry.get("field", "unknown")
+        reason = entry.get("reason", "unknown")
+
+        summary.total_updates += 1
+        summary.update_count[point_id] = summary.update_count.get(point_id, 0) + 1
+        summary.latest_update[point_id] = max(
+            summary.latest_update.get(point_id, ""), entry.get("timestamp", "")
+        )
+        summary.field_counts[field_name] = summary.field_counts.get(field_name, 0) + 1
+        summary.reason_counts[reason] = summary.reason_counts.get(reason, 0) + 1
+        summary.points_by_field.setdefault(field_name, {})[point_id] = None
+    return summary
+
+
+# =============================================================================
+# 기록 시점에 누적하는 변경 통계
+# =============================================================================
+def stats_point_id(collection_name: str) -> str:
+    """컬렉션별 통계 포인트 id (항상 같은 값)"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{CHANGE_STATS_COLLECTION}/{collection_name}"))
+
+
+def empty_stats(collection_name: str) -> dict:
+    return {
+        "collection_name": collection_name,
+        "total_updates": 0,
+        "changed_points": 0,
+        "field_counts": {},
+        "reason_counts": {},
+        "day_counts": {},  # 일자(YYYY-MM-DD)별 변경 건수
+    }
+
+
+def accumulate(stats: dict, entry: dict) -> None:
+    """변경 이력 하나를 통계에 더함"""
+    field_name = entry.get("field", "unknown")
+    reason = entry.get("reason", "unknown")
+    day = (entry.get("timestamp") or "unknown")[:10]
+    stats["total_updates"] += 1
+    for key, value in (
+        ("field_counts", field_name),
+        ("reason_counts", reason),
+        ("day_counts", day),
+    ):
+        stats[key][value] = stats[key].get(value, 0) + 1
+
+
+def count_new_points(qc: QdrantClient, entries: list[dict]) -> dict:
+    """컬렉션별로 변경 로그에 아직 이력이 없는 포인트 수 (point_id facet 한 번씩)"""
+    ids_by_collection: dict[str, set] = {}
+    for entry in entries:
+        ids_by_collection.setdefault(entry["collection_name"], set()).add(
+            entry["point_id"]
+        )
+
+    new_points = {}
+    for collection_name, ids in ids_by_collection.items():
+        existing = qc.facet(
+            collection_name=CHANGE_LOG_COLLECTION,
+            key="point_id",
+            facet_filter=Filter(
+                must=[
+                    FieldCondition(
+                        key="collection_name", match=MatchValue(value=collection_name)
+                    ),
+                    FieldCondition(key="point_id", match=MatchAny(any=list(ids))),
+                ]
+            ),
+            limit=len(ids),
+            exact=True,
+        )
+        new_points[collection_name] = len(ids - {hit.value for hit in existing.hits})
+    return new_points
+
+
+def save_stats(qc: QdrantClient, stats_list: list[dict]) -> None:
+    ensure_collection(qc, CHANGE_STATS_SCHEMA)
+    qc.upsert(
+        collection_name=CHANGE_STATS_COLLECTION,
+        points=[
+            PointStruct(
+                id=stats_point_id(stats["collection_name"]), vector={}, payload=stats
+            )
+            for stats in stats_list
+        ],
+        wait=True,
+    )
+
+
+def update_stats(qc: QdrantClient, entries: list[dict], new_points: dict) -> None:
+    """새 변경 이력을 컬렉션별 통계 포인트에 누적 (retrieve 1번 + upsert 1번)
+
+    entries가 변경 로그에 기록된 뒤 호출해야 함 (write_entries)
+    통계 포인트가 없는 컬렉션은 0이 아니라 변경 로그 전체(이번 이력 포함)로 시작
+    → 통계 도입 전에 쌓인 이력도 빠지지 않음
+    읽고-더하고-쓰는 방식이므로 여러 프로세스가 동시에 기록하지 않는다고 가정
+    """
+    collection_names = list(dict.fromkeys(e["collection_name"] for e in entries))
+    current = {}
+    if qc.collection_exists(CHANGE_STATS_COLLECTION):
+        current = {
+            p.payload["collection_name"]: p.payload
+            for p in qc.retrieve(
+                collection_name=CHANGE_STATS_COLLECTION,
+                ids=[stats_point_id(name) for name in collection_names],
+                with_payload=True,
+                with_vectors=False,
+            )
+        }
+
+    stats_list = []
+    for collection_name in collection_names:
+        stats = current.get(collection_name)
+        if stats is None:
+            stats_list.append(stats_from_log(qc, collection_name))
+            continue
+        for entry in entries:
+            if entry["collection_name"] == collection_name:
+                accumulate(stats, entry)
+        stats["changed_points"] += new_points.get(collection_name, 0)
+        stats_list.append(stats)
+    save_stats(qc, stats_list)
+
+
+def get_stats(qc: QdrantClient, collection_name: str) -> Optional[dict]:
+    """컬렉션의 누적 변경 통계 (포인트 하나 조회)"""
+    if not qc.collection_exists(CHANGE_STATS_COLLECTION):
+        return None
+    points = qc.retrieve(
+        collection_name=CHANGE_STATS_COLLECTION,
+        ids=[stats_point_id(collection_name)],
+        with_payload=True,
+        with_vectors=False,
+    )
+    return points[0].payload if points else None
+
+
+def delete_history(qc: QdrantClient, collection_name: str) -> None:
+    """컬렉션의 변경 이력과 누적 통계를 삭제 (벤치마크 등 임시 컬렉션 정리용)"""
+    if qc.collection_exists(CHANGE_LOG_COLLECTION):
+        qc.delete(
+            collection_name=CHANGE_LOG_COLLECTION,
+            points_selector=FilterSelector(filter=entry_filter(collection_name=collection_name)),
+            wait=True,
+        )
+    if qc.collection_exists(CHANGE_STATS_COLLECTION):
+        qc.delete(
+            collection_name=CHANGE_STATS_COLLECTION,
+            points_selector=PointIdsList(points=[stats_point_id(collection_name)]),
+            wait=True,
+        )
+
+
+def rebuild_stats(qc: QdrantClient, collection_name: str) -> dict:
+    """변경 로그 전체를 한 번 훑어 통계를 다시 계산하고 저장 (통계가 어긋났을 때 복구용)"""
+    stats = stats_from_log(qc, collection_name)
+    save_stats(qc, [stats])
+    return stats
+
+
+def stats_from_log(qc: QdrantClient, collection_name: str) -> dict:
+    """변경 로그 전체를 한 번 훑어 계산한 통계 (저장하지 않음)"""
+    stats = empty_stats(collection_name)
+    point_ids = set()
+    for entry in scroll_entries(
+        qc, entry_filter(collection_name=collection_name), fields=SUMMARY_FIELDS
+    ):
+        accumulate(stats, entry)
+        point_ids.add(entry.get("point_id"))
+    stats["changed_points"] = len(point_ids)
+    return stats
@@ -0,0 +1,94 @@
+# clients.py
+"""
+Qdrant 클라이언트 공용 팩토리
+- 모든 스크립트/모듈이 같은 설정(전송 방식, keep-alive, 타임아웃)으로 클라이언트 생성
+- 동기 클라이언트는 (url, 전송 방식)별로 프로세스당 한 번만 만들어 재사용
+- QDRANT_PREFER_GRPC=1 이면 gRPC 사용 (큰 벡터 upsert 시 JSON 직렬화 비용 제거)
+- REST는 HTTP keep-alive 커넥션 풀을 사용
+  (qdrant-client는 localhost 연결에 keep-alive를 끄는 것이 기본값이므로 명시적으로 설정)
+
+환경변수:
+    QDRANT_URL            기본 http://localhost:6333
+    QDRANT_PREFER_GRPC    1 이면 gRPC (기본 0)
+    QDRANT_GRPC_PORT      기본 6334
+    QDRANT_TIMEOUT        요청 타임아웃(초, 기본 10)
+    QDRANT_POOL_SIZE      REST 커넥션 풀 크기 (기본 64)
+    QDRANT_KEEPALIVE      유휴 커넥션 유지 시간(초, 기본 30)
+"""
+from typing import Optional
+import os
+import threading
+
+import httpx
+from dotenv import load_dotenv
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+load_dotenv()
+
+QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "0") == "1"
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+QDRANT_TIMEOUT = int(os.getenv("QDRANT_TIMEOUT", "10"))
+QDRANT_POOL_SIZE = int(os.getenv("QDRANT_POOL_SIZE", "64"))
+QDRANT_KEEPALIVE = float(os.getenv("QDRANT_KEEPALIVE", "30"))
+
+
+def client_options(
+    prefer_grpc: bool = QDRANT_PREFER_GRPC, timeout: int = QDRANT_TIMEOUT
+) -> dict:
+    """QdrantClient / AsyncQdrantClient 공통 생성 옵션"""
+    keepalive_ms = int(QDRANT_KEEPALIVE * 1000)
+    return {
+        "prefer_grpc": prefer_grpc,
+        "grpc_port": QDRANT_GRPC_PORT,
+        "timeout": timeout,
+        # REST: httpx 커넥션 풀 + keep-alive
+        "limits": httpx.Limits(
+            max_connections=QDRANT_POOL_SIZE,
+            max_keepalive_connections=QDRANT_POOL_SIZE,
+            keepalive_expiry=QDRANT_KEEPALIVE,
+        ),
+        # gRPC: 유휴 채널도 keep-alive ping으로 유지
+        "grpc_options": {
+            "grpc.keepalive_time_ms": keepalive_ms,
+            "grpc.keepalive_timeout_ms": 10000,
+            "grpc.keepalive_permit_without_calls": 1,
+            "grpc.http2.max_pings_without_data": 0,
+            "grpc.max_send_message_length": 64 * 1024 * 1024,
+            "grpc.max_receive_message_length": 64 * 1024 * 1024,
+        },
+    }
+
+
+_clients: dict[tuple[str, bool], QdrantClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(
+    url: Optional[str] = None, prefer_grpc: Optional[bool] = None
+) -> QdrantClient:
+    """공용 동기 클라이언트 ((url, 전송 방식)별로 프로세스당 한 번 생성, 스레드 간 공유 가능)"""
+    url = url or QDRANT_URL
+    prefer_grpc = QDRANT_PREFER_GRPC if prefer_grpc is None else prefer_grpc
+    key = (url, prefer_grpc)
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = QdrantClient(url=url, **client_options(prefer_grpc))
+        return _clients[key]
+
+
+def make_async_client(
+    url: Optional[str] = None,
+    prefer_grpc: Optional[bool] = None,
+    timeout: int = QDRANT_TIMEOUT,
+) -> AsyncQdrantClient:
+    """같은 설정의 비동기 클라이언트
+
+    커넥션이 이벤트 루프에 묶이므로 캐시하지 않음 (루프 수명 동안 하나를 만들어 재사용)
+    """
+    return AsyncQdrantClient(
+        url=url or QDRANT_URL,
+        **client_options(
+            QDRANT_PREFER_GRPC if prefer_grpc is None else prefer_grpc, timeout
+        ),
+    )
@@ -0,0 +1,448 @@
+# embedding.py
+"""
+임베딩 공용 모듈
+- 여러 텍스트를 개수/토큰 제한에 맞춰 배치로 묶어 한 번의 API 호출로 임베딩
+- 여러 배치를 동시에 요청 (동시 요청 수 설정 가능)
+- 결과는 항상 입력 순서대로 반환
+- 디스크 캐시(embedding_cache)에 있는 텍스트는 API를 호출하지 않음
+- 제공자(provider): OpenAI API, 로컬 sentence-transformers, 또는 벤치마크용 해시 임베딩
+- 차원 축소(EMBEDDING_DIMENSIONS): OpenAI는 dimensions 파라미터로 요청,
+  로컬 모델은 앞부분만 잘라 다시 정규화 (Matryoshka 방식)
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Optional, Sequence
+import hashlib
+import math
+import os
+import threading
+
+from dotenv import load_dotenv
+import numpy as np
+
+from embedding_cache import EmbeddingCache, cache_key
+
+load_dotenv()
+
+# EMBEDDING_PROVIDER: openai (기본) | local (sentence-transformers) | hash (결정적 가짜 임베딩)
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL")
+DEFAULT_OPENAI_MODEL = "text-embedding-3-small"
+DEFAULT_LOCAL_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+LOCAL_BATCH_SIZE = int(os.getenv("EMBEDDING_LOCAL_BATCH_SIZE", "64"))
+LOCAL_NUM_THREADS = int(os.getenv("EMBEDDING_NUM_THREADS", "0")) or None
+# 축소할 벡터 차원 (미설정 시 모델 기본 차원)
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "0")) or None
+
+# OpenAI embeddings API 제한: 요청당 최대 2048개 입력, 요청당 최대 300k 토큰, 입력당 최대 8191 토큰
+MAX_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "512"))
+MAX_BATCH_TOKENS = int(os.getenv("EMBEDDING_BATCH_TOKENS", "250000"))
+MAX_IN_FLIGHT = int(os.getenv("EMBEDDING_MAX_IN_FLIGHT", "4"))
+MAX_INPUT_TOKENS = int(os.getenv("EMBEDDING_MAX_INPUT_TOKENS", "8191"))
+
+# tiktoken이 설치되어 있으면 OpenAI 임베딩 모델과 같은 토크나이저(cl100k_base)로 정확히 셈
+_tokenizer = None
+_tokenizer_loaded = False
+
+
+def get_tokenizer():
+    """tiktoken cl100k_base 인코더 (설치되어 있지 않으면 None)"""
+    global _tokenizer, _tokenizer_loaded
+    if not _tokenizer_loaded:
+        try:
+            import tiktoken
+
+            _tokenizer = tiktoken.get_encoding("cl100k_base")
+        except ImportError:
+            _tokenizer = None
+        _tokenizer_loaded = True
+    return _tokenizer
+
+
+def estimate_tokens(text: str) -> int:
+    """토큰 수 (tiktoken이 있으면 정확한 값, 없으면 상한)
+
+    상한은 UTF-8 바이트 수: 바이트 단위 BPE(cl100k_base)의 토큰은 1바이트 이상이므로
+    구두점이 많은 SQL, 숫자열, 제어 문자, 한글 등 어떤 텍스트도 실제 값보다 작게 나오지 않음
+    """
+    tokenizer = get_tokenizer()
+    if tokenizer is not None:
+        return len(tokenizer.encode(text, disallowed_special=()))
+    return len(text.encode("utf-8"))
+
+
+def truncate_tokens(
+    text: str,
+    max_tokens: int,
+    count_tokens: Callable[[str], int] = estimate_tokens,
+) -> str:
+    """입력당 토큰 제한을 넘는 텍스트의 뒷부분을 잘라냄 (제한 이내면 그대로 반환)"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    tokenizer = get_tokenizer()
+    if tokenizer is not None and count_tokens is estimate_tokens:
+        return tokenizer.decode(tokenizer.encode(text, disallowed_special=())[:max_tokens])
+    # 토크나이저가 없으면 제한 이내가 되는 가장 긴 앞부분을 이분 탐색
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count_tokens(text[:mid]) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low]
+
+
+def make_batches(
+    texts: Sequence[str],
+    max_batch_size: int = MAX_BATCH_SIZE,
+    max_batch_tokens: int = MAX_BATCH_TOKENS,
+    count_tokens: Callable[[str], int] = estimate_tokens,
+) -> list[tuple[int, int]]:
+    """텍스트를 개수/토큰 제한을 넘지 않는 연속 구간 (start, end) 목록으로 나눔"""
+    batches = []
+    start = 0
+    tokens = 0
+    for i, text in enumerate(texts):
+        n = count_tokens(text)
+        if i > start and (i - start >= max_batch_size or tokens + n > max_batch_tokens):
+            batches.append((start, i))
+            start = i
+            tokens = 0
+        tokens += n
+    if start < len(texts):
+        batches.append((start, len(texts)))
+    return batches
+
+
+def truncate_vector(vector: Sequence[float], dimensions: int) -> list[float]:
+    """벡터의 앞 dimensions개만 남기고 길이 1로 다시 정규화 (Matryoshka 축소)"""
+    head = list(vector[:dimensions])
+    norm = math.sqrt(sum(x * x for x in head))
+    return [x / norm for x in head] if norm else head
+
+
+# =============================================================================
+# 임베딩 제공자 (provider)
+# =============================================================================
+class EmbeddingProvider:
+    """임베딩 제공자 공통 인터페이스
+
+    - name: 캐시 키에 쓰이는 모델 식별자
+    - dimension: 벡터 차원 (컬렉션 생성 시 사용)
+    - embed_batch: 텍스트 목록 -> 벡터 목록 (같은 순서)
+    - max_in_flight: 엔진이 동시에 보낼 배치 수 (None이면 엔진 기본값)
+    - max_input_tokens: 입력 하나의 최대 토큰 수 (넘으면 엔진이 잘라서 보냄, None이면 제한 없음)
+    """
+
+    name: str
+    max_in_flight: Optional[int] = None
+    max_input_tokens: Optional[int] = None
+
+    @property
+    def dimension(self) -> int:
+        raise NotImplementedError
+
+    def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        raise NotImplementedError
+
+
+# OpenAI 모델별 기본 벡터 차원
+OPENAI_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+# dimensions 파라미터(Matryoshka 축소)를 지원하는 모델
+OPENAI_MATRYOSHKA_MODELS = {"text-embedding-3-small", "text-embedding-3-large"}
+
+
+class OpenAIProvider(EmbeddingProvider):
+    """OpenAI embeddings API (OPENAI_BASE_URL로 로컬 스텁 서버 지정 가능)
+
+    dimensions를 지정하면 API가 축소 + 정규화된 벡터를 반환 (text-embedding-3 계열만)
+    입력당 MAX_INPUT_TOKENS(기본 8191)를 넘는 텍스트는 엔진이 잘라서 보냄 (API 오류 방지)
+    """
+
+    max_input_tokens = MAX_INPUT_TOKENS
+
+    def __init__(
+        self,
+        model: str = DEFAULT_OPENAI_MODEL,
+        client=None,
+        dimensions: Optional[int] = None,
+    ):
+        if dimensions and model not in OPENAI_MATRYOSHKA_MODELS:
+            raise ValueError(f"{model} 모델은 차원 축소(dimensions)를 지원하지 않습니다")
+        if client is None:
+            from openai import OpenAI
+
+            client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.client = client
+        self.model = model
+        self.name = model
+        self.dimensions = dimensions
+        self._dimension = dimensions or OPENAI_DIMENSIONS.get(model)
+
+    @property
+    def dimension(self) -> int:
+        if self._dimension is None:
+            # 알려지지 않은 모델은 한 번 임베딩해서 차원 확인
+            self._dimension = len(self.embed_batch(["dimension probe"])[0])
+        return self._dimension
+
+    def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        if self.dimensions:
+            response = self.client.embeddings.create(
+                model=self.model, input=texts, dimensions=self.dimensions
+            )
+        else:
+            response = self.client.embeddings.create(model=self.model, input=texts)
+        # 응답의 index 기준으로 정렬하여 입력 순서 보장
+        return [d.embedding for d in sorted(response.data, key=lambda d: d.index)]
+
+
+# 프로세스당 한 번만 로드한 sentence-transformers 모델
+_st_models: dict[str, object] = {}
+_st_lock = threading.Lock()
+
+
+def load_sentence_transformer(model_name: str, device: str = "cpu"):
+    """sentence-transformers 모델을 프로세스당 한 번만 로드"""
+    key = f"{model_name}@{device}"
+    with _st_lock:
+        if key not in _st_models:
+            from sentence_transformers import SentenceTransformer
+
+            _st_models[key] = SentenceTransformer(model_name, device=device)
+        return _st_models[key]
+
+
+class SentenceTransformerProvider(EmbeddingProvider):
+    """로컬 CPU sentence-transformers 모델 (네트워크 없이 동작)
+
+    모델이 내부적으로 batch_size 단위로 나눠 인코딩하므로 엔진은 배치를 하나씩만 보냄
+    num_threads로 torch CPU 스레드 수 지정
+    dimensions를 지정하면 앞부분만 잘라 다시 정규화 (Matryoshka 학습 모델이 아니면 recall 확인 필요)
+    """
+
+    max_in_flight = 1
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_LOCAL_MODEL,
+        device: str = "cpu",
+        batch_size: int = LOCAL_BATCH_SIZE,
+        num_threads: Optional[int] = LOCAL_NUM_THREADS,
+        dimensions: Optional[int] = None,
+    ):
+        if num_threads:
+            import torch
+
+            torch.set_num_threads(num_threads)
+        self.model = load_sentence_transformer(model_name, device)
+        self.name = f"st:{model_name}"
+        self.batch_size = batch_size
+        self.dimensions = dimensions
+
+    @property
+    def dimension(self) -> int:
+        return self.dimensions or self.model.get_sentence_embedding_dimension()
+
+    def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        vectors = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        if self.dimensions:
+            vectors = vectors[:, : self.dimensions]
+            vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors.tolist()
+
+
+class HashEmbeddingProvider(EmbeddingProvider):
+    """결정적 가짜 임베딩 (API/모델 없이 벤치마크·테스트용)
+
+    토큰마다 해시 시드로 고정된 난수 벡터를 만들고 합한 뒤 정규화
+    → 같은 텍스트는 항상 같은 벡터, 토큰을 공유하는 텍스트는 서로 가까운 벡터
+    """
+
+    def __init__(self, dimension: int = 384):
+        self.name = f"hash-{dimension}"
+        self._dimension = dimension
+        self._tokens: dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    def token_vector(self, token: str) -> np.ndarray:
+        vector = self._tokens.get(token)
+        if vector is None:
+            seed = int.from_bytes(hashlib.sha256(token.encode("utf-8")).digest()[:8], "little")
+            vector = np.random.default_rng(seed).standard_normal(self._dimension).astype(np.float32)
+            with self._lock:
+                self._tokens[token] = vector
+        return vector
+
+    def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        vectors = np.zeros((len(texts), self._dimension), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for token in text.lower().split():
+                vectors[i] += self.token_vector(token)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return (vectors / np.where(norms == 0, 1, norms)).tolist()
+
+
+class EmbeddingEngine:
+    """배치 + 동시 요청으로 여러 텍스트를 임베딩하는 엔진
+
+    provider에 가짜 제공자를 넘기면 API 없이 테스트 가능
+    cache를 넘기면 (모델, 차원, 텍스트) 기준으로 캐시된 벡터를 재사용
+    """
+
+    def __init__(
+        self,
+        provider: EmbeddingProvider,
+        cache: Optional[EmbeddingCache] = None,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_batch_tokens: int = MAX_BATCH_TOKENS,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+    ):
+        self.provider = provider
+        self.cache = cache
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_in_flight = provider.max_in_flight or max_in_flight
+        self.count_tokens = count_tokens
+        self.request_count = 0  # 실제 provider.embed_batch 호출 횟수
+
+    def embed(self, texts: Iterable[str]) -> list[list[float]]:
+        """텍스트 목록을 벡터 목록으로 변환 (입력 순서 유지)"""
+        texts = list(texts)
+        if not texts:
+            return []
+        if self.cache is None:
+            return self._embed_uncached(texts)
+
+        keys = [
+            cache_key(self.provider.name, self.provider.dimension, text)
+            for text in texts
+        ]
+        cached = self.cache.get_many(list(dict.fromkeys(keys)))
+
+        # 캐시에 없는 텍스트만 (중복 제거 후) 임베딩
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        if missing:
+            vectors = self._embed_uncached(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(fresh.items())
+            cached.update(fresh)
+
+        return [cached[key] for key in keys]
+
+    def _embed_uncached(self, texts: list[str]) -> list[list[float]]:
+        limit = self.provider.max_input_tokens
+        if limit:
+            texts = [truncate_tokens(text, limit, self.count_tokens) for text in texts]
+        batches = make_batches(
+            texts, self.max_batch_size, self.max_batch_tokens, self.count_tokens
+        )
+
+        def run(span: tuple[int, int]) -> list[list[float]]:
+            start, end = span
+            vectors = self.provider.embed_batch(texts[start:end])
+            if len(vectors) != end - start:
+                raise ValueError(
+                    f"임베딩 결과 수 불일치: 요청 {end - start}개, 응답 {len(vectors)}개"
+                )
+            return vectors
+
+        self.request_count += len(batches)
+        if len(batches) == 1 or self.max_in_flight <= 1:
+            results = [run(span) for span in batches]
+        else:
+            # executor.map은 제출 순서대로 결과를 돌려주므로 입력 순서가 유지됨
+            with ThreadPoolExecutor(
+                max_workers=min(self.max_in_flight, len(batches))
+            ) as pool:
+                results = list(pool.map(run, batches))
+
+        return [vector for batch in results for vector in batch]
+
+
+# =============================================================================
+# 스크립트에서 사용하는 기본 엔진
+# =============================================================================
+_providers: dict[tuple[str, str, Optional[int]], EmbeddingProvider] = {}
+_engines: dict[tuple[str, str, Optional[int]], EmbeddingEngine] = {}
+_cache: Optional[EmbeddingCache] = None
+
+
+def get_cache() -> Optional[EmbeddingCache]:
+    """기본 디스크 캐시 (EMBEDDING_CACHE=0 이면 사용하지 않음)"""
+    global _cache
+    if os.getenv("EMBEDDING_CACHE", "1") == "0":
+        return None
+    if _cache is None:
+        _cache = EmbeddingCache()
+    return _cache
+
+
+def get_provider(
+    kind: str = EMBEDDING_PROVIDER,
+    model: Optional[str] = EMBEDDING_MODEL,
+    dimensions: Optional[int] = EMBEDDING_DIMENSIONS,
+) -> EmbeddingProvider:
+    """설정된 임베딩 제공자 (프로세스당 한 번 생성)"""
+    key = (kind, model or "", dimensions)
+    if key not in _providers:
+        if kind == "openai":
+            _providers[key] = OpenAIProvider(
+                model or DEFAULT_OPENAI_MODEL, dimensions=dimensions
+            )
+        elif kind == "local":
+            _providers[key] = SentenceTransformerProvider(
+                model or DEFAULT_LOCAL_MODEL, dimensions=dimensions
+            )
+        elif kind == "hash":
+            _providers[key] = HashEmbeddingProvider(dimensions or 384)
+        else:
+            raise ValueError(f"알 수 없는 EMBEDDING_PROVIDER: {kind}")
+    return _providers[key]
+
+
+def get_engine(
+    kind: str = EMBEDDING_PROVIDER,
+    model: Optional[str] = EMBEDDING_MODEL,
+    dimensions: Optional[int] = EMBEDDING_DIMENSIONS,
+) -> EmbeddingEngine:
+    """제공자별 기본 엔진 (프로세스당 한 번 생성)"""
+    key = (kind, model or "", dimensions)
+    if key not in _engines:
+        _engines[key] = EmbeddingEngine(
+            get_provider(kind, model, dimensions), cache=get_cache()
+        )
+    return _engines[key]
+
+
+def vector_size() -> int:
+    """현재 제공자의 벡터 차원 (컬렉션 생성 시 사용)"""
+    return get_provider().dimension
+
+
+def get_embeddings(texts: Iterable[str]) -> list[list[float]]:
+    """여러 텍스트를 배치로 묶어 벡터 목록으로 변환"""
+    return get_engine().embed(texts)
+
+
+def get_embedding(text: str) -> list:
+    """설정된 제공자를 사용하여 텍스트를 벡터로 변환"""
+    return get_embeddings([text])[0]
@@ -0,0 +1,174 @@
+# embedding_cache.py
+"""
+임베딩 디스크 캐시
+- 키: (모델, 차원, 정규화된 텍스트의 해시)
+- 벡터는 float32 BLOB으로 SQLite 파일에 저장
+- 최근 사용 순서(LRU)로 개수/용량 상한을 넘는 항목 제거
+  (개수/용량은 메모리에서 누적 관리, 상한을 넘을 때만 전체를 다시 세고 상한의 EVICT_RATIO까지 제거)
+"""
+from array import array
+from typing import Iterable, Optional
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+
+DEFAULT_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", ".embedding_cache.sqlite3")
+DEFAULT_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+DEFAULT_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+# 상한을 넘으면 상한의 90%까지 제거 (가득 찬 상태에서 매번 제거 + 전체 재계산하지 않도록)
+EVICT_RATIO = 0.9
+
+
+def normalize_text(text: str) -> str:
+    """유니코드 NFC 정규화 + 앞뒤 공백 제거 + 연속 공백을 하나로"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(model: str, dimensions: Optional[int], text: str) -> str:
+    """(모델, 차원, 정규화된 텍스트 해시)로 캐시 키 생성"""
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return f"{model}:{dimensions or 'default'}:{digest}"
+
+
+def pack_vector(vector: list[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def unpack_vector(blob: bytes) -> list[float]:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+
+class EmbeddingCache:
+    """SQLite 기반 영구 임베딩 캐시 (LRU + 개수/용량 상한)"""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)"
+        )
+        self._conn.commit()
+        # 항목 수 / 벡터 바이트 합계 (저장/제거 시 갱신, 전체 집계는 열 때와 제거할 때만)
+        self._count, self._bytes = self._totals()
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        """키 목록 중 캐시에 있는 벡터만 반환하고, 조회된 항목의 사용 시각 갱신"""
+        found = {}
+        with self._lock:
+            # SQLite 변수 개수 제한을 피하기 위해 나눠서 조회
+            for i in range(0, len(keys), 500):
+                chunk = keys[i : i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = unpack_vector(blob)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+        self.hits += sum(1 for key in keys if key in found)
+        self.misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def put_many(self, items: Iterable[tuple[str, list[float]]]) -> None:
+        """(키, 벡터) 목록을 저장한 뒤 상한을 넘으면 오래된 항목 제거"""
+        now = time.time()
+        blobs = {key: pack_vector(vector) for key, vector in items}
+        if not blobs:
+            return
+        with self._lock:
+            existing = self._stored_sizes(list(blobs))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, blob, now) for key, blob in blobs.items()],
+            )
+            self._count += len(blobs) - len(existing)
+            self._bytes += sum(len(blob) for blob in blobs.values()) - sum(existing.values())
+            self._evict()
+            self._conn.commit()
+
+    def _stored_sizes(self, keys: list[str]) -> dict[str, int]:
+        """이미 저장된 키의 벡터 바이트 수 (덮어쓸 항목의 누적값 보정용)"""
+        sizes = {}
+        for i in range(0, len(keys), 500):
+            chunk = keys[i : i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            sizes.update(
+                self._conn.execute(
+                    f"SELECT key, LENGTH(vector) FROM embeddings WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+            )
+        return sizes
+
+    def _totals(self) -> tuple[int, int]:
+        return self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()
+
+    def _evict(self) -> None:
+        if self._count <= self.max_entries and self._bytes <= self.max_bytes:
+            return
+        # 다른 프로세스가 같은 파일에 쓴 항목까지 반영하도록 제거할 때만 정확히 다시 셈
+        count, total_bytes = self._totals()
+        if count <= self.max_entries and total_bytes <= self.max_bytes:
+            self._count, self._bytes = count, total_bytes
+            return
+        avg_bytes = total_bytes / count
+        excess = max(
+            count - int(self.max_entries * EVICT_RATIO),
+            int((total_bytes - self.max_bytes * EVICT_RATIO) / avg_bytes) + 1,
+        )
+        self._conn.execute(
+            """DELETE FROM embeddings WHERE key IN (
+                SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?
+            )""",
+            (excess,),
+        )
+        self._count, self._bytes = self._totals()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,271 @@
+# eval_recall.py
+"""
+HNSW / 검색 파라미터 recall@k 평가
+- 정답: NumPy 전수 비교(brute force)로 구한 코사인 top-k (02_read_demo.py와 같은 payload 필터 적용)
+- m × ef_construct 조합마다 컬렉션을 만들어 HNSW를 구축하고, hnsw_ef별로 recall@k와 p50/p95 지연 시간 측정
+- score_threshold 후보별로 정답 top-k 중 임계값 이상인 비율과 평균 반환 건수 계산
+- 목표 recall(--target)을 만족하는 설정 중 p95 지연 시간이 가장 낮은 설정을 추천
+  → schema.py의 hnsw_m / hnsw_ef_construct / hnsw_ef, retrieval.py의 score_threshold에 반영
+
+사용법:
+    uv run eval_recall.py                                  # 합성 데이터 (해시 임베딩) 20000건
+    uv run eval_recall.py --source existing --collections glossary,catalog
+    uv run eval_recall.py --m 8,16,32 --ef-construct 100,200 --hnsw-ef 16,32,64,128 --output recall.json
+"""
+from dataclasses import replace
+import argparse
+import json
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import Filter, OptimizersConfigDiff, SearchParams
+
+from benchmark import GENERATORS, synthetic_questions
+from clients import QDRANT_URL, get_client
+from embedding import EmbeddingEngine, HashEmbeddingProvider
+from retrieval import COLLECTION_QUERIES
+from schema import CATALOG_SCHEMA, GLOSSARY_SCHEMA, SQL_HISTORY_SCHEMA, apply_schema, wait_for_green
+from sparse import dense_vector
+
+SCHEMAS = {
+    "glossary": GLOSSARY_SCHEMA,
+    "sql_history": SQL_HISTORY_SCHEMA,
+    "catalog": CATALOG_SCHEMA,
+}
+QUERIES = {q.key: q for q in COLLECTION_QUERIES}
+
+
+def parse_list(value: str, cast=int) -> list:
+    return [cast(v) for v in value.split(",") if v]
+
+
+def normalize_rows(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    return x / np.where(norms == 0, 1, norms)
+
+
+# =============================================================================
+# 데이터 / 질의
+# =============================================================================
+def load_existing(qc: QdrantClient, collection_name: str) -> tuple[np.ndarray, list[dict]]:
+    vectors, payloads = [], []
+    offset = None
+    while True:
+        points, offset = qc.scroll(
+            collection_name=collection_name,
+            limit=1000,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True,
+        )
+        for p in points:
+            vectors.append(dense_vector(p.vector))
+            payloads.append(p.payload or {})
+        if offset is None:
+            break
+    return normalize_rows(np.asarray(vectors, dtype=np.float32)), payloads
+
+
+def load_synthetic(key: str, size: int, engine: EmbeddingEngine) -> tuple[np.ndarray, list[dict]]:
+    records = list(GENERATORS[key](size))
+    vectors = np.asarray(engine.embed(r.text for r in records), dtype=np.float32)
+    return normalize_rows(vectors), [r.payload for r in records]
+
+
+def perturbed_queries(vectors: np.ndarray, n: int, seed: int = 7) -> np.ndarray:
+    """데이터 벡터에 잡음을 더한 질의 (기존 컬렉션 평가 시 질문 텍스트 대신 사용)"""
+    rng = np.random.default_rng(seed)
+    base = vectors[rng.integers(len(vectors), size=n)]
+    return normalize_rows(base + 0.05 * rng.standard_normal(base.shape).astype(np.float32))
+
+
+# =============================================================================
+# 정답 (NumPy brute force)
+# =============================================================================
+def filter_mask(payloads: list[dict], query_filter: Filter | None) -> np.ndarray:
+    """must + MatchValue 조건만 있는 필터를 payload 목록에 적용"""
+    mask = np.ones(len(payloads), dtype=bool)
+    for condition in (query_filter.must if query_filter else None) or []:
+        value = condition.match.value
+        mask &= np.array([p.get(condition.key) == value for p in payloads])
+    return mask
+
+
+def brute_force_topk(
+    vectors: np.ndarray, queries: np.ndarray, k: int, mask: np.ndarray, chunk: int = 64
+) -> tuple[np.ndarray, np.ndarray]:
+    """질의별 코사인 top-k (행 번호, 점수), 메모리를 위해 질의를 chunk 단위로 처리"""
+    candidates = np.flatnonzero(mask)
+    k = min(k, len(candidates))
+    sub = vectors[candidates]
+    top_ids, top_scores = [], []
+    for start in range(0, len(queries), chunk):
+        scores = queries[start : start + chunk] @ sub.T
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        part_scores = np.take_along_axis(scores, part, axis=1)
+        order = np.argsort(-part_scores, axis=1)
+        top_ids.append(candidates[np.take_along_axis(part, order, axis=1)])
+        top_scores.append(np.take_along_axis(part_scores, order, axis=1))
+    return np.vstack(top_ids), np.vstack(top_scores)
+
+
+def threshold_report(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    mask: np.ndarray,
+    truth_scores: np.ndarray,
+    thresholds: list[float],
+    k: int,
+) -> list[dict]:
+    """임계값별 정답 top-k 유지 비율과 평균 반환 건수 (limit=k 기준)"""
+    candidates = vectors[mask]
+    rows = []
+    for t in thresholds:
+        returned = [min(k, int((candidates @ q >= t).sum())) for q in queries]
+        rows.append(
+            {
+                "threshold": t,
+                "kept_recall": float((truth_scores >= t).mean()),
+                "mean_returned": float(np.mean(returned)),
+            }
+        )
+    return rows
+
+
+# =============================================================================
+# HNSW sweep
+# =============================================================================
+def build_collection(
+    qc: QdrantClient, key: str, vectors: np.ndarray, payloads: list[dict], m: int, ef_construct: int
+) -> tuple[str, float]:
+    """m / ef_construct로 평가용 컬렉션을 만들고 HNSW 구축 시간 반환"""
+    name = f"eval_{SCHEMAS[key].name}_m{m}_ef{ef_construct}"
+    if qc.collection_exists(name):
+        qc.delete_collection(name)
+    schema = replace(SCHEMAS[key], name=name, hnsw_m=m, hnsw_ef_construct=ef_construct)
+    apply_schema(qc, schema, vectors.shape[1])
+    # 작은 컬렉션도 HNSW를 만들도록 인덱싱 임계값을 낮춤 (기본값이면 전수 검색으로 recall 1)
+    qc.update_collection(name, optimizers_config=OptimizersConfigDiff(indexing_threshold=1))
+    start_time = time.perf_counter()
+    qc.upload_collection(
+        name, vectors=vectors, payload=payloads, ids=range(len(vectors)), batch_size=256, wait=True
+    )
+    wait_for_green(qc, name)
+    return name, time.perf_counter() - start_time
+
+
+def measure(
+    qc: QdrantClient,
+    name: str,
+    queries: np.ndarray,
+    truth: np.ndarray,
+    k: int,
+    query_filter: Filter | None,
+    hnsw_ef: int,
+) -> dict:
+    hits, latencies = 0, []
+    for q, expected in zip(queries, truth):
+        start_time = time.perf_counter()
+        points = qc.query_points(
+            collection_name=name,
+            query=q.tolist(),
+            limit=k,
+            query_filter=query_filter,
+            search_params=SearchParams(hnsw_ef=hnsw_ef),
+            with_payload=False,
+        ).points
+        latencies.append((time.perf_counter() - start_time) * 1000)
+        hits += len({p.id for p in points} & set(expected.tolist()))
+    return {
+        "recall": hits / truth.size,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HNSW / 검색 파라미터 recall@k 평가")
+    parser.add_argument("--source", choices=["synthetic", "existing"], default="synthetic")
+    parser.add_argument("--collections", default="glossary,sql_history,catalog")
+    parser.add_argument("--size", type=int, default=20000, help="합성 데이터 레코드 수")
+    parser.add_argument("--dim", type=int, default=384, help="해시 임베딩 차원")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--m", default="8,16,32")
+    parser.add_argument("--ef-construct", default="100,200")
+    parser.add_argument("--hnsw-ef", default="16,32,64,128")
+    parser.add_argument("--thresholds", default="0.1,0.2,0.3,0.4,0.5")
+    parser.add_argument("--target", type=float, default=0.95, help="목표 recall@k")
+    parser.add_argument("--url", default=QDRANT_URL)
+    parser.add_argument("--local", action="store_true", help="임베디드 로컬 모드 (HNSW 미사용, 동작 확인용)")
+    parser.add_argument("--output", help="결과를 저장할 JSON 파일")
+    args = parser.parse_args()
+
+    qc = QdrantClient(location=":memory:") if args.local else get_client(args.url)
+    engine = EmbeddingEngine(HashEmbeddingProvider(args.dim))
+    report = {}
+
+    for key in parse_list(args.collections, str):
+        query = QUERIES[key]
+        if args.source == "existing":
+            vectors, payloads = load_existing(qc, SCHEMAS[key].name)
+            queries = perturbed_queries(vectors, args.queries)
+        else:
+            vectors, payloads = load_synthetic(key, args.size, engine)
+            queries = normalize_rows(
+                np.asarray(engine.embed(synthetic_questions(args.queries)), dtype=np.float32)
+            )
+        mask = filter_mask(payloads, query.query_filter)
+        truth, truth_scores = brute_force_topk(vectors, queries, args.k, mask)
+        print("=" * 80)
+        print(f"[{key}] 벡터 {len(vectors)}개 (필터 통과 {int(mask.sum())}개), 질의 {len(queries)}개, k={args.k}")
+        print("=" * 80)
+
+        thresholds = threshold_report(
+            vectors, queries, mask, truth_scores, parse_list(args.thresholds, float), args.k
+        )
+        current = f" (현재 {query.score_threshold})" if query.score_threshold is not None else ""
+        print(f"score_threshold{current}: 정답 top-k 유지 비율 / 평균 반환 건수")
+        for row in thresholds:
+            print(f"  {row['threshold']:<5} {row['kept_recall']:.3f} / {row['mean_returned']:.2f}")
+        print()
+
+        sweep = []
+        print(f"{'m':<5}{'ef_construct':<14}{'build(s)':<10}{'hnsw_ef':<9}{'recall':<9}{'p50(ms)':<9}{'p95(ms)':<9}")
+        for m in parse_list(args.m):
+            for ef_construct in parse_list(args.ef_construct):
+                name, build_seconds = build_collection(qc, key, vectors, payloads, m, ef_construct)
+                for hnsw_ef in parse_list(args.hnsw_ef):
+                    row = {
+                        "m": m,
+                        "ef_construct": ef_construct,
+                        "hnsw_ef": hnsw_ef,
+                        "build_seconds": build_seconds,
+                        **measure(qc, name, queries, truth, args.k, query.query_filter, hnsw_ef),
+                    }
+                    sweep.append(row)
+                    print(
+                        f"{m:<5}{ef_construct:<14}{build_seconds:<10.2f}{hnsw_ef:<9}"
+                        f"{row['recall']:<9.4f}{row['p50_ms']:<9.2f}{row['p95_ms']:<9.2f}"
+                    )
+                qc.delete_collection(name)
+
+        passing = [r for r in sweep if r["recall"] >= args.target]
+        best = min(passing, key=lambda r: (r["p95_ms"], r["m"], r["ef_construct"])) if passing else None
+        print()
+        if best:
+            print(
+                f"✅ recall ≥ {args.target} 중 가장 빠른 설정: m={best['m']}, "
+                f"ef_construct={best['ef_construct']}, hnsw_ef={best['hnsw_ef']} "
+                f"(recall {best['recall']:.4f}, p95 {best['p95_ms']:.2f}ms)"
+            )
+        else:
+            print(f"⚠️  recall ≥ {args.target}를 만족하는 설정이 없습니다. 탐색 범위를 넓히세요.")
+        print()
+        report[key] = {"thresholds": thresholds, "sweep": sweep, "recommended": best}
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"결과 저장: {args.output}")
@@ -0,0 +1,453 @@
+# ingest.py
+"""
+스트리밍 적재 파이프라인
+- 원본 레코드를 제너레이터로 읽고, 고정 크기 청크 단위로 임베딩 + upsert (메모리 사용량 일정)
+- 청크가 커밋될 때마다 마지막 id를 체크포인트 파일에 기록 → 중단 후 재실행 시 이어서 적재
+- 컬렉션별 처리량(records/sec) 보고
+- 증분 적재: payload의 content_hash와 비교하여 바뀐 레코드만 임베딩 + upsert,
+  원본에서 사라진 포인트는 삭제
+- 대량 적재(bulk_load): 인덱싱을 끈 채 upload_collection으로 worker 프로세스 여러 개가 배치를 나눠 보내고,
+  끝나면 인덱싱 후 green까지 대기 (PointStruct 대신 id / 벡터 / payload 스트림을 그대로 전달)
+"""
+from collections import deque
+from dataclasses import dataclass
+from itertools import chain, islice, tee
+from typing import Callable, Iterable, Iterator, Optional
+import hashlib
+import json
+import os
+import time
+import uuid
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import FieldCondition, MatchValue, PointIdsList, PointStruct
+
+from dummy_data_hr import CATALOG, GLOSSARY, SQL_HISTORY
+from embedding import EmbeddingEngine, get_engine
+from schema import (
+    CATALOG_SCHEMA,
+    GLOSSARY_SCHEMA,
+    HR_LAYOUT,
+    HR_TENANTS,
+    SQL_HISTORY_SCHEMA,
+    TENANT_FIELD,
+    UNIFIED_SCHEMA,
+    deferred_indexing,
+)
+from sparse import point_vector
+
+CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "256"))
+CHECKPOINT_PATH = os.getenv("INGEST_CHECKPOINT_PATH", ".ingest_checkpoint.json")
+# INGEST_BULK=1 이면 01_qdrant_setup.py가 대량 적재 모드 사용
+# INGEST_PARALLEL은 업로드 worker 프로세스 수, INGEST_BATCH_SIZE는 요청 1번에 보내는 포인트 수,
+# INGEST_MAX_RETRIES는 실패한 배치를 다시 보내는 횟수
+BULK_LOAD = os.getenv("INGEST_BULK", "0") == "1"
+PARALLEL = int(os.getenv("INGEST_PARALLEL", "4"))
+BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+MAX_RETRIES = int(os.getenv("INGEST_MAX_RETRIES", "3"))
+# 단일 컬렉션 레이아웃에서 tenant별 포인트 id 구간 크기 (tenant 순서 × stride + 원본 id)
+# (catalog의 id는 62비트 stable_id이므로 구간 대신 해시로 다른 tenant와 구분됨)
+TENANT_ID_STRIDE = 1_000_000_000
+
+
+@dataclass
+class Record:
+    """적재할 레코드 하나 (포인트 id, 임베딩할 텍스트, payload)"""
+
+    id: int
+    text: str
+    payload: dict
+
+    @property
+    def content_hash(self) -> str:
+        """임베딩 텍스트 + payload의 해시 (둘 중 하나라도 바뀌면 다시 적재)"""
+        content = json.dumps([self.text, self.payload], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class IngestStats:
+    collection_name: str
+    upserted: int = 0
+    skipped: int = 0  # 체크포인트 이전이라 건너뛴 레코드 수
+    unchanged: int = 0  # content_hash가 같아서 건너뛴 레코드 수
+    deleted: int = 0  # 원본에서 사라져 삭제한 포인트 수
+    seconds: float = 0.0
+    index_seconds: float = 0.0  # 대량 적재 후 인덱싱 완료(green)까지 기다린 시간 (seconds에 포함)
+
+    @property
+    def records_per_sec(self) -> float:
+        processed = self.upserted + self.unchanged
+        return processed / self.seconds if self.seconds else 0.0
+
+
+# =============================================================================
+# 원본 레코드 (dummy_data_hr → Record)
+# =============================================================================
+def glossary_records(glossary: Iterable[dict]) -> Iterator[Record]:
+    for g in glossary:
+        yield Record(
+            id=g["id"],
+            text=f"{g['title']} :: {g['description']} :: {', '.join(g['synonyms'])}",
+            payload={
+                "type": "glossary",
+                "original_id": g["original_id"],
+                "title": g["title"],
+                "description": g["description"],
+                "synonyms": g["synonyms"],
+            },
+        )
+
+
+def sql_history_records(sql_history: Iterable[dict]) -> Iterator[Record]:
+    for h in sql_history:
+        yield Record(
+            id=h["id"],
+            text=f"{h['title']} :: {h['description']} :: {h['sql']}",
+            payload={
+                "type": "history",
+                "original_id": h["original_id"],
+                "title": h["title"],
+                "description": h["description"],
+                "sql": h["sql"],
+            },
+        )
+
+
+def stable_id(name: str) -> int:
+    """이름(컬렉션/테이블.컬럼 등)에서 항상 같은 정수 포인트 id 생성 (uuid5 상위 62비트)
+
+    원본 내 위치와 무관하므로 항목이 추가/삭제되어도 다른 포인트의 id가 바뀌지 않음
+    62비트로 줄여 tenant 구간(unified_id)을 더해도 payload 정수(int64) 범위를 넘지 않음
+    """
+    return uuid.uuid5(uuid.NAMESPACE_URL, name).int >> 66
+
+
+def catalog_records(catalog: dict) -> Iterator[Record]:
+    """테이블마다 테이블 포인트 1개 + 컬럼 포인트 N개 생성
+
+    - 테이블 포인트: level=table, 테이블 전체 정보를 하나로 임베딩 (검색용)
+    - 컬럼 포인트: level=column, table/column/dtype으로 인덱스 조회 및 개별 수정
+    - id는 순서가 아니라 "hr_catalog/{table}", "hr_catalog/{table}.{column}"에서 생성 (stable_id)
+      → 컬럼이 추가되어도 다른 포인트의 id, 변경 이력, 캐시 참조가 그대로 유지 (순서는 ordinal)
+    """
+    for t in catalog["tables"]:
+        cols = "\n".join(
+            [
+                f"{col['name']}: {col.get('description','')} :: {col['dtype']}"
+                for col in t["columns"]
+            ]
+        )
+        yield Record(
+            id=stable_id(f"hr_catalog/{t['table']}"),
+            text=f"{t['table']}: {t['description']}\nColumns:\n {cols}",
+            payload={
+                "level": "table",
+                "table": t["table"],
+                "description": t["description"],
+            },
+        )
+        for ordinal, col in enumerate(t["columns"]):
+            yield Record(
+                id=stable_id(f"hr_catalog/{t['table']}.{col['name']}"),
+                text=f"{t['table']}.{col['name']}: {col.get('description','')} :: {col['dtype']}",
+                payload={
+                    "level": "column",
+                    "table": t["table"],
+                    "column": col["name"],
+                    "dtype": col["dtype"],
+                    "description": col.get("description", ""),
+                    "ordinal": ordinal,  # 테이블 내 컬럼 순서
+                },
+            )
+
+
+def tenant_records(key: str, records: Iterable[Record]) -> Iterator[Record]:
+    """단일 컬렉션 레이아웃용 레코드 (tenant 값을 payload에 넣고, tenant별 id 구간으로 이동)"""
+    tenant = HR_TENANTS[key]
+    for r in records:
+        yield Record(
+            id=unified_id(key, r.id),
+            text=r.text,
+            payload={**r.payload, TENANT_FIELD: tenant},
+        )
+
+
+def unified_id(key: str, point_id: int) -> int:
+    """컬렉션별 포인트 id → 단일 컬렉션 id (tenant마다 TENANT_ID_STRIDE 구간, 원본 id 충돌 방지)"""
+    return list(HR_TENANTS).index(key) * TENANT_ID_STRIDE + point_id
+
+
+# 결과 키 → 기본 레이아웃(컬렉션 3개)의 컬렉션(alias) 이름
+KEY_COLLECTIONS = {
+    "glossary": GLOSSARY_SCHEMA.name,
+    "sql_history": SQL_HISTORY_SCHEMA.name,
+    "catalog": CATALOG_SCHEMA.name,
+}
+
+
+def layout_collection(key: str) -> str:
+    """현재 레이아웃(HR_LAYOUT)에서 결과 키의 포인트가 저장된 컬렉션 이름"""
+    return UNIFIED_SCHEMA.name if HR_LAYOUT == "unified" else KEY_COLLECTIONS[key]
+
+
+def layout_id(key: str, point_id: int) -> int:
+    """원본 포인트 id → 현재 레이아웃의 포인트 id (단일 컬렉션이면 tenant 구간으로 이동)"""
+    return unified_id(key, point_id) if HR_LAYOUT == "unified" else point_id
+
+
+def layout_conditions(key: str) -> list[FieldCondition]:
+    """현재 레이아웃에서 결과 키의 포인트만 고르는 필터 조건 (단일 컬렉션이면 tenant 조건)"""
+    if HR_LAYOUT != "unified":
+        return []
+    return [FieldCondition(key=TENANT_FIELD, match=MatchValue(value=HR_TENANTS[key]))]
+
+
+# 컬렉션(alias) 이름 → 원본 레코드 (재색인 / 차원 마이그레이션에서 원본을 다시 읽을 때 사용)
+HR_SOURCES: dict[str, Callable[[], Iterator[Record]]] = {
+    "hr_glossary": lambda: glossary_records(GLOSSARY),
+    "hr_sql_history": lambda: sql_history_records(SQL_HISTORY),
+    "hr_catalog": lambda: catalog_records(CATALOG),
+    UNIFIED_SCHEMA.name: lambda: chain(
+        tenant_records("glossary", glossary_records(GLOSSARY)),
+        tenant_records("sql_history", sql_history_records(SQL_HISTORY)),
+        tenant_records("catalog", catalog_records(CATALOG)),
+    ),
+}
+
+
+# =============================================================================
+# 체크포인트
+# =============================================================================
+class Checkpoint:
+    """컬렉션별 마지막 커밋 id와 커밋된 레코드 수를 JSON 파일에 저장"""
+
+    def __init__(self, path: str = CHECKPOINT_PATH):
+        self.path = path
+        self.state = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.state = json.load(f)
+
+    def get(self, collection_name: str) -> Optional[dict]:
+        return self.state.get(collection_name)
+
+    def save(self, collection_name: str, last_id, count: int) -> None:
+        self.state[collection_name] = {"last_id": last_id, "count": count}
+        self._flush()
+
+    def clear(self, collection_name: str) -> None:
+        if self.state.pop(collection_name, None) is not None:
+            self._flush()
+
+    def _flush(self) -> None:
+        # 임시 파일에 쓴 뒤 교체하여 중간에 죽어도 파일이 깨지지 않도록 함
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+def chunked(records: Iterable[Record], size: int) -> Iterator[list[Record]]:
+    it = iter(records)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def existing_hashes(
+    client: QdrantClient, collection_name: str, ids: list
+) -> dict:
+    """포인트 id 목록의 저장된 content_hash를 한 번의 retrieve로 조회"""
+    points = client.retrieve(
+        collection_name=collection_name,
+        ids=ids,
+        with_payload=["content_hash"],
+        with_vectors=False,
+    )
+    return {p.id: (p.payload or {}).get("content_hash") for p in points}
+
+
+def delete_missing(
+    client: QdrantClient, collection_name: str, seen_ids: set, page_size: int = 1000
+) -> int:
+    """원본에 없는 포인트를 id만 스크롤하여 찾아 삭제"""
+    stale = []
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            limit=page_size,
+            offset=offset,
+            with_payload=False,
+            with_vectors=False,
+        )
+        stale.extend(p.id for p in points if p.id not in seen_ids)
+        if offset is None:
+            break
+    for i in range(0, len(stale), page_size):
+        client.delete(
+            collection_name=collection_name,
+            points_selector=PointIdsList(points=stale[i : i + page_size]),
+            wait=True,
+        )
+    return len(stale)
+
+
+def ingest(
+    client: QdrantClient,
+    collection_name: str,
+    records: Iterable[Record],
+    engine: Optional[EmbeddingEngine] = None,
+    chunk_size: int = CHUNK_SIZE,
+    checkpoint: Optional[Checkpoint] = None,
+    incremental: bool = True,
+    sparse_vector: Optional[str] = None,
+) -> IngestStats:
+    """레코드를 청크 단위로 임베딩 + upsert
+
+    체크포인트가 있으면 이미 커밋된 레코드 수만큼 건너뛰고 이어서 적재
+    incremental이면 content_hash가 같은 레코드는 건너뛰고, 원본에서 사라진 포인트는 삭제
+    sparse_vector를 지정하면 같은 텍스트로 만든 희소 벡터도 함께 저장
+    모두 끝나면 해당 컬렉션의 체크포인트를 지움
+    """
+    engine = engine or get_engine()
+    stats = IngestStats(collection_name)
+    records = iter(records)
+    seen_ids = set()
+
+    committed = 0
+    saved = checkpoint.get(collection_name) if checkpoint else None
+    if saved:
+        last_id = None
+        for r in islice(records, saved["count"]):
+            seen_ids.add(r.id)
+            last_id = r.id
+            committed += 1
+        if committed != saved["count"] or last_id != saved["last_id"]:
+            raise ValueError(
+                f"{collection_name} 체크포인트(last_id={saved['last_id']})가 원본 데이터와 맞지 않습니다. "
+                f"{checkpoint.path} 파일을 삭제 후 다시 실행하세요."
+            )
+        stats.skipped = committed
+
+    start_time = time.perf_counter()
+    for chunk in chunked(records, chunk_size):
+        seen_ids.update(r.id for r in chunk)
+        hashes = [r.content_hash for r in chunk]
+        changed = list(zip(chunk, hashes))
+        if incremental:
+            stored = existing_hashes(client, collection_name, [r.id for r in chunk])
+            changed = [(r, h) for r, h in changed if stored.get(r.id) != h]
+            stats.unchanged += len(chunk) - len(changed)
+
+        if changed:
+            vectors = engine.embed(r.text for r, _ in changed)
+            client.upsert(
+                collection_name, to_points(changed, vectors, sparse_vector), wait=True
+            )
+            stats.upserted += len(changed)
+        committed += len(chunk)
+        if checkpoint:
+            checkpoint.save(collection_name, chunk[-1].id, committed)
+
+    if incremental:
+        stats.deleted = delete_missing(client, collection_name, seen_ids)
+    stats.seconds = time.perf_counter() - start_time
+
+    if checkpoint:
+        checkpoint.clear(collection_name)
+    return stats
+
+
+def to_points(
+    changed: list[tuple[Record, str]], vectors: list[list[float]], sparse_vector: Optional[str]
+) -> list[PointStruct]:
+    return [
+        PointStruct(
+            id=r.id,
+            vector=point_vector(vector, r.text, sparse_vector),
+            payload={**r.payload, "content_hash": h},
+        )
+        for (r, h), vector in zip(changed, vectors)
+    ]
+
+
+def embedded_rows(
+    records: Iterable[Record],
+    engine: EmbeddingEngine,
+    chunk_size: int,
+    sparse_vector: Optional[str],
+) -> Iterator[tuple[int, object, dict]]:
+    """청크 단위로 임베딩하며 (id, 벡터, payload)를 한 건씩 내보냄 (PointStruct를 만들지 않음)"""
+    for chunk in chunked(records, chunk_size):
+        vectors = engine.embed(r.text for r in chunk)
+        for r, vector in zip(chunk, vectors):
+            yield (
+                r.id,
+                point_vector(vector, r.text, sparse_vector),
+                {**r.payload, "content_hash": r.content_hash},
+            )
+
+
+def columns(rows: Iterable[tuple]) -> tuple[Iterator, Iterator, Iterator]:
+    """(id, 벡터, payload) 스트림 → upload_collection의 ids / vectors / payload 스트림
+
+    세 스트림은 배치 단위로 함께 소비되므로 tee 버퍼는 배치 크기 정도만 유지됨
+    """
+    ids, vectors, payloads = tee(rows, 3)
+    return (r[0] for r in ids), (r[1] for r in vectors), (r[2] for r in payloads)
+
+
+def bulk_load(
+    client: QdrantClient,
+    collection_name: str,
+    records: Iterable[Record],
+    engine: Optional[EmbeddingEngine] = None,
+    chunk_size: int = CHUNK_SIZE,
+    parallel: int = PARALLEL,
+    sparse_vector: Optional[str] = None,
+    timeout: float = 3600,
+    batch_size: int = BATCH_SIZE,
+    max_retries: int = MAX_RETRIES,
+) -> IngestStats:
+    """대량 적재: 인덱싱을 끈 채 upload_collection으로 병렬 업로드하고, 인덱싱 완료(green)까지 대기
+
+    증분 비교/체크포인트 없이 모든 레코드를 덮어씀 (초기 적재, 재색인용)
+    임베딩은 현재 프로세스에서 chunk_size씩, 업로드는 parallel개의 worker 프로세스가 batch_size씩 나눠
+    wait=False로 보냄 (parallel > 1이면 01_qdrant_setup.py처럼 실행 코드가 __main__ 가드 안에 있어야 함)
+    포인트 id를 레코드 id로 고정하므로 실패한 배치를 max_retries번까지 다시 보내도 중복 없이 덮어씀
+    업로드가 끝나면 마지막 포인트를 wait=True로 한 번 더 보내 앞선 변경이 모두 반영된 뒤 인덱싱을 시작
+    임베디드 로컬 모드(QdrantClient(":memory:"))는 parallel을 무시하고 순서대로 적재
+    """
+    engine = engine or get_engine()
+    stats = IngestStats(collection_name)
+    last = deque(maxlen=1)
+
+    def rows():
+        for row in embedded_rows(records, engine, chunk_size, sparse_vector):
+            stats.upserted += 1
+            last.append(row)
+            yield row
+
+    start_time = time.perf_counter()
+    with deferred_indexing(client, collection_name, timeout):
+        ids, vectors, payloads = columns(rows())
+        client.upload_collection(
+            collection_name,
+            vectors=vectors,
+            payload=payloads,
+            ids=ids,
+            batch_size=batch_size,
+            parallel=parallel,
+            max_retries=max_retries,
+            wait=False,
+        )
+        if last:
+            point_id, vector, payload = last[0]
+            client.upsert(
+                collection_name, [PointStruct(id=point_id, vector=vector, payload=payload)], wait=True
+            )
+        loaded_at = time.perf_counter()
+    stats.index_seconds = time.perf_counter() - loaded_at
+    stats.seconds = time.perf_counter() - start_time
+    return stats
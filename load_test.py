@@ -0,0 +1,96 @@
+# load_test.py
+"""
+검색 서비스(service.py) 부하 테스트
+- 동시 연결 수(--concurrency)만큼 keep-alive 연결로 POST /context 요청을 반복
+- 질문은 샘플 데이터의 용어/SQL 제목에서 골라 반복 질문 비율을 흉내냄
+- 처리량(req/s), 지연 시간 p50/p95/p99, 상태 코드별 건수, 서비스 캐시 통계 출력
+
+사용법:
+    uv run service.py &
+    uv run load_test.py --requests 2000 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import httpx
+import numpy as np
+
+from dummy_data_hr import GLOSSARY, SQL_HISTORY
+
+QUESTIONS = [g["title"] for g in GLOSSARY] + [h["title"] for h in SQL_HISTORY]
+
+
+async def run_load(
+    base_url: str, total: int, concurrency: int, timeout: float, seed: int = 42
+) -> dict:
+    rng = random.Random(seed)
+    questions = [rng.choice(QUESTIONS) for _ in range(total)]
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+    queue: asyncio.Queue = asyncio.Queue()
+    for q in questions:
+        queue.put_nowait(q)
+
+    async def worker(client: httpx.AsyncClient):
+        while not queue.empty():
+            question = queue.get_nowait()
+            start_time = time.perf_counter()
+            try:
+                response = await client.post("/context", json={"question": question})
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append((time.perf_counter() - start_time) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        start_time = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start_time
+        service_stats = (await client.get("/stats")).json()
+
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "seconds": elapsed,
+        "throughput_rps": total / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "statuses": statuses,
+        "service": service_stats,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="검색 서비스 부하 테스트")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8080")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--output", help="결과를 저장할 JSON 파일")
+    args = parser.parse_args()
+
+    result = asyncio.run(
+        run_load(args.base_url, args.requests, args.concurrency, args.timeout)
+    )
+    print(f"요청 {result['requests']}건, 동시 연결 {result['concurrency']}개")
+    print(f"처리량: {result['throughput_rps']:.1f} req/s ({result['seconds']:.2f}s)")
+    print(
+        f"지연 시간: p50 {result['p50_ms']:.2f}ms, "
+        f"p95 {result['p95_ms']:.2f}ms, p99 {result['p99_ms']:.2f}ms"
+    )
+    print(f"상태 코드: {result['statuses']}")
+    service = result["service"]
+    print(f"질문 임베딩 캐시 적중률: {service['query_cache']['hit_rate']:.1%}")
+    if service["result_cache"]:
+        print(f"결과 캐시 적중률: {service['result_cache']['hit_rate']:.1%}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"결과 저장: {args.output}")
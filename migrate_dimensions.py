@@ -0,0 +1,174 @@
+# migrate_dimensions.py
+"""
+축소 차원 컬렉션으로 마이그레이션 + recall 비교
+- truncate: 기존 컬렉션의 벡터를 앞 N차원으로 잘라 다시 정규화하여 복사 (API 호출 없음)
+  text-embedding-3 계열은 dimensions 파라미터 결과와 같음 (Matryoshka 학습 모델)
+- reembed: 원본 데이터(dummy_data_hr)를 축소 차원으로 다시 임베딩하여 적재
+- 마이그레이션 후 원본 포인트 벡터를 질의로 사용해 recall@k 측정
+  정답은 원본 컬렉션(전체 차원)의 exact 검색, 비교 대상은 축소 컬렉션의 HNSW 검색
+
+사용법:
+    uv run migrate_dimensions.py hr_glossary --dim 512
+    uv run migrate_dimensions.py hr_catalog --dim 512 --mode reembed --target hr_catalog_512
+"""
+from dataclasses import replace
+import argparse
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct, SearchParams
+
+from clients import QDRANT_URL, get_client
+from embedding import EmbeddingEngine, get_cache, get_provider, truncate_vector
+from ingest import HR_SOURCES, chunked, ingest
+from schema import HR_SCHEMAS, apply_schema
+from sparse import dense_vector
+
+
+def scroll_points(qc: QdrantClient, collection_name: str, page_size: int = 256):
+    """벡터와 payload를 포함해 컬렉션의 모든 포인트를 페이지 단위로 스트리밍"""
+    offset = None
+    while True:
+        points, offset = qc.scroll(
+            collection_name=collection_name,
+            limit=page_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True,
+        )
+        yield from points
+        if offset is None:
+            break
+
+
+def truncated(vector, dimensions: int):
+    if isinstance(vector, dict):
+        return {**vector, "": truncate_vector(vector[""], dimensions)}
+    return truncate_vector(vector, dimensions)
+
+
+def migrate_truncate(
+    qc: QdrantClient, source: str, target: str, dimensions: int, chunk_size: int = 256
+) -> int:
+    """원본 벡터를 잘라 다시 정규화한 뒤 같은 id/payload로 복사 (희소 벡터는 그대로)"""
+    count = 0
+    for chunk in chunked(scroll_points(qc, source), chunk_size):
+        qc.upsert(
+            collection_name=target,
+            points=[
+                PointStruct(
+                    id=p.id,
+                    vector=truncated(p.vector, dimensions),
+                    payload=p.payload,
+                )
+                for p in chunk
+            ],
+            wait=True,
+        )
+        count += len(chunk)
+    return count
+
+
+def migrate_reembed(
+    qc: QdrantClient, source: str, target: str, dimensions: int
+) -> int:
+    """원본 데이터를 축소 차원으로 다시 임베딩하여 적재"""
+    if source not in HR_SOURCES:
+        raise ValueError(f"{source}의 원본 데이터를 알 수 없습니다 (truncate 모드를 사용하세요)")
+    engine = EmbeddingEngine(get_provider(dimensions=dimensions), cache=get_cache())
+    schema = next(s for s in HR_SCHEMAS if s.name == source)
+    stats = ingest(
+        qc,
+        target,
+        HR_SOURCES[source](),
+        engine=engine,
+        incremental=False,
+        sparse_vector=schema.sparse_vector,
+    )
+    return stats.upserted
+
+
+def reduced_recall(
+    qc: QdrantClient,
+    source: str,
+    target: str,
+    dimensions: int,
+    n_queries: int = 100,
+    k: int = 5,
+    seed: int = 42,
+) -> tuple[float, float, float]:
+    """원본 포인트 벡터를 질의로 한 recall@k와 원본/축소 컬렉션의 평균 검색 시간(ms)"""
+    points = list(scroll_points(qc, source))
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(len(points), size=min(n_queries, len(points)), replace=False)
+
+    hits = total = 0
+    full_ms = reduced_ms = 0.0
+    for i in sample:
+        vector = dense_vector(points[i].vector)
+        start_time = time.perf_counter()
+        truth = qc.query_points(
+            collection_name=source,
+            query=vector,
+            limit=k,
+            search_params=SearchParams(exact=True),
+            with_payload=False,
+        ).points
+        full_ms += (time.perf_counter() - start_time) * 1000
+
+        start_time = time.perf_counter()
+        found = qc.query_points(
+            collection_name=target,
+            query=truncate_vector(vector, dimensions),
+            limit=k,
+            with_payload=False,
+        ).points
+        reduced_ms += (time.perf_counter() - start_time) * 1000
+
+        hits += len({p.id for p in truth} & {p.id for p in found})
+        total += len(truth)
+    return hits / total if total else 0.0, full_ms / len(sample), reduced_ms / len(sample)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="축소 차원 컬렉션으로 마이그레이션")
+    parser.add_argument("source", help="원본 컬렉션 (예: hr_glossary)")
+    parser.add_argument("--dim", type=int, required=True, help="축소할 차원 (예: 512)")
+    parser.add_argument("--target", help="대상 컬렉션 (기본: {source}_{dim})")
+    parser.add_argument("--mode", choices=["truncate", "reembed"], default="truncate")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--url", default=QDRANT_URL)
+    args = parser.parse_args()
+
+    qc = get_client(args.url)
+    target = args.target or f"{args.source}_{args.dim}"
+    source_size = qc.get_collection(args.source).config.params.vectors.size
+    if args.dim >= source_size:
+        raise SystemExit(f"축소 차원({args.dim})이 원본 차원({source_size})보다 작아야 합니다")
+
+    # 원본 컬렉션의 스키마(HNSW, 인덱스, 양자화)를 그대로 사용
+    schema = next((s for s in HR_SCHEMAS if s.name == args.source), None)
+    if schema is None:
+        raise SystemExit(f"{args.source}는 schema.py에 선언된 컬렉션이 아닙니다")
+    for action in apply_schema(qc, replace(schema, name=target), args.dim):
+        print(f"  ✓ {action}")
+
+    start_time = time.perf_counter()
+    if args.mode == "truncate":
+        count = migrate_truncate(qc, args.source, target, args.dim)
+    else:
+        count = migrate_reembed(qc, args.source, target, args.dim)
+    print(
+        f"✅ {args.source}({source_size}차원) → {target}({args.dim}차원): "
+        f"{count}건 {args.mode} ({time.perf_counter() - start_time:.2f}s)"
+    )
+
+    recall, full_ms, reduced_ms = reduced_recall(
+        qc, args.source, target, args.dim, args.queries, args.k
+    )
+    print()
+    print(f"recall@{args.k} ({args.dim}차원 vs {source_size}차원 exact): {recall:.4f}")
+    print(f"평균 검색 시간: 원본 exact {full_ms:.2f}ms, 축소 {reduced_ms:.2f}ms")
+    print(f"벡터 저장 크기: {args.dim / source_size:.1%} (포인트당 {source_size * 4}B → {args.dim * 4}B)")
@@ -0,0 +1,127 @@
+# query_cache.py
+"""
+질문 임베딩 캐시 (읽기 경로용, 프로세스 내 메모리)
+- 같은 질문이 반복되면 임베딩 API 호출 없이 메모리에서 벡터를 반환 (LRU + TTL)
+- 같은 질문이 동시에 들어오면 임베딩 요청 하나만 보내고 결과를 공유 (request coalescing)
+- 적중률 등 통계 제공
+- 키는 디스크 캐시와 같은 (모델, 차원, 정규화된 텍스트) 기준
+"""
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Optional
+import os
+import threading
+import time
+
+from embedding import EmbeddingEngine, get_engine
+from embedding_cache import cache_key
+
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "1024"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "3600"))  # 초
+
+
+@dataclass
+class QueryCacheStats:
+    hits: int = 0
+    misses: int = 0  # 실제 임베딩 요청 수
+    coalesced: int = 0  # 진행 중인 요청을 기다려 결과를 공유한 수
+    expired: int = 0
+    entries: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses + self.coalesced
+        return (self.hits + self.coalesced) / total if total else 0.0
+
+
+class QueryEmbeddingCache:
+    """질문 텍스트 → 벡터 LRU + TTL 캐시 (스레드 안전)"""
+
+    def __init__(
+        self,
+        engine: Optional[EmbeddingEngine] = None,
+        max_entries: int = QUERY_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = QUERY_CACHE_TTL,
+    ):
+        self.engine = engine or get_engine()
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, list[float]]] = OrderedDict()
+        self._in_flight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = QueryCacheStats()
+
+    def key(self, text: str) -> str:
+        provider = self.engine.provider
+        return cache_key(provider.name, provider.dimension, text)
+
+    def get(self, text: str) -> list[float]:
+        """질문 벡터 반환 (캐시 → 진행 중인 요청 → 새 임베딩 요청 순)"""
+        key = self.key(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, vector = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._stats.hits += 1
+                    return vector
+                del self._entries[key]
+                self._stats.expired += 1
+
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+                self._stats.misses += 1
+            else:
+                self._stats.coalesced += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            vector = self.engine.embed([text])[0]
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            del self._in_flight[key]
+        future.set_result(vector)
+        return vector
+
+    def stats(self) -> QueryCacheStats:
+        with self._lock:
+            self._stats.entries = len(self._entries)
+            return QueryCacheStats(**vars(self._stats))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_query_cache: Optional[QueryEmbeddingCache] = None
+_query_cache_lock = threading.Lock()
+
+
+def get_query_cache() -> QueryEmbeddingCache:
+    """기본 질문 임베딩 캐시 (프로세스당 한 번 생성)"""
+    global _query_cache
+    with _query_cache_lock:
+        if _query_cache is None:
+            _query_cache = QueryEmbeddingCache()
+        return _query_cache
+
+
+def embed_query(text: str) -> list[float]:
+    """질문 하나를 캐시를 거쳐 벡터로 변환"""
+    return get_query_cache().get(text)
@@ -0,0 +1,421 @@
+# reindex.py
+"""
+무중단 재색인 (blue/green 컬렉션 + alias)
+- 검색/업데이트는 항상 alias(hr_glossary 등)를 사용하고, 데이터는 버전 컬렉션(hr_glossary_v2 등)에 저장
+- rebuild: 새 버전 컬렉션에 대량 적재 모드(ingest.bulk_load)로 인덱싱을 미룬 채 적재
+  → 인덱싱 재개 후 green(최적화 완료)까지 대기 → alias를 새 버전으로 한 번에 교체 (원자적)
+- 적재와 HNSW 구축은 새 컬렉션에서만 일어나므로 운영 중인 컬렉션의 검색 지연 시간에 영향 없음
+- 임베딩 모델/차원(EMBEDDING_* 환경변수)이나 schema.py의 HNSW 설정을 바꾼 뒤 rebuild 하면 삭제/재생성 없이 전환
+- 교체할 때 이전 alias 대상을 {alias}_prev1, {alias}_prev2 ... alias로 기록 (alias 교체와 같은 요청, 원자적)
+  → rollback은 {alias}_prev1이 가리키는 버전으로 되돌리고, 이전 버전은 이 기록 중 --keep개만 남김
+- 기록에 없는 버전(중단된 rebuild의 불완전한 컬렉션 등)은 되돌릴 대상으로 쓰지 않고 정리할 때 삭제
+- 원본 데이터로 적재한 뒤 변경 로그(apply_changes 이력)를 새 버전에 다시 적용하고 교체
+  → 교체 후 rebuild 중에 기록된 변경을 한 번 더 적용 (이전 버전에만 반영된 업데이트가 사라지지 않도록)
+  → 이력의 content_hash로 원본 재적재(01_qdrant_setup.py)에 덮어써진 변경은 제외, 재현할 수 없는 벡터는 보고만 함
+
+사용법:
+    uv run reindex.py status
+    uv run reindex.py rebuild hr_glossary
+    uv run reindex.py rebuild --all --keep 1
+    uv run reindex.py rollback hr_glossary
+"""
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+import argparse
+import re
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    CreateAlias,
+    CreateAliasOperation,
+    DatetimeRange,
+    DeleteAlias,
+    DeleteAliasOperation,
+    FieldCondition,
+    PointVectors,
+    SetPayload,
+    SetPayloadOperation,
+    UpdateVectors,
+    UpdateVectorsOperation,
+)
+
+from changelog import entry_filter, scroll_entries
+from clients import QDRANT_URL, get_client
+from embedding import EmbeddingEngine, get_engine, vector_size
+from ingest import HR_SOURCES, Record, bulk_load, existing_hashes
+from schema import LAYOUT_SCHEMAS, CollectionSchema, apply_schema
+from sparse import point_vector
+from update_engine import entry_fields
+
+# 변경 이력의 timestamp는 업데이트 전에 찍히므로 교체 후 다시 적용할 구간을 rebuild 시작보다 앞당김
+REPLAY_MARGIN_SECONDS = 60
+
+
+@dataclass
+class ReplayStats:
+    replayed: int = 0  # 다시 적용한 포인트 수
+    stale: int = 0  # 원본 재적재로 덮어써져 건너뛴 변경 수
+    no_embed_text: tuple = ()  # embed_text가 없어 벡터를 재현하지 못한 포인트 id
+
+
+@dataclass
+class RebuildStats:
+    alias: str
+    collection_name: str  # 새 버전 컬렉션
+    previous: Optional[str]  # 교체 전 alias 대상 (없으면 None)
+    upserted: int = 0
+    ingest_seconds: float = 0.0
+    index_seconds: float = 0.0
+    replayed: ReplayStats = field(default_factory=ReplayStats)  # 교체 전 변경 재적용
+    caught_up: ReplayStats = field(default_factory=ReplayStats)  # 교체 후 rebuild 중의 변경 재적용
+    deleted: tuple[str, ...] = ()
+
+
+# =============================================================================
+# 버전 / alias 조회
+# =============================================================================
+def versioned_name(name: str, version: int) -> str:
+    return f"{name}_v{version}"
+
+
+def versions(qc: QdrantClient, name: str) -> list[int]:
+    """name_v{N} 형식의 버전 컬렉션 번호 (오름차순)"""
+    pattern = re.compile(rf"{re.escape(name)}_v(\d+)")
+    found = []
+    for c in qc.get_collections().collections:
+        match = pattern.fullmatch(c.name)
+        if match:
+            found.append(int(match.group(1)))
+    return sorted(found)
+
+
+def alias_target(qc: QdrantClient, alias: str) -> Optional[str]:
+    """alias가 가리키는 컬렉션 (alias가 아니면 None)"""
+    for a in qc.get_aliases().aliases:
+        if a.alias_name == alias:
+            return a.collection_name
+    return None
+
+
+def previous_alias(alias: str, n: int) -> str:
+    """n번째 이전 alias 대상을 기록하는 alias 이름"""
+    return f"{alias}_prev{n}"
+
+
+def previous_targets(qc: QdrantClient, alias: str) -> list[str]:
+    """이전 alias 대상 컬렉션 (가장 최근 것부터, {alias}_prev1, _prev2 ...)"""
+    pattern = re.compile(rf"{re.escape(alias)}_prev(\d+)")
+    found = {}
+    for a in qc.get_aliases().aliases:
+        match = pattern.fullmatch(a.alias_name)
+        if match:
+            found[int(match.group(1))] = a.collection_name
+    return [found[n] for n in sorted(found)]
+
+
+def alias_operations(
+    qc: QdrantClient, alias: str, target: str, previous: list[str]
+) -> list:
+    """alias와 이전 대상 기록({alias}_prevN)을 target / previous로 바꾸는 작업 목록"""
+    pattern = re.compile(rf"{re.escape(alias)}(_prev\d+)?")
+    operations = [
+        DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=a.alias_name))
+        for a in qc.get_aliases().aliases
+        if pattern.fullmatch(a.alias_name)
+    ]
+    for name, collection_name in [(alias, target)] + [
+        (previous_alias(alias, n), c) for n, c in enumerate(previous, 1)
+    ]:
+        operations.append(
+            CreateAliasOperation(
+                create_alias=CreateAlias(collection_name=collection_name, alias_name=name)
+            )
+        )
+    return operations
+
+
+def swap_alias(qc: QdrantClient, alias: str, collection_name: str, keep: int = 1) -> list[str]:
+    """alias를 collection_name으로 교체하고 교체 전 대상을 {alias}_prev1로 기록 (한 요청, 원자적)
+
+    기존 기록은 한 칸씩 밀려 keep개까지 유지
+    같은 이름의 일반 컬렉션(alias 도입 전 컬렉션)이 있으면 삭제 후 alias 생성 (최초 1회, 짧은 중단)
+    """
+    actions = []
+    live = alias_target(qc, alias)
+    if live is None and qc.collection_exists(alias):
+        qc.delete_collection(alias)
+        actions.append(f"{alias}: 기존 컬렉션 삭제 (alias로 전환)")
+    previous = [live] if live is not None and live != collection_name else []
+    previous += [c for c in previous_targets(qc, alias) if c not in previous + [collection_name]]
+    qc.update_collection_aliases(
+        change_aliases_operations=alias_operations(qc, alias, collection_name, previous[:keep])
+    )
+    actions.append(f"{alias} → {collection_name}")
+    return actions
+
+
+def ensure_alias(
+    qc: QdrantClient, schema: CollectionSchema, vector_size: Optional[int] = None
+) -> list[str]:
+    """컬렉션도 alias도 없으면 첫 버전 컬렉션(_v1)을 만들고 alias 연결
+
+    이미 있으면(alias 또는 alias 도입 전 컬렉션) 아무것도 하지 않음
+    """
+    if qc.collection_exists(schema.name):
+        return []
+    target = versioned_name(schema.name, 1)
+    actions = apply_schema(qc, replace(schema, name=target), vector_size)
+    return actions + swap_alias(qc, schema.name, target)
+
+
+# =============================================================================
+# rebuild / rollback
+# =============================================================================
+def replay_changes(
+    qc: QdrantClient,
+    collection_name: str,
+    alias: str,
+    engine: Optional[EmbeddingEngine] = None,
+    sparse_vector: Optional[str] = None,
+    since: Optional[str] = None,
+    live: Optional[str] = None,
+) -> ReplayStats:
+    """alias에 기록된 변경 이력 중 아직 유효한 것만 시간순으로 합쳐 collection_name(새 버전)에 다시 적용
+
+    - 이력의 content_hash가 새 버전 포인트의 content_hash(원본)와 다르면 건너뜀
+      → 변경 이후 원본이 바뀌어 01_qdrant_setup.py 재적재로 덮어쓴 변경
+    - content_hash가 없는 이전 이력의 필드는 합친 값이 live(운영 중인 버전)의 값과 같을 때만 적용
+    - 포인트마다 최종 payload 필드와 마지막 재임베딩 텍스트만 반영 (임베딩 1번 + batch_update_points 1번)
+    - 마지막 재임베딩 이력에 embed_text가 없으면 벡터는 원본 텍스트 그대로 두고 no_embed_text로 보고
+    since(ISO 시각)를 주면 그 이후 이력만 적용하고, 변경 로그에는 다시 기록하지 않음
+    """
+    scroll_filter = entry_filter(collection_name=alias)
+    if since is not None:
+        scroll_filter.must.append(FieldCondition(key="timestamp", range=DatetimeRange(gte=since)))
+    entries = sorted(scroll_entries(qc, scroll_filter), key=lambda e: e.get("timestamp", ""))
+    stats = ReplayStats()
+    if not entries:
+        return stats
+    # 새 버전에 있는 포인트의 원본 content_hash (새 버전에 없는 포인트는 건너뜀)
+    hashes = existing_hashes(qc, collection_name, list(dict.fromkeys(e["point_id"] for e in entries)))
+
+    fields: dict[int, dict] = {}
+    unverified: dict[int, set] = {}  # content_hash 없는 이력에서 마지막으로 바뀐 필드
+    texts: dict[int, Optional[str]] = {}
+    for entry in entries:
+        point_id = entry["point_id"]
+        if point_id not in hashes:
+            continue
+        if "content_hash" in entry and entry["content_hash"] != hashes[point_id]:
+            stats.stale += 1
+            continue
+        new_fields = entry_fields(entry)
+        fields.setdefault(point_id, {}).update(new_fields)
+        pending = unverified.setdefault(point_id, set())
+        if "content_hash" in entry:
+            pending.difference_update(new_fields)
+        else:
+            pending.update(new_fields)
+        if "vector" in entry.get("field", "").split(" + "):
+            texts[point_id] = entry.get("embed_text")
+
+    checks = {point_id: keys for point_id, keys in unverified.items() if keys}
+    if checks and live is not None:
+        current = {
+            p.id: p.payload or {}
+            for p in qc.retrieve(
+                collection_name=live,
+                ids=list(checks),
+                with_payload=list(set().union(*checks.values())),
+                with_vectors=False,
+            )
+        }
+        for point_id, keys in checks.items():
+            for key in keys:
+                if current.get(point_id, {}).get(key) != fields[point_id][key]:
+                    del fields[point_id][key]
+                    stats.stale += 1
+
+    stats.no_embed_text = tuple(point_id for point_id, text in texts.items() if text is None)
+    texts = {point_id: text for point_id, text in texts.items() if text is not None}
+    operations = [
+        SetPayloadOperation(set_payload=SetPayload(payload=payload, points=[point_id]))
+        for point_id, payload in fields.items()
+        if payload
+    ]
+    if texts:
+        embedded = (engine or get_engine()).embed(texts.values())
+        operations.append(
+            UpdateVectorsOperation(
+                update_vectors=UpdateVectors(
+                    points=[
+                        PointVectors(id=point_id, vector=point_vector(vector, text, sparse_vector))
+                        for (point_id, text), vector in zip(texts.items(), embedded)
+                    ]
+                )
+            )
+        )
+    if operations:
+        qc.batch_update_points(
+            collection_name=collection_name, update_operations=operations, wait=True
+        )
+    stats.replayed = len({point_id for point_id, payload in fields.items() if payload} | set(texts))
+    return stats
+
+
+def rebuild(
+    qc: QdrantClient,
+    schema: CollectionSchema,
+    records: Iterable[Record],
+    vector_size: int,
+    engine: Optional[EmbeddingEngine] = None,
+    keep: int = 1,
+    timeout: float = 3600,
+) -> RebuildStats:
+    """새 버전 컬렉션에 적재 + 인덱싱을 마친 뒤 alias 교체, 이전 버전은 기록된 keep개만 유지
+
+    records(원본)로 적재한 뒤 아직 유효한 변경 이력을 다시 적용하여 운영 중인 버전의 업데이트를 반영하고,
+    교체 후 rebuild 중에 이전 버전에 기록된 변경을 한 번 더 적용 (replay_changes)
+    적재/재적용 중 실패하면 만들던 버전 컬렉션을 삭제 (alias와 이전 버전은 그대로)
+    """
+    replay_since = (datetime.now() - timedelta(seconds=REPLAY_MARGIN_SECONDS)).isoformat()
+    previous = alias_target(qc, schema.name)
+    target = versioned_name(schema.name, max(versions(qc, schema.name), default=0) + 1)
+    stats = RebuildStats(alias=schema.name, collection_name=target, previous=previous)
+
+    try:
+        apply_schema(qc, replace(schema, name=target), vector_size)
+        loaded = bulk_load(
+            qc, target, records, engine=engine, sparse_vector=schema.sparse_vector, timeout=timeout
+        )
+        stats.replayed = replay_changes(
+            qc, target, schema.name, engine, schema.sparse_vector, live=previous or schema.name
+        )
+    except BaseException:
+        if qc.collection_exists(target):
+            qc.delete_collection(target)
+        raise
+    stats.upserted = loaded.upserted
+    stats.ingest_seconds = loaded.seconds - loaded.index_seconds
+    stats.index_seconds = loaded.index_seconds
+
+    swap_alias(qc, schema.name, target, keep)
+    # 적재 ~ 교체 사이에 이전 버전에 적용된 변경 (교체 후에는 업데이트가 새 버전으로 감)
+    stats.caught_up = replay_changes(
+        qc, target, schema.name, engine, schema.sparse_vector, since=replay_since, live=previous
+    )
+    stats.deleted = tuple(cleanup(qc, schema.name, keep))
+    return stats
+
+
+def cleanup(qc: QdrantClient, name: str, keep: int = 1) -> list[str]:
+    """alias 대상과 기록된 이전 대상 keep개만 남기고 나머지 버전 컬렉션 삭제
+
+    기록에 없는 버전(중단된 rebuild의 불완전한 컬렉션, 오래된 버전)은 모두 삭제
+    실행 중인 다른 rebuild의 컬렉션도 삭제되므로 rebuild는 컬렉션마다 하나씩 실행
+    """
+    live = alias_target(qc, name)
+    if live is None:
+        return []
+    previous = previous_targets(qc, name)
+    if len(previous) > keep:
+        # 남길 개수를 줄인 경우 오래된 기록 alias부터 정리
+        qc.update_collection_aliases(
+            change_aliases_operations=alias_operations(qc, name, live, previous[:keep])
+        )
+    kept = {live, *previous[:keep]}
+    deleted = []
+    for v in versions(qc, name):
+        collection_name = versioned_name(name, v)
+        if collection_name not in kept:
+            qc.delete_collection(collection_name)
+            deleted.append(collection_name)
+    return deleted
+
+
+def rollback(qc: QdrantClient, name: str) -> str:
+    """alias를 기록된 직전 대상({name}_prev1)으로 되돌림 (나머지 기록은 한 칸씩 당김)"""
+    if alias_target(qc, name) is None:
+        raise ValueError(f"{name}는 alias가 아닙니다")
+    previous = [c for c in previous_targets(qc, name) if qc.collection_exists(c)]
+    if not previous:
+        raise ValueError(f"{name}: 되돌릴 이전 버전이 없습니다")
+    target = previous[0]
+    qc.update_collection_aliases(
+        change_aliases_operations=alias_operations(qc, name, target, previous[1:])
+    )
+    return target
+
+
+def status(qc: QdrantClient, schemas: list[CollectionSchema]) -> list[str]:
+    lines = []
+    for schema in schemas:
+        if not schema.has_vectors:
+            continue
+        live = alias_target(qc, schema.name)
+        if live is None:
+            state = "alias 도입 전 컬렉션" if qc.collection_exists(schema.name) else "없음"
+        else:
+            info = qc.get_collection(live)
+            state = f"→ {live} ({info.points_count}건, {info.status})"
+        previous = previous_targets(qc, schema.name)
+        others = [versioned_name(schema.name, v) for v in versions(qc, schema.name)]
+        others = [n for n in others if n != live and n not in previous]
+        line = f"{schema.name}: {state}"
+        if previous:
+            line += f", 되돌릴 버전: {', '.join(previous)}"
+        if others:
+            line += f", 기록에 없는 버전: {', '.join(others)}"
+        lines.append(line)
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="무중단 재색인 (blue/green + alias)")
+    parser.add_argument("command", choices=["status", "rebuild", "rollback"])
+    parser.add_argument("collections", nargs="*", help="alias 이름 (예: hr_glossary)")
+    parser.add_argument("--all", action="store_true", help="현재 레이아웃의 모든 벡터 컬렉션")
+    parser.add_argument("--keep", type=int, default=1, help="남겨 둘 이전 버전 수 (rollback 대상)")
+    parser.add_argument("--url", default=QDRANT_URL)
+    args = parser.parse_args()
+
+    qc = get_client(args.url)
+    schemas = {s.name: s for s in LAYOUT_SCHEMAS if s.has_vectors}
+    if args.command == "status":
+        for line in status(qc, list(schemas.values())):
+            print(f"  {line}")
+        raise SystemExit(0)
+
+    names = list(schemas) if args.all else args.collections
+    unknown = [n for n in names if n not in schemas]
+    if not names or unknown:
+        raise SystemExit(f"컬렉션을 지정하세요 (선택 가능: {', '.join(schemas)})")
+
+    for name in names:
+        if args.command == "rollback":
+            print(f"  ↩️  {name} → {rollback(qc, name)}")
+            continue
+        size = vector_size()
+        print(f"  🔨 {name}: 새 버전 컬렉션에 적재 중 ({size}차원, 인덱싱 보류)")
+        stats = rebuild(qc, schemas[name], HR_SOURCES[name](), size, get_engine(), args.keep)
+        print(
+            f"  ✓ {stats.alias}: {stats.previous or '(없음)'} → {stats.collection_name} "
+            f"(적재 {stats.upserted}건 {stats.ingest_seconds:.2f}s, 인덱싱 {stats.index_seconds:.2f}s, "
+            f"변경 재적용 {stats.replayed.replayed}건 + 교체 후 {stats.caught_up.replayed}건)"
+        )
+        if stats.replayed.stale:
+            print(f"    - 원본 재적재로 덮어써진 변경 {stats.replayed.stale}건은 다시 적용하지 않음")
+        # 교체 후 재적용 구간은 교체 전 재적용과 겹치므로 포인트 id로 중복 제거
+        no_embed_text = tuple(
+            dict.fromkeys(stats.replayed.no_embed_text + stats.caught_up.no_embed_text)
+        )
+        if no_embed_text:
+            print(
+                f"    ⚠️  embed_text가 기록되지 않아 벡터를 원본 텍스트로 둔 포인트 "
+                f"{len(no_embed_text)}개: {', '.join(map(str, no_embed_text[:10]))}"
+                f"{' ...' if len(no_embed_text) > 10 else ''} (embed_text와 함께 다시 업데이트하세요)"
+            )
+        for deleted in stats.deleted:
+            print(f"    - 이전 버전 삭제: {deleted}")
+    print("✅ 완료")
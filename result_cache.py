@@ -0,0 +1,267 @@
+# result_cache.py
+"""
+의미 기반 결과 캐시 (통합 검색 결과 전체를 질문 벡터 기준으로 캐시)
+- 새 질문 벡터와 캐시된 질문 벡터의 코사인 유사도가 threshold 이상이면 벡터 검색 없이 결과 재사용
+- 캐시 항목은 결과에 포함된 포인트 (catalog는 함께 조회한 컬럼 포인트 포함) 목록을 기억
+- 포인트가 변경되면 해당 포인트를 포함한 항목만 무효화
+  - 같은 프로세스: invalidate() 직접 호출
+  - 다른 프로세스(03_update_demo.py 등): 변경 로그의 timestamp 인덱스를 주기적으로 조회 (sync)
+    변경 이력마다 처음 관측한 시각을 기억하고, 그보다 먼저 검색을 시작한 항목만 무효화
+    (같은 이력을 다시 조회해도 이후에 저장된 항목은 무효화하지 않음)
+- 검색 방식(dense / 하이브리드)과 검색 조건 목록이 같을 때만 결과 재사용
+- 결과에 없던 포인트가 변경으로 새로 검색될 수 있는 경우는 TTL로 제한
+- 하이브리드 검색은 SQL 식별자 일치가 결과를 좌우하므로, 질문의 영문/SQL 식별자가 같을 때만 재사용
+  (emp_id ↔ dept_id처럼 벡터는 비슷하지만 식별자가 다른 질문 구분)
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+import os
+import threading
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+from changelog import changes_since
+from retrieval import HR_QUERIES, QDRANT_URL, CollectionQuery, CollectionResult, search_hr
+from sparse import identifier_terms
+
+RESULT_CACHE_THRESHOLD = float(os.getenv("RESULT_CACHE_THRESHOLD", "0.95"))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "256"))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "600"))  # 초
+RESULT_CACHE_REFRESH = float(os.getenv("RESULT_CACHE_REFRESH", "1.0"))  # 변경 로그 조회 주기(초)
+# 변경 로그 기록 시각과 실제 기록 사이의 지연을 감안해 조금 이전부터 다시 조회
+# (이미 처리한 변경 이력은 id로 건너뜀)
+SYNC_LOOKBACK = timedelta(seconds=60)
+
+PointRef = tuple[str, object]  # (collection_name, point_id)
+
+
+@dataclass
+class ResultCacheStats:
+    hits: int = 0
+    misses: int = 0
+    invalidated: int = 0
+    expired: int = 0
+    entries: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclass
+class CacheEntry:
+    vector: np.ndarray  # 정규화된 질문 벡터
+    results: dict[str, CollectionResult]
+    refs: set[PointRef]
+    expires_at: float
+    terms: frozenset[str] = frozenset()  # 질문의 영문/SQL 식별자
+    signature: tuple = ()  # 검색 방식 + 검색 조건 (query_signature)
+    searched_at: float = 0.0  # 검색을 시작한 시각 (monotonic), 이후에 관측된 변경만 이 항목을 무효화
+
+
+def result_refs(
+    results: dict[str, CollectionResult], queries: list[CollectionQuery] = HR_QUERIES
+) -> set[PointRef]:
+    """검색 결과에 포함된 모든 포인트 (catalog 결과의 컬럼 포인트 포함)"""
+    collection_names = {q.key: q.collection_name for q in queries}
+    refs = set()
+    for key, result in results.items():
+        collection_name = collection_names[key]
+        for p in result.points:
+            refs.add((collection_name, p.id))
+            for column in (p.payload or {}).get("columns", []):
+                if "id" in column:
+                    refs.add((collection_name, column["id"]))
+    return refs
+
+
+def query_signature(queries: list[CollectionQuery], query_text: Optional[str]) -> tuple:
+    """검색 방식(dense / 하이브리드)과 검색 조건 목록 (같을 때만 결과 재사용)
+
+    retrieval.query_request와 같이 질문 텍스트가 있고 sparse_vector가 있는 조건만 하이브리드
+    """
+    return tuple(
+        (bool(query_text) and q.sparse_vector is not None, repr(q)) for q in queries
+    )
+
+
+def normalize(vector) -> np.ndarray:
+    v = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(v)
+    return v / norm if norm else v
+
+
+class SemanticResultCache:
+    """질문 벡터 → 통합 검색 결과 캐시 (스레드 안전)
+
+    qc를 넘기면 lookup 시 refresh_seconds마다 변경 로그를 조회해 다른 프로세스의 변경도 반영
+    """
+
+    def __init__(
+        self,
+        qc: Optional[QdrantClient] = None,
+        threshold: float = RESULT_CACHE_THRESHOLD,
+        max_entries: int = RESULT_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = RESULT_CACHE_TTL,
+        refresh_seconds: float = RESULT_CACHE_REFRESH,
+    ):
+        self.qc = qc
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.refresh_seconds = refresh_seconds
+        self._entries: OrderedDict[int, CacheEntry] = OrderedDict()
+        # (항목 id 목록, 항목 벡터를 쌓은 행렬), 항목이 추가/삭제되면 다시 생성
+        self._matrix: Optional[tuple[list[int], np.ndarray]] = None
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._stats = ResultCacheStats()
+        self._synced_at = datetime.now()
+        self._next_sync = 0.0
+        # 관측한 변경 이력 id → 처음 관측한 시각, 최근 관측한 (시각, 포인트) 목록 (SYNC_LOOKBACK × 2 동안 유지)
+        self._seen: dict[str, float] = {}
+        self._recent: list[tuple[float, PointRef]] = []
+
+    def lookup(
+        self,
+        query_vector,
+        query_text: Optional[str] = None,
+        queries: list[CollectionQuery] = HR_QUERIES,
+    ) -> Optional[dict[str, CollectionResult]]:
+        """유사도가 threshold 이상이고 식별자/검색 방식이 같은 캐시 항목의 결과 (없으면 None)"""
+        if self.qc is not None and time.monotonic() >= self._next_sync:
+            self.sync()
+        query = normalize(query_vector)
+        terms = identifier_terms(query_text) if query_text else frozenset()
+        signature = query_signature(queries, query_text)
+        with self._lock:
+            self._drop_expired()
+            if self._entries:
+                ids, matrix = self._vectors()
+                matches = [
+                    self._entries[i].terms == terms and self._entries[i].signature == signature
+                    for i in ids
+                ]
+                scores = np.where(matches, matrix @ query, -np.inf)
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    entry_id = ids[best]
+                    self._entries.move_to_end(entry_id)
+                    self._stats.hits += 1
+                    return self._entries[entry_id].results
+            self._stats.misses += 1
+            return None
+
+    def store(
+        self,
+        query_vector,
+        results: dict[str, CollectionResult],
+        queries: list[CollectionQuery] = HR_QUERIES,
+        query_text: Optional[str] = None,
+        searched_at: Optional[float] = None,
+    ) -> None:
+        """검색 결과 저장 (searched_at: 검색을 시작한 time.monotonic() 값, 없으면 지금)
+
+        검색 도중 관측된 변경이 결과의 포인트를 건드렸다면 저장하지 않음
+        """
+        now = time.monotonic()
+        entry = CacheEntry(
+            vector=normalize(query_vector),
+            results=results,
+            refs=result_refs(results, queries),
+            expires_at=now + self.ttl_seconds,
+            terms=identifier_terms(query_text) if query_text else frozenset(),
+            signature=query_signature(queries, query_text),
+            searched_at=now if searched_at is None else searched_at,
+        )
+        with self._lock:
+            if any(
+                seen_at > entry.searched_at and ref in entry.refs for seen_at, ref in self._recent
+            ):
+                return
+            self._entries[self._next_id] = entry
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def invalidate(self, refs: Iterable[PointRef], seen_at: Optional[float] = None) -> int:
+        """변경된 포인트를 포함한 항목을 삭제하고 삭제한 항목 수 반환
+
+        seen_at을 넘기면 그 시각 이후에 검색을 시작한 항목은 변경이 이미 반영된 것으로 보고 유지
+        """
+        refs = set(refs)
+        if not refs:
+            return 0
+        with self._lock:
+            stale = [
+                i
+                for i, e in self._entries.items()
+                if e.refs & refs and (seen_at is None or e.searched_at < seen_at)
+            ]
+            for entry_id in stale:
+                del self._entries[entry_id]
+            if stale:
+                self._matrix = None
+            self._stats.invalidated += len(stale)
+        return len(stale)
+
+    def sync(self) -> int:
+        """변경 로그에서 처음 관측한 변경 이력으로 무효화 (이미 처리한 이력은 건너뜀)"""
+        now = datetime.now()
+        since = (self._synced_at - SYNC_LOOKBACK).isoformat()
+        self._synced_at = now
+        self._next_sync = time.monotonic() + self.refresh_seconds
+        changes = changes_since(self.qc, since)
+        seen_at = time.monotonic()
+        keep_after = seen_at - 2 * SYNC_LOOKBACK.total_seconds()
+        with self._lock:
+            fresh = {ref for log_id, ref in changes.items() if log_id not in self._seen}
+            for log_id in changes:
+                self._seen.setdefault(log_id, seen_at)
+            self._seen = {k: t for k, t in self._seen.items() if t >= keep_after}
+            self._recent = [(t, r) for t, r in self._recent if t >= keep_after]
+            self._recent.extend((seen_at, ref) for ref in fresh)
+        return self.invalidate(fresh, seen_at)
+
+    def stats(self) -> ResultCacheStats:
+        with self._lock:
+            self._stats.entries = len(self._entries)
+            return ResultCacheStats(**vars(self._stats))
+
+    def _drop_expired(self) -> None:
+        now = time.monotonic()
+        expired = [i for i, e in self._entries.items() if e.expires_at <= now]
+        for entry_id in expired:
+            del self._entries[entry_id]
+        if expired:
+            self._matrix = None
+            self._stats.expired += len(expired)
+
+    def _vectors(self) -> tuple[list[int], np.ndarray]:
+        if self._matrix is None:
+            ids = list(self._entries)
+            self._matrix = (ids, np.stack([self._entries[i].vector for i in ids]))
+        return self._matrix
+
+
+def cached_search_hr(
+    query_vector: list[float],
+    cache: SemanticResultCache,
+    url: str = QDRANT_URL,
+    queries: list[CollectionQuery] = HR_QUERIES,
+    query_text: Optional[str] = None,
+) -> tuple[dict[str, CollectionResult], bool]:
+    """결과 캐시를 거친 통합 검색 (결과, 캐시 적중 여부)"""
+    results = cache.lookup(query_vector, query_text, queries)
+    if results is not None:
+        return results, True
+    searched_at = time.monotonic()
+    results = search_hr(query_vector, url, queries, query_text)
+    cache.store(query_vector, results, queries, query_text, searched_at)
+    return results, False
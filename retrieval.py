@@ -0,0 +1,348 @@
+# retrieval.py
+"""
+통합 검색 모듈
+- 하나의 질문 벡터로 glossary, catalog, sql_history 컬렉션을 동시에 검색
+- AsyncQdrantClient로 세 검색을 동시에 보내므로 전체 시간 ≈ 가장 느린 검색 시간
+- 컬렉션별 결과와 검색 시간을 함께 반환
+- catalog는 테이블 포인트를 검색한 뒤, 해당 테이블의 컬럼 포인트를 table 인덱스로 한 번에 조회
+- 질문 텍스트를 함께 넘기면 dense + 희소(BM25) 검색 결과를 서버에서 RRF로 융합 (하이브리드 검색)
+- HR_LAYOUT=unified 이면 단일 컬렉션(hr_unified)을 tenant별 prefetch + type 그룹 검색 1번으로 조회
+"""
+from dataclasses import dataclass, field, replace
+from typing import Optional
+import asyncio
+import os
+import time
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import (
+    FieldCondition,
+    Filter,
+    Fusion,
+    FusionQuery,
+    MatchAny,
+    MatchValue,
+    Prefetch,
+    ScoredPoint,
+    SearchParams,
+    SparseVector,
+)
+
+from clients import QDRANT_URL, make_async_client
+from schema import (
+    CATALOG_SCHEMA,
+    GLOSSARY_SCHEMA,
+    HR_LAYOUT,
+    HR_TENANTS,
+    SQL_HISTORY_SCHEMA,
+    TENANT_FIELD,
+    UNIFIED_SCHEMA,
+)
+from sparse import encode_query
+
+# 하이브리드 검색에서 dense / 희소 검색 각각 가져올 후보 수 (limit의 배수, 최소 20)
+HYBRID_PREFETCH_FACTOR = int(os.getenv("HYBRID_PREFETCH_FACTOR", "4"))
+
+
+@dataclass
+class CollectionQuery:
+    """컬렉션 하나에 대한 검색 조건"""
+
+    key: str  # 결과 dict의 키 (glossary, catalog, sql_history)
+    collection_name: str
+    limit: int = 5
+    score_threshold: Optional[float] = None
+    query_filter: Optional[Filter] = None
+    search_params: Optional[SearchParams] = None  # hnsw_ef, 양자화 oversampling/rescore 등
+    sparse_vector: Optional[str] = None  # 희소 벡터 이름 (있으면 하이브리드 검색)
+    tenant: Optional[str] = None  # 단일 컬렉션 레이아웃의 tenant(type) 값
+
+
+@dataclass
+class CollectionResult:
+    """컬렉션 하나의 검색 결과와 검색 시간(ms)"""
+
+    points: list[ScoredPoint] = field(default_factory=list)
+    time_ms: float = 0.0
+
+
+# 02_read_demo.py에서 사용하는 세 컬렉션 검색 조건
+COLLECTION_QUERIES = [
+    CollectionQuery(
+        key="glossary",
+        collection_name="hr_glossary",
+        limit=5,
+        score_threshold=0.3,
+        query_filter=Filter(
+            must=[FieldCondition(key="type", match=MatchValue(value="glossary"))]
+        ),
+        search_params=GLOSSARY_SCHEMA.search_params(),
+        sparse_vector=GLOSSARY_SCHEMA.sparse_vector,
+    ),
+    CollectionQuery(
+        key="catalog",
+        collection_name="hr_catalog",
+        limit=5,
+        query_filter=Filter(
+            must=[FieldCondition(key="level", match=MatchValue(value="table"))]
+        ),
+        search_params=CATALOG_SCHEMA.search_params(),
+        sparse_vector=CATALOG_SCHEMA.sparse_vector,
+    ),
+    CollectionQuery(
+        key="sql_history",
+        collection_name="hr_sql_history",
+        limit=5,
+        score_threshold=0.1,
+        query_filter=Filter(
+            must=[FieldCondition(key="type", match=MatchValue(value="history"))]
+        ),
+        search_params=SQL_HISTORY_SCHEMA.search_params(),
+        sparse_vector=SQL_HISTORY_SCHEMA.sparse_vector,
+    ),
+]
+
+
+def unified_query(query: CollectionQuery) -> CollectionQuery:
+    """컬렉션별 검색 조건 → 단일 컬렉션의 tenant 검색 조건 (tenant 필터 + 기존 필터)"""
+    tenant = HR_TENANTS[query.key]
+    conditions = [c for c in (query.query_filter.must if query.query_filter else None) or []]
+    return replace(
+        query,
+        collection_name=UNIFIED_SCHEMA.name,
+        query_filter=Filter(
+            must=[FieldCondition(key=TENANT_FIELD, match=MatchValue(value=tenant))]
+            + [c for c in conditions if getattr(c, "key", None) != TENANT_FIELD]
+        ),
+        search_params=UNIFIED_SCHEMA.search_params(),
+        sparse_vector=UNIFIED_SCHEMA.sparse_vector,
+        tenant=tenant,
+    )
+
+
+UNIFIED_QUERIES = [unified_query(q) for q in COLLECTION_QUERIES]
+
+# 현재 레이아웃의 검색 조건 (HR_LAYOUT 환경변수)
+HR_QUERIES = UNIFIED_QUERIES if HR_LAYOUT == "unified" else COLLECTION_QUERIES
+
+
+def query_request(
+    query_vector: list[float], query: CollectionQuery, query_text: Optional[str] = None
+) -> dict:
+    """query_points 인자 (dense 검색, 또는 dense + 희소 prefetch를 RRF로 융합)
+
+    하이브리드 검색에서 score_threshold는 dense 후보에만 적용 (RRF 점수는 순위 기반)
+    """
+    sparse = sparse_query(query, query_text)
+    if sparse is None:
+        return {
+            "query": query_vector,
+            "score_threshold": query.score_threshold,
+            "search_params": query.search_params,
+        }
+    return {
+        "prefetch": prefetches(query_vector, query, sparse),
+        "query": FusionQuery(fusion=Fusion.RRF),
+    }
+
+
+def sparse_query(query: CollectionQuery, query_text: Optional[str]) -> Optional[SparseVector]:
+    """하이브리드 검색에 사용할 희소 질의 벡터 (희소 벡터가 없거나 토큰이 없으면 None)"""
+    sparse = encode_query(query_text) if query_text and query.sparse_vector else None
+    return sparse if sparse is not None and sparse.indices else None
+
+
+def prefetches(
+    query_vector: list[float], query: CollectionQuery, sparse: Optional[SparseVector]
+) -> list[Prefetch]:
+    """검색 조건 하나의 dense (+ 희소) 후보 검색"""
+    limit = max(query.limit * HYBRID_PREFETCH_FACTOR, 20) if sparse is not None else query.limit
+    dense = Prefetch(
+        query=query_vector,
+        filter=query.query_filter,
+        params=query.search_params,
+        score_threshold=query.score_threshold,
+        limit=limit,
+    )
+    if sparse is None:
+        return [dense]
+    return [
+        dense,
+        Prefetch(query=sparse, using=query.sparse_vector, filter=query.query_filter, limit=limit),
+    ]
+
+
+def grouped_request(
+    query_vector: list[float], queries: list[CollectionQuery], query_text: Optional[str] = None
+) -> dict:
+    """단일 컬렉션의 여러 tenant를 한 번에 검색하는 query_points_groups 인자
+
+    tenant별 필터를 should로 묶어 검색하고 type으로 그룹화 (tenant별 score_threshold는 split_groups에서 적용)
+    하이브리드면 tenant마다 dense / 희소 후보를 prefetch 하여 RRF로 융합
+    """
+    request = {
+        "collection_name": queries[0].collection_name,
+        "query_filter": Filter(should=[q.query_filter for q in queries]),
+        "group_by": TENANT_FIELD,
+        "limit": len(queries),
+        "group_size": max(q.limit for q in queries),
+        "with_payload": True,
+    }
+    sparse = [sparse_query(q, query_text) for q in queries]
+    if all(s is None for s in sparse):
+        return {**request, "query": query_vector, "search_params": queries[0].search_params}
+    return {
+        **request,
+        "prefetch": [p for q, s in zip(queries, sparse) for p in prefetches(query_vector, q, s)],
+        "query": FusionQuery(fusion=Fusion.RRF),
+    }
+
+
+def split_groups(
+    groups, queries: list[CollectionQuery], apply_threshold: bool = True
+) -> dict[str, list[ScoredPoint]]:
+    """그룹 검색 결과 → {key: 포인트 목록} (tenant별 score_threshold / limit 적용)
+
+    RRF 점수는 순위 기반이므로 하이브리드 결과에는 apply_threshold=False (임계값은 dense prefetch에서 적용)
+    """
+    hits = {g.id: g.hits for g in groups}
+    return {
+        q.key: [
+            p
+            for p in hits.get(q.tenant, [])
+            if not apply_threshold or q.score_threshold is None or p.score >= q.score_threshold
+        ][: q.limit]
+        for q in queries
+    }
+
+
+def is_grouped(queries: list[CollectionQuery]) -> bool:
+    """모든 검색 조건이 같은 컬렉션의 tenant 검색이면 그룹 검색 1번으로 처리"""
+    return (
+        len(queries) > 1
+        and len({q.collection_name for q in queries}) == 1
+        and all(q.tenant is not None for q in queries)
+    )
+
+
+async def search_one(
+    aqc: AsyncQdrantClient,
+    query_vector: list[float],
+    query: CollectionQuery,
+    query_text: Optional[str] = None,
+) -> CollectionResult:
+    """컬렉션 하나를 검색하고 걸린 시간 기록"""
+    start_time = time.perf_counter()
+    response = await aqc.query_points(
+        collection_name=query.collection_name,
+        limit=query.limit,
+        query_filter=query.query_filter,
+        with_payload=True,
+        **query_request(query_vector, query, query_text),
+    )
+    return CollectionResult(
+        points=response.points,
+        time_ms=(time.perf_counter() - start_time) * 1000,
+    )
+
+
+async def search_collections(
+    aqc: AsyncQdrantClient,
+    query_vector: list[float],
+    queries: list[CollectionQuery] = HR_QUERIES,
+    query_text: Optional[str] = None,
+) -> dict[str, CollectionResult]:
+    """여러 컬렉션을 동시에 검색하여 {key: CollectionResult} 반환"""
+    if is_grouped(queries):
+        return await search_grouped(aqc, query_vector, queries, query_text)
+    results = await asyncio.gather(
+        *(search_one(aqc, query_vector, q, query_text) for q in queries)
+    )
+    return {q.key: r for q, r in zip(queries, results)}
+
+
+async def search_grouped(
+    aqc: AsyncQdrantClient,
+    query_vector: list[float],
+    queries: list[CollectionQuery],
+    query_text: Optional[str] = None,
+) -> dict[str, CollectionResult]:
+    """단일 컬렉션을 type 그룹 검색 1번으로 조회 (모든 key의 time_ms는 같은 요청 시간)"""
+    request = grouped_request(query_vector, queries, query_text)
+    start_time = time.perf_counter()
+    response = await aqc.query_points_groups(**request)
+    time_ms = (time.perf_counter() - start_time) * 1000
+    groups = split_groups(response.groups, queries, "prefetch" not in request)
+    return {key: CollectionResult(points=points, time_ms=time_ms) for key, points in groups.items()}
+
+
+async def attach_columns(
+    aqc: AsyncQdrantClient, result: CollectionResult, query: CollectionQuery
+) -> None:
+    """catalog 테이블 검색 결과의 payload에 컬럼 목록(columns)을 채움"""
+    tables = [p.payload["table"] for p in result.points if p.payload]
+    if not tables:
+        return
+    start_time = time.perf_counter()
+    conditions = [
+        FieldCondition(key="level", match=MatchValue(value="column")),
+        FieldCondition(key="table", match=MatchAny(any=tables)),
+    ]
+    if query.tenant is not None:
+        conditions.append(FieldCondition(key=TENANT_FIELD, match=MatchValue(value=query.tenant)))
+    points, _ = await aqc.scroll(
+        collection_name=query.collection_name,
+        scroll_filter=Filter(must=conditions),
+        limit=10000,
+        with_payload=["table", "column", "dtype", "description", "ordinal"],
+        with_vectors=False,
+    )
+    columns_by_table: dict[str, list[dict]] = {}
+    for p in sorted(points, key=lambda p: p.payload.get("ordinal", 0)):
+        columns_by_table.setdefault(p.payload["table"], []).append(
+            {
+                "id": p.id,  # 컬럼 수정 시 결과 캐시 무효화에 사용
+                "name": p.payload["column"],
+                "dtype": p.payload.get("dtype", "N/A"),
+                "description": p.payload.get("description", ""),
+            }
+        )
+    for p in result.points:
+        if p.payload:
+            p.payload["columns"] = columns_by_table.get(p.payload["table"], [])
+    result.time_ms += (time.perf_counter() - start_time) * 1000
+
+
+async def search_hr_async(
+    aqc: AsyncQdrantClient,
+    query_vector: list[float],
+    queries: list[CollectionQuery] = HR_QUERIES,
+    query_text: Optional[str] = None,
+) -> dict[str, CollectionResult]:
+    """통합 검색 (세 컬렉션 동시 검색 + catalog 컬럼 조회), 클라이언트는 호출자가 관리
+
+    query_text를 넘기면 희소 벡터가 있는 컬렉션은 하이브리드 검색
+    """
+    results = await search_collections(aqc, query_vector, queries, query_text)
+    catalog = next((q for q in queries if q.key == "catalog"), None)
+    if catalog is not None:
+        await attach_columns(aqc, results["catalog"], catalog)
+    return results
+
+
+def search_hr(
+    query_vector: list[float],
+    url: str = QDRANT_URL,
+    queries: list[CollectionQuery] = HR_QUERIES,
+    query_text: Optional[str] = None,
+) -> dict[str, CollectionResult]:
+    """동기 코드에서 사용하는 통합 검색 (내부에서 AsyncQdrantClient 사용)"""
+
+    async def run():
+        aqc = make_async_client(url)
+        try:
+            return await search_hr_async(aqc, query_vector, queries, query_text)
+        finally:
+            await aqc.close()
+
+    return asyncio.run(run())
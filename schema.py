@@ -0,0 +1,410 @@
+# schema.py
+"""
+HR 컬렉션 스키마 관리
+- 컬렉션별 벡터 설정(dense + 희소), HNSW 설정, 양자화, payload 인덱스, on_disk 옵션을 선언적으로 정의
+- apply: 없는 컬렉션/인덱스 생성
+- diff: 선언과 실제 설정의 차이(drift) 보고
+- HR_LAYOUT=unified 이면 세 컬렉션 대신 type(tenant) 인덱스로 나눈 단일 컬렉션(hr_unified) 사용
+
+사용법:
+    uv run schema.py diff
+    uv run schema.py apply
+"""
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, Optional, Union
+import argparse
+import os
+import time
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    DatetimeIndexParams,
+    Disabled,
+    Distance,
+    HnswConfigDiff,
+    IntegerIndexParams,
+    KeywordIndexParams,
+    Modifier,
+    OptimizersConfigDiff,
+    PayloadSchemaType,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    SparseVectorParams,
+    TextIndexParams,
+    VectorParams,
+)
+
+from sparse import SPARSE_VECTOR_NAME
+
+# 인덱싱 임계값을 읽을 수 없을 때 복원할 값 (Qdrant 기본값, KB)
+DEFAULT_INDEXING_THRESHOLD = 20000
+
+IndexSpec = Union[
+    PayloadSchemaType,
+    KeywordIndexParams,
+    IntegerIndexParams,
+    DatetimeIndexParams,
+    TextIndexParams,
+]
+
+
+@dataclass
+class CollectionSchema:
+    """컬렉션 하나의 선언적 스키마
+
+    has_vectors=False 이면 payload만 저장하는 컬렉션 (변경 로그 등)
+    벡터 차원은 임베딩 제공자에서 가져오므로 apply/diff 호출 시 전달
+    """
+
+    name: str
+    payload_indexes: dict[str, IndexSpec] = field(default_factory=dict)
+    has_vectors: bool = True
+    distance: Distance = Distance.COSINE
+    vectors_on_disk: bool = True
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 200
+    hnsw_ef: Optional[int] = None  # 검색 시 ef (None이면 서버 기본값), eval_recall.py로 결정
+    memmap_threshold: Optional[int] = 20000  # 큰 payload에 유리
+    on_disk_payload: bool = False
+    # 양자화: None | "int8" (scalar) | "binary"
+    # 양자화된 벡터는 RAM에 두고, 원본 벡터(on_disk)는 rescoring에만 사용
+    quantization: Optional[str] = None
+    oversampling: float = 2.0  # 양자화 검색 시 후보를 limit × oversampling 만큼 가져옴
+    rescore: bool = True  # 후보를 원본 벡터로 다시 점수 계산
+    # 희소 벡터 이름 (sparse.py, BM25 방식 / IDF는 서버 계산), None이면 dense만 사용
+    sparse_vector: Optional[str] = None
+
+    def search_params(self) -> Optional[SearchParams]:
+        """검색 시 사용할 hnsw_ef와 양자화 oversampling/rescore 설정"""
+        if self.quantization is None and self.hnsw_ef is None:
+            return None
+        quantization = None
+        if self.quantization is not None:
+            quantization = QuantizationSearchParams(
+                rescore=self.rescore, oversampling=self.oversampling
+            )
+        return SearchParams(hnsw_ef=self.hnsw_ef, quantization=quantization)
+
+
+def index_type(spec: IndexSpec) -> str:
+    """인덱스 선언에서 타입 문자열만 추출 (keyword, integer, ...)"""
+    value = spec if isinstance(spec, PayloadSchemaType) else spec.type
+    return getattr(value, "value", value)
+
+
+def quantization_config(kind: Optional[str]):
+    """양자화 종류 이름을 Qdrant 설정으로 변환 (양자화된 벡터는 항상 RAM)"""
+    if kind is None:
+        return None
+    if kind == "int8":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8, quantile=0.99, always_ram=True
+            )
+        )
+    if kind == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    raise ValueError(f"알 수 없는 양자화 종류: {kind}")
+
+
+def sparse_vectors_config(schema: CollectionSchema) -> Optional[dict]:
+    if schema.sparse_vector is None:
+        return None
+    return {schema.sparse_vector: SparseVectorParams(modifier=Modifier.IDF)}
+
+
+def quantization_kind(config) -> Optional[str]:
+    """Qdrant 양자화 설정을 종류 이름으로 변환 (quantization_config의 역)"""
+    if isinstance(config, ScalarQuantization):
+        return "int8"
+    if isinstance(config, BinaryQuantization):
+        return "binary"
+    return None
+
+
+# =============================================================================
+# HR 컬렉션 선언
+# - read/update/check 스크립트에서 사용하는 모든 필터 필드에 인덱스를 둠
+# =============================================================================
+GLOSSARY_SCHEMA = CollectionSchema(
+    name="hr_glossary",
+    sparse_vector=SPARSE_VECTOR_NAME,
+    payload_indexes={
+        "type": PayloadSchemaType.KEYWORD,  # 02_read_demo.py type=glossary 필터
+        "title": PayloadSchemaType.KEYWORD,
+    },
+)
+
+SQL_HISTORY_SCHEMA = CollectionSchema(
+    name="hr_sql_history",
+    sparse_vector=SPARSE_VECTOR_NAME,
+    payload_indexes={
+        "type": PayloadSchemaType.KEYWORD,  # 02_read_demo.py type=history 필터
+        "title": PayloadSchemaType.TEXT,  # 제목 전문 검색
+    },
+)
+
+CATALOG_SCHEMA = CollectionSchema(
+    name="hr_catalog",
+    sparse_vector=SPARSE_VECTOR_NAME,
+    payload_indexes={
+        # 02_read_demo.py level=table / 컬럼 조회, 03_update_demo.py 컬럼 필터
+        "level": PayloadSchemaType.KEYWORD,
+        "table": PayloadSchemaType.KEYWORD,
+        "column": PayloadSchemaType.KEYWORD,
+        "dtype": PayloadSchemaType.KEYWORD,
+    },
+)
+
+CHANGE_LOG_SCHEMA = CollectionSchema(
+    name="hr_change_log",
+    has_vectors=False,
+    on_disk_payload=True,  # 이력은 검색 경로가 아니므로 payload를 디스크에
+    payload_indexes={
+        "collection_name": PayloadSchemaType.KEYWORD,
+        "point_id": IntegerIndexParams(
+            type=PayloadSchemaType.INTEGER, lookup=True, range=False
+        ),
+        "field": PayloadSchemaType.KEYWORD,
+        "timestamp": PayloadSchemaType.DATETIME,
+    },
+)
+
+CHANGE_STATS_SCHEMA = CollectionSchema(name="hr_change_stats", has_vectors=False)
+
+HR_SCHEMAS = [
+    GLOSSARY_SCHEMA,
+    SQL_HISTORY_SCHEMA,
+    CATALOG_SCHEMA,
+    CHANGE_LOG_SCHEMA,
+    CHANGE_STATS_SCHEMA,
+]
+
+
+# =============================================================================
+# 단일 컬렉션 (멀티 테넌트) 레이아웃
+# =============================================================================
+# "collections": glossary / sql_history / catalog 컬렉션 3개 (기본)
+# "unified": 하나의 컬렉션에 type(tenant) payload로 구분하여 저장 → 검색 요청 1번 (query_points_groups)
+HR_LAYOUT = os.getenv("HR_LAYOUT", "collections")
+
+# 결과 키 → tenant(type) 값, 새 도메인은 여기에 추가
+TENANT_FIELD = "type"
+HR_TENANTS = {
+    "glossary": "glossary",
+    "sql_history": "history",
+    "catalog": "catalog",
+}
+
+UNIFIED_SCHEMA = CollectionSchema(
+    name="hr_unified",
+    sparse_vector=SPARSE_VECTOR_NAME,
+    payload_indexes={
+        # is_tenant: 같은 tenant의 포인트를 함께 저장하여 tenant 필터 검색의 지역성 향상
+        TENANT_FIELD: KeywordIndexParams(type=PayloadSchemaType.KEYWORD, is_tenant=True),
+        "title": PayloadSchemaType.KEYWORD,
+        "level": PayloadSchemaType.KEYWORD,
+        "table": PayloadSchemaType.KEYWORD,
+        "column": PayloadSchemaType.KEYWORD,
+        "dtype": PayloadSchemaType.KEYWORD,
+    },
+)
+
+UNIFIED_SCHEMAS = [UNIFIED_SCHEMA, CHANGE_LOG_SCHEMA, CHANGE_STATS_SCHEMA]
+
+# 현재 레이아웃에서 사용하는 컬렉션 스키마
+LAYOUT_SCHEMAS = UNIFIED_SCHEMAS if HR_LAYOUT == "unified" else HR_SCHEMAS
+
+
+# =============================================================================
+# apply / diff
+# =============================================================================
+def create_collection(
+    qc: QdrantClient, schema: CollectionSchema, vector_size: Optional[int] = None
+) -> None:
+    if schema.has_vectors:
+        qc.create_collection(
+            collection_name=schema.name,
+            vectors_config=VectorParams(
+                size=vector_size,
+                distance=schema.distance,
+                on_disk=schema.vectors_on_disk,
+            ),
+            hnsw_config=HnswConfigDiff(
+                m=schema.hnsw_m, ef_construct=schema.hnsw_ef_construct
+            ),
+            optimizers_config=OptimizersConfigDiff(
+                memmap_threshold=schema.memmap_threshold
+            ),
+            sparse_vectors_config=sparse_vectors_config(schema),
+            quantization_config=quantization_config(schema.quantization),
+            on_disk_payload=schema.on_disk_payload,
+        )
+    else:
+        qc.create_collection(
+            collection_name=schema.name,
+            vectors_config={},
+            on_disk_payload=schema.on_disk_payload,
+        )
+
+
+def diff_schema(
+    qc: QdrantClient, schema: CollectionSchema, vector_size: Optional[int] = None
+) -> list[str]:
+    """선언과 실제 컬렉션 설정의 차이 목록 (비어 있으면 일치)"""
+    if not qc.collection_exists(schema.name):
+        return [f"{schema.name}: 컬렉션 없음"]
+
+    info = qc.get_collection(schema.name)
+    drift = []
+
+    def check(label, expected, actual):
+        if expected is not None and expected != actual:
+            drift.append(f"{schema.name}: {label} 선언={expected}, 실제={actual}")
+
+    if schema.has_vectors:
+        vectors = info.config.params.vectors
+        check("vector size", vector_size, vectors.size)
+        check("distance", schema.distance, vectors.distance)
+        check("vectors on_disk", schema.vectors_on_disk, bool(vectors.on_disk))
+        check("hnsw m", schema.hnsw_m, info.config.hnsw_config.m)
+        check(
+            "hnsw ef_construct",
+            schema.hnsw_ef_construct,
+            info.config.hnsw_config.ef_construct,
+        )
+        check(
+            "memmap_threshold",
+            schema.memmap_threshold,
+            info.config.optimizer_config.memmap_threshold,
+        )
+        sparse_names = set(info.config.params.sparse_vectors or {})
+        if schema.sparse_vector is not None and schema.sparse_vector not in sparse_names:
+            drift.append(f"{schema.name}: sparse vector {schema.sparse_vector} 없음 (재생성 필요)")
+        actual_quantization = quantization_kind(info.config.quantization_config)
+        if schema.quantization != actual_quantization:
+            drift.append(
+                f"{schema.name}: quantization 선언={schema.quantization}, 실제={actual_quantization}"
+            )
+    check("on_disk_payload", schema.on_disk_payload, bool(info.config.params.on_disk_payload))
+
+    existing = info.payload_schema or {}
+    for field_name, spec in schema.payload_indexes.items():
+        if field_name not in existing:
+            drift.append(f"{schema.name}: {field_name} 인덱스 없음 ({index_type(spec)})")
+        else:
+            check(
+                f"{field_name} 인덱스 타입",
+                index_type(spec),
+                index_type(existing[field_name].data_type),
+            )
+    for field_name in existing:
+        if field_name not in schema.payload_indexes:
+            drift.append(f"{schema.name}: {field_name} 인덱스가 선언에 없음")
+    return drift
+
+
+def apply_schema(
+    qc: QdrantClient, schema: CollectionSchema, vector_size: Optional[int] = None
+) -> list[str]:
+    """없는 컬렉션과 인덱스를 생성하고, 수행한 작업 목록을 반환
+
+    양자화 설정은 재생성 없이 바꿀 수 있으므로 선언과 다르면 업데이트
+    벡터 차원이 다르거나 희소 벡터가 없으면 재생성이 필요하므로 예외 발생
+    """
+    actions = []
+    if not qc.collection_exists(schema.name):
+        create_collection(qc, schema, vector_size)
+        actions.append(f"{schema.name}: 컬렉션 생성")
+    elif schema.has_vectors and vector_size is not None:
+        params = qc.get_collection(schema.name).config.params
+        existing_size = params.vectors.size
+        if existing_size != vector_size:
+            raise ValueError(
+                f"{schema.name} 컬렉션의 벡터 차원({existing_size})이 "
+                f"임베딩 제공자의 차원({vector_size})과 다릅니다. 컬렉션을 삭제 후 다시 생성하세요."
+            )
+        if schema.sparse_vector is not None and schema.sparse_vector not in (
+            params.sparse_vectors or {}
+        ):
+            raise ValueError(
+                f"{schema.name} 컬렉션에 희소 벡터({schema.sparse_vector})가 없습니다. "
+                "컬렉션을 삭제 후 다시 생성하세요."
+            )
+    if schema.has_vectors:
+        current = qc.get_collection(schema.name).config.quantization_config
+        if quantization_kind(current) != schema.quantization:
+            qc.update_collection(
+                collection_name=schema.name,
+                quantization_config=quantization_config(schema.quantization)
+                or Disabled.DISABLED,
+            )
+            actions.append(f"{schema.name}: quantization → {schema.quantization}")
+
+    existing = qc.get_collection(schema.name).payload_schema or {}
+    for field_name, spec in schema.payload_indexes.items():
+        if field_name not in existing:
+            qc.create_payload_index(schema.name, field_name, spec, wait=True)
+            actions.append(f"{schema.name}.{field_name} 인덱스 생성 ({index_type(spec)})")
+    return actions
+
+
+def wait_for_green(qc: QdrantClient, collection_name: str, timeout: float = 600) -> None:
+    """인덱싱/최적화가 끝나 컬렉션 상태가 green이 될 때까지 대기"""
+    deadline = time.time() + timeout
+    while qc.get_collection(collection_name).status != "green":
+        if time.time() > deadline:
+            raise TimeoutError(f"{collection_name} 인덱싱이 {timeout}s 안에 끝나지 않았습니다")
+        time.sleep(0.5)
+
+
+@contextmanager
+def deferred_indexing(qc: QdrantClient, collection_name: str, timeout: float = 3600) -> Iterator[None]:
+    """블록 안에서는 HNSW 인덱싱을 끄고(indexing_threshold=0), 끝나면 원래 값(0 포함)으로 그대로 되돌린 뒤 green까지 대기
+
+    대량 적재 중 배치마다 인덱스를 조금씩 다시 만드는 비용을 없애고, 적재 후 한 번에 구축
+    """
+    threshold = qc.get_collection(collection_name).config.optimizer_config.indexing_threshold
+    if threshold is None:
+        threshold = DEFAULT_INDEXING_THRESHOLD
+    qc.update_collection(collection_name, optimizers_config=OptimizersConfigDiff(indexing_threshold=0))
+    try:
+        yield
+    finally:
+        qc.update_collection(
+            collection_name,
+            optimizers_config=OptimizersConfigDiff(indexing_threshold=threshold),
+        )
+    wait_for_green(qc, collection_name, timeout=timeout)
+
+
+def ensure_collection(qc: QdrantClient, schema: CollectionSchema) -> None:
+    """벡터 없는 컬렉션을 스키마대로 준비 (이미 있으면 요청 1번으로 끝)"""
+    if not qc.collection_exists(schema.name):
+        apply_schema(qc, schema)
+
+
+if __name__ == "__main__":
+    from clients import QDRANT_URL, get_client
+    from embedding import vector_size
+
+    parser = argparse.ArgumentParser(description="HR 컬렉션 스키마 관리")
+    parser.add_argument("command", choices=["diff", "apply"])
+    parser.add_argument("--url", default=QDRANT_URL)
+    args = parser.parse_args()
+
+    qc = get_client(args.url)
+    size = vector_size()
+    for schema in LAYOUT_SCHEMAS:
+        if args.command == "apply":
+            for action in apply_schema(qc, schema, size):
+                print(f"  ✓ {action}")
+        for item in diff_schema(qc, schema, size):
+            print(f"  ⚠️  {item}")
+    print("✅ 스키마 확인 완료")
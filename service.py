@@ -0,0 +1,281 @@
+# service.py
+"""
+검색 서비스 (asyncio, 장시간 실행)
+- 질문 → glossary / catalog / SQL 예제 컨텍스트를 JSON으로 반환 (text-to-SQL 에이전트용)
+- Qdrant / 임베딩 클라이언트를 프로세스당 한 번 만들고 커넥션 풀을 재사용
+- 동시 처리 요청 수 제한(세마포어)과 요청별 타임아웃 (슬롯 대기 포함, 대기 중 초과 시 503 / 검색 중 초과 시 504)
+- 질문 임베딩 캐시(query_cache)와 결과 캐시(result_cache)를 프로세스 수명 동안 유지
+- 외부 웹 프레임워크 없이 표준 라이브러리 asyncio 서버로 동작 (HTTP/1.1 keep-alive)
+
+엔드포인트:
+    POST /context  {"question": "직급별 평균 연봉 조회 방법"}
+    GET  /health
+    GET  /stats    캐시 적중률, 처리 중/누적 요청 수
+
+사용법:
+    uv run service.py --port 8080
+    curl -s localhost:8080/context -d '{"question": "직급별 평균 연봉 조회 방법"}'
+"""
+from dataclasses import asdict
+from typing import Optional
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from clients import QDRANT_URL, get_client, make_async_client
+from query_cache import QueryEmbeddingCache
+from result_cache import SemanticResultCache
+from retrieval import HR_QUERIES, CollectionResult, search_hr_async
+
+SERVICE_MAX_CONCURRENCY = int(os.getenv("SERVICE_MAX_CONCURRENCY", "32"))
+SERVICE_TIMEOUT = float(os.getenv("SERVICE_TIMEOUT", "5.0"))  # 요청당 최대 처리 시간(초)
+MAX_BODY_BYTES = 64 * 1024
+
+# 응답에서 제외할 내부 payload 필드
+INTERNAL_FIELDS = {"content_hash"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+    504: "Gateway Timeout",
+}
+
+
+def to_context(results: dict[str, CollectionResult]) -> dict:
+    """검색 결과를 JSON 응답 형식으로 변환"""
+    return {
+        key: [
+            {
+                "id": p.id,
+                "score": round(p.score, 4),
+                **{k: v for k, v in (p.payload or {}).items() if k not in INTERNAL_FIELDS},
+            }
+            for p in result.points
+        ]
+        for key, result in results.items()
+    }
+
+
+class RetrievalService:
+    """질문 → 컨텍스트 검색 서비스 (클라이언트와 캐시를 프로세스 수명 동안 유지)"""
+
+    def __init__(
+        self,
+        url: str = QDRANT_URL,
+        max_concurrency: int = SERVICE_MAX_CONCURRENCY,
+        timeout: float = SERVICE_TIMEOUT,
+        use_result_cache: bool = True,
+    ):
+        self.url = url
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        # 이벤트 루프 수명 동안 하나의 커넥션 풀 사용 (QDRANT_POOL_SIZE, QDRANT_PREFER_GRPC)
+        self.aqc = make_async_client(url, timeout=int(timeout) + 1)
+        self.query_cache = QueryEmbeddingCache()
+        self.result_cache = (
+            SemanticResultCache(get_client(url)) if use_result_cache else None
+        )
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.served = 0
+        self.failed = 0
+
+    async def context(self, question: str) -> dict:
+        """질문 하나의 glossary / catalog / sql_history 컨텍스트"""
+        timings = {}
+        start_time = time.perf_counter()
+        # 임베딩 캐시/결과 캐시는 동기 API이므로 스레드에서 실행 (이벤트 루프를 막지 않음)
+        vector = await asyncio.to_thread(self.query_cache.get, question)
+        timings["embed_ms"] = (time.perf_counter() - start_time) * 1000
+
+        results = None
+        if self.result_cache is not None:
+            results = await asyncio.to_thread(
+                self.result_cache.lookup, vector, question, HR_QUERIES
+            )
+        cached = results is not None
+        if not cached:
+            search_start = time.perf_counter()
+            searched_at = time.monotonic()
+            results = await search_hr_async(self.aqc, vector, HR_QUERIES, question)
+            timings["search_ms"] = (time.perf_counter() - search_start) * 1000
+            if self.result_cache is not None:
+                self.result_cache.store(vector, results, HR_QUERIES, question, searched_at)
+        timings["total_ms"] = (time.perf_counter() - start_time) * 1000
+        return {
+            "question": question,
+            "cached": cached,
+            **to_context(results),
+            "timings": {k: round(v, 2) for k, v in timings.items()},
+        }
+
+    async def handle_context(self, body: bytes) -> dict:
+        try:
+            request = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            raise HTTPError(400, "JSON 형식이 아닙니다")
+        question = request.get("question") if isinstance(request, dict) else None
+        if not isinstance(question, str) or not question.strip():
+            raise HTTPError(400, "question 필드가 필요합니다")
+
+        # 슬롯 대기와 검색을 합쳐 요청당 timeout초 (과부하 시 대기열이 끝없이 길어지지 않도록)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            raise HTTPError(
+                503, f"{self.timeout}s 안에 처리 슬롯이 나지 않았습니다 (동시 {self.max_concurrency}개 처리 중)"
+            )
+        self.in_flight += 1
+        try:
+            return await asyncio.wait_for(self.context(question), deadline - loop.time())
+        except asyncio.TimeoutError:
+            raise HTTPError(504, f"{self.timeout}s 안에 검색이 끝나지 않았습니다")
+        finally:
+            self.in_flight -= 1
+            self.semaphore.release()
+
+    def stats(self) -> dict:
+        query_stats = self.query_cache.stats()
+        result_stats = self.result_cache.stats() if self.result_cache else None
+        return {
+            "in_flight": self.in_flight,
+            "served": self.served,
+            "failed": self.failed,
+            "query_cache": {**asdict(query_stats), "hit_rate": query_stats.hit_rate},
+            "result_cache": (
+                {**asdict(result_stats), "hit_rate": result_stats.hit_rate}
+                if result_stats
+                else None
+            ),
+        }
+
+    async def route(self, method: str, path: str, body: bytes) -> dict:
+        if method == "POST" and path == "/context":
+            return await self.handle_context(body)
+        if method == "GET" and path == "/health":
+            return {"status": "ok"}
+        if method == "GET" and path == "/stats":
+            return self.stats()
+        raise HTTPError(404, f"{method} {path} 엔드포인트가 없습니다")
+
+    async def close(self) -> None:
+        await self.aqc.close()
+
+
+# =============================================================================
+# 최소 HTTP/1.1 서버 (keep-alive 지원)
+# =============================================================================
+async def read_request(
+    reader: asyncio.StreamReader,
+) -> Optional[tuple[str, str, dict, bytes]]:
+    """요청 하나를 읽어 (method, path, headers, body) 반환, 연결이 닫혔으면 None"""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, path, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "잘못된 요청")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise HTTPError(400, "Content-Length가 정수가 아닙니다")
+    if length < 0:
+        raise HTTPError(400, "Content-Length가 음수입니다")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, "요청 본문이 너무 큽니다")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), path.split("?", 1)[0], headers, body
+
+
+def write_response(
+    writer: asyncio.StreamWriter, status: int, payload: dict, keep_alive: bool
+) -> None:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + body)
+
+
+async def serve(service: RetrievalService, host: str, port: int) -> None:
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    request = await read_request(reader)
+                    if request is None:
+                        break
+                    method, path, headers, body = request
+                    keep_alive = headers.get("connection", "").lower() != "close"
+                    payload = await service.route(method, path, body)
+                    status = 200
+                    service.served += 1
+                except HTTPError as e:
+                    status, payload = e.status, {"error": e.message}
+                    service.failed += 1
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except Exception as e:
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+                    service.failed += 1
+                write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    print(f"✅ 검색 서비스 시작: http://{host}:{port} (Qdrant: {service.url})")
+    print(f"   동시 처리 {service.max_concurrency}건, 요청 타임아웃 {service.timeout}s")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HR 검색 서비스")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--url", default=QDRANT_URL, help="Qdrant 주소")
+    parser.add_argument("--no-result-cache", action="store_true", help="결과 캐시 사용 안 함")
+    args = parser.parse_args()
+
+    async def main():
+        service = RetrievalService(args.url, use_result_cache=not args.no_result_cache)
+        await serve(service, args.host, args.port)
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n검색 서비스 종료")
@@ -0,0 +1,90 @@
+# sparse.py
+"""
+희소(sparse) 어휘 벡터 (BM25 방식)
+- emp_id, employment_status, countIf 같은 SQL 식별자와 HR 용어의 정확한 일치를 dense 벡터가 놓치는 문제 보완
+- 로컬 토크나이저 (외부 모델/형태소 분석기 없음)
+  - 영문/SQL 식별자: 소문자 토큰 그대로 + snake_case 조각 (emp_id → emp_id, emp, id)
+  - 한글: 어절 + 글자 bigram (조사가 붙어도 일치: 연봉을 → 연봉을, 연봉, 봉을)
+- 토큰은 crc32 해시로 인덱스화, 문서 쪽 값은 BM25 tf 가중치
+- IDF는 Qdrant 서버가 계산 (sparse vector modifier=IDF) → 질의 쪽 값은 1
+"""
+from collections import Counter
+from typing import Any, Optional
+import os
+import re
+import zlib
+
+from qdrant_client.models import SparseVector
+
+SPARSE_VECTOR_NAME = "text"
+
+# BM25 파라미터 (avgdl은 컬렉션마다 다르지만 고정값으로 근사)
+BM25_K1 = 1.2
+BM25_B = 0.75
+BM25_AVG_DOC_LEN = float(os.getenv("SPARSE_AVG_DOC_LEN", "40"))
+
+TOKEN_PATTERN = re.compile(r"[a-z_][a-z0-9_]*|[0-9]+|[가-힣]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """한글 어절/bigram과 SQL 식별자를 함께 뽑는 토크나이저"""
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text.lower()):
+        token = match.group()
+        tokens.append(token)
+        if "가" <= token[0] <= "힣":
+            if len(token) > 2:
+                tokens.extend(token[i : i + 2] for i in range(len(token) - 1))
+        elif "_" in token:
+            tokens.extend(part for part in token.split("_") if part)
+    return tokens
+
+
+def token_index(token: str) -> int:
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def to_sparse(weights: dict[str, float]) -> SparseVector:
+    """토큰 가중치를 인덱스별로 합쳐 SparseVector로 변환 (해시 충돌 시 합산)"""
+    merged: dict[int, float] = {}
+    for token, weight in weights.items():
+        index = token_index(token)
+        merged[index] = merged.get(index, 0.0) + weight
+    indices = sorted(merged)
+    return SparseVector(indices=indices, values=[merged[i] for i in indices])
+
+
+def encode_document(text: str) -> SparseVector:
+    """문서 텍스트 → BM25 tf 가중치 희소 벡터"""
+    counts = Counter(tokenize(text))
+    length = sum(counts.values())
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / BM25_AVG_DOC_LEN)
+    return to_sparse(
+        {token: tf * (BM25_K1 + 1) / (tf + norm) for token, tf in counts.items()}
+    )
+
+
+def encode_query(text: str) -> SparseVector:
+    """질문 텍스트 → 희소 벡터 (IDF는 서버에서 곱함)"""
+    return to_sparse({token: 1.0 for token in tokenize(text)})
+
+
+def identifier_terms(text: str) -> frozenset[str]:
+    """질문에 포함된 영문/SQL 식별자 (결과 캐시에서 식별자가 다른 질문을 구분하는 데 사용)"""
+    return frozenset(
+        token
+        for token in (m.group() for m in TOKEN_PATTERN.finditer(text.lower()))
+        if token.isascii() and not token.isdigit()
+    )
+
+
+def point_vector(dense: list[float], text: str, sparse_vector: Optional[str]) -> Any:
+    """upsert/update_vectors에 넘길 벡터 (희소 벡터 이름이 있으면 dense + 희소 dict)"""
+    if sparse_vector is None:
+        return dense
+    return {"": dense, sparse_vector: encode_document(text)}
+
+
+def dense_vector(vector: Any) -> list[float]:
+    """포인트 벡터에서 dense 벡터만 추출 (희소 벡터가 함께 있으면 dict로 반환됨)"""
+    return vector[""] if isinstance(vector, dict) else vector
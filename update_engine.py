@@ -0,0 +1,183 @@
+# update_engine.py
+"""
+일괄 업데이트 엔진
+- 변경 목록을 받아 컬렉션별로 현재 payload를 한 번의 retrieve로 조회
+- 변경 전후 값을 로컬에서 비교하여 실제로 바뀐 항목만 반영
+- set_payload / update_vectors 작업을 컬렉션별 batch_update_points 한 번으로 적용
+  → N개 포인트 업데이트가 (컬렉션 수 × 2)번의 요청으로 끝남
+- 변경 이력은 변경 로그 컬렉션(changelog)에 한 번의 upsert로 추가
+  (재임베딩한 변경은 embed_text도 기록 → 재색인 때 새 버전 컬렉션에 다시 적용, entry_fields로 payload 복원)
+  (변경 당시 포인트의 content_hash도 기록 → 이후 원본 재적재로 덮어쓴 변경인지 구분)
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    PointVectors,
+    SetPayload,
+    SetPayloadOperation,
+    UpdateVectors,
+    UpdateVectorsOperation,
+)
+
+from changelog import write_entries
+from embedding import EmbeddingEngine, get_engine
+from sparse import SPARSE_VECTOR_NAME, point_vector
+
+
+@dataclass
+class Change:
+    """포인트 하나에 대한 변경 요청
+
+    embed_text를 지정하면 해당 텍스트로 재임베딩한 벡터도 함께 업데이트
+    """
+
+    collection_name: str
+    point_id: int
+    payload: dict
+    reason: str
+    embed_text: Optional[str] = None
+
+
+def diff_payload(old_payload: dict, new_fields: dict) -> dict:
+    """실제로 값이 바뀐 필드만 {필드: (이전 값, 이후 값)}으로 반환"""
+    return {
+        key: (old_payload.get(key), value)
+        for key, value in new_fields.items()
+        if old_payload.get(key) != value
+    }
+
+
+def history_entry(
+    change: Change, diff: dict, timestamp: str, content_hash: Optional[str] = None
+) -> dict:
+    fields = " + ".join(diff)
+    if change.embed_text is not None:
+        fields = f"vector + {fields}" if fields else "vector"
+    # 필드가 하나면 값 자체를, 여러 개면 필드별 dict로 기록
+    if len(diff) == 1:
+        (old_value, new_value), = diff.values()
+    else:
+        old_value = {key: old for key, (old, _) in diff.items()}
+        new_value = {key: new for key, (_, new) in diff.items()}
+    entry = {
+        "timestamp": timestamp,
+        "collection_name": change.collection_name,
+        "point_id": change.point_id,
+        "field": fields,
+        "old_value": old_value,
+        "new_value": new_value,
+        "reason": change.reason,
+    }
+    # 재색인(reindex.py) 때 새 버전에 같은 벡터를 다시 만들 수 있도록 임베딩 텍스트도 기록
+    if change.embed_text is not None:
+        entry["embed_text"] = change.embed_text
+    # 변경을 적용한 포인트의 원본 버전 (ingest가 기록한 content_hash, 다르면 원본 재적재로 덮어쓴 변경)
+    if content_hash is not None:
+        entry["content_hash"] = content_hash
+    return entry
+
+
+def entry_fields(entry: dict) -> dict:
+    """변경 이력에서 변경 후 payload 필드 {필드: 값} 복원 (history_entry의 역변환)"""
+    fields = [f for f in entry.get("field", "").split(" + ") if f and f != "vector"]
+    if len(fields) == 1:
+        return {fields[0]: entry.get("new_value")}
+    return dict(entry.get("new_value") or {})
+
+
+def apply_changes(
+    qc: QdrantClient,
+    changes: list[Change],
+    engine: Optional[EmbeddingEngine] = None,
+) -> list[dict]:
+    """변경 목록을 일괄 적용하고, 적용된 변경 이력 목록을 반환
+
+    변경 이력은 검색 대상 payload가 아닌 변경 로그 컬렉션에 기록 (개수 제한 없음)
+    존재하지 않는 포인트나 값이 바뀌지 않은 변경은 건너뜀
+    """
+    by_collection: dict[str, list[Change]] = {}
+    for change in changes:
+        by_collection.setdefault(change.collection_name, []).append(change)
+
+    # 재임베딩이 필요한 텍스트는 모든 컬렉션을 통틀어 한 번에 임베딩
+    to_embed = [c for c in changes if c.embed_text is not None]
+    vectors = {}
+    if to_embed:
+        engine = engine or get_engine()
+        embedded = engine.embed(c.embed_text for c in to_embed)
+        vectors = {id(c): v for c, v in zip(to_embed, embedded)}
+
+    applied = []
+    timestamp = datetime.now().isoformat()
+    for collection_name, group in by_collection.items():
+        ids = list(dict.fromkeys(c.point_id for c in group))
+        fields = {key for c in group for key in c.payload} | {"content_hash"}
+        current = {
+            p.id: p.payload or {}
+            for p in qc.retrieve(
+                collection_name=collection_name,
+                ids=ids,
+                with_payload=list(fields),
+                with_vectors=False,
+            )
+        }
+
+        # 희소 벡터가 있는 컬렉션은 재임베딩 시 희소 벡터도 같은 텍스트로 갱신
+        sparse_vector = None
+        if any(c.embed_text is not None for c in group):
+            sparse_names = qc.get_collection(collection_name).config.params.sparse_vectors
+            if SPARSE_VECTOR_NAME in (sparse_names or {}):
+                sparse_vector = SPARSE_VECTOR_NAME
+
+        operations = []
+        for change in group:
+            if change.point_id not in current:
+                continue
+            old_payload = current[change.point_id]
+            diff = diff_payload(old_payload, change.payload)
+            if not diff and change.embed_text is None:
+                continue
+
+            new_fields = {key: new for key, (_, new) in diff.items()}
+            # 같은 포인트를 여러 번 바꾸는 경우 다음 비교에 반영
+            old_payload.update(new_fields)
+
+            if new_fields:
+                operations.append(
+                    SetPayloadOperation(
+                        set_payload=SetPayload(
+                            payload=new_fields, points=[change.point_id]
+                        )
+                    )
+                )
+            if change.embed_text is not None:
+                operations.append(
+                    UpdateVectorsOperation(
+                        update_vectors=UpdateVectors(
+                            points=[
+                                PointVectors(
+                                    id=change.point_id,
+                                    vector=point_vector(
+                                        vectors[id(change)], change.embed_text, sparse_vector
+                                    ),
+                                )
+                            ]
+                        )
+                    )
+                )
+            applied.append(
+                history_entry(change, diff, timestamp, old_payload.get("content_hash"))
+            )
+
+        if operations:
+            qc.batch_update_points(
+                collection_name=collection_name,
+                update_operations=operations,
+                wait=True,
+            )
+
+    write_entries(qc, applied)
+    return applied